@@ -48,55 +48,36 @@ Examples:
 >>> data = ba.AkShare.market_daily('000001.SZ')
 >>> data.printer.display(title='000001.SZ')
 >>> data.sqliter.to_sql(table='test', database='database_connection_string')
+
+Lazy loading
+------------
+
+Importing bearalpha only registers the names, the subsystem behind them
+(pandas, backtrader, matplotlib, sqlalchemy, requests ...) is imported the 
+first time a name or an accessor is used. The accessors are installed on 
+pandas when bearalpha is imported after pandas, or on the first use of a
+name in bearalpha like `ba.DataFrame`.
 """
 
-from pandas import (
-    DataFrame as PDDataFrame,
-    Series as PDSeires,
-)
-
-from .oxygene import *
-from .quool import *
-from .tools import *
-
-class DataFrame(PDDataFrame):
-    drawer: Drawer
-    printer: Printer
-    regressor: Regressor
-    describer: Describer
-    decompositer: Decompositer
-    tester: SigTester
-    filer: Filer
-    sqliter: Sqliter
-    mysqler: Mysqler
-    calculator: Calculator
-    converter: Converter
-    preprocessor: PreProcessor
-    backtrader: BackTrader
-    relocator: Relocator
-    factester: Factester
-    evaluator: Evaluator
-
-
-class Series(PDSeires):
-    drawer: Drawer
-    printer: Printer
-    regressor: Regressor
-    describer: Describer
-    decompositer: Decompositer
-    tester: SigTester
-    filer: Filer
-    sqliter: Sqliter
-    mysqler: Mysqler
-    calculator: Calculator
-    converter: Converter
-    preprocessor: PreProcessor
-    backtrader: BackTrader
-    relocator: Relocator
-    factester: Factester
-    evaluator: Evaluator
+import importlib as _importlib
+from . import oxygene, quool, tools
+from .tools.common import lazy_getattr as _lazy_getattr
 
+__all__ = oxygene.__all__ + quool.__all__ + tools.__all__
 
-__version__ = '0.1.5'
+def _load(module: str):
+    """install the accessors on pandas, then import module"""
+    quool._register()
+    return _importlib.import_module(module, __name__)
 
-del PDDataFrame, PDSeires
\ No newline at end of file
+__getattr__ = _lazy_getattr(__name__, dict(
+    [(name, '.oxygene') for name in oxygene.__all__] +
+    [(name, '.quool') for name in quool.__all__] +
+    [(name, '.tools') for name in tools.__all__] +
+    [(name, '._frame') for name in ('DataFrame', 'Series')]
+), _load)
+
+def __dir__():
+    return sorted(set(globals()) | set(__all__) | {'DataFrame', 'Series'})
+
+__version__ = '0.1.5'
@@ -2,8 +2,7 @@ import re
 import os
 import importlib
 import argparse
-from .oxygene import *
-from .tools import *
+from .tools import Console
 
 
 def set(args):
@@ -0,0 +1,60 @@
+"""Typed DataFrame and Series, annotating the accessors of quool
+for the editors, loaded on first use so that importing bearalpha
+won't import pandas
+"""
+
+from __future__ import annotations
+
+from typing import TYPE_CHECKING
+from pandas import (
+    DataFrame as PDDataFrame,
+    Series as PDSeires,
+)
+
+if TYPE_CHECKING:
+    from .quool import (
+        Drawer, Printer, Regressor, Describer, Decompositer, SigTester,
+        Filer, Sqliter, Mysqler, Calculator, Converter, PreProcessor,
+        BackTrader, Relocator, Factester, Evaluator,
+    )
+
+
+class DataFrame(PDDataFrame):
+    drawer: Drawer
+    printer: Printer
+    regressor: Regressor
+    describer: Describer
+    decompositer: Decompositer
+    tester: SigTester
+    filer: Filer
+    sqliter: Sqliter
+    mysqler: Mysqler
+    calculator: Calculator
+    converter: Converter
+    preprocessor: PreProcessor
+    backtrader: BackTrader
+    relocator: Relocator
+    factester: Factester
+    evaluator: Evaluator
+
+
+class Series(PDSeires):
+    drawer: Drawer
+    printer: Printer
+    regressor: Regressor
+    describer: Describer
+    decompositer: Decompositer
+    tester: SigTester
+    filer: Filer
+    sqliter: Sqliter
+    mysqler: Mysqler
+    calculator: Calculator
+    converter: Converter
+    preprocessor: PreProcessor
+    backtrader: BackTrader
+    relocator: Relocator
+    factester: Factester
+    evaluator: Evaluator
+
+
+__all__ = ['DataFrame', 'Series']
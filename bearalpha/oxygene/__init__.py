@@ -1,13 +1,27 @@
-from .source import *
-from .stream import *
-from .base import (
-    cache,
-    Request,
-    ProxyRequest,
-    DataBase,
-    Loader,
-    get_proxy,
-    chd,
-    ctd,
-    async_job,
-)
\ No newline at end of file
+from ..tools.common import lazy_getattr
+
+# crawlers and database providers are loaded on first use
+_lazy = {
+    'StockUS': '.source.stockus',
+    'Em': '.source.em',
+    'Guba': '.source.em',
+    'AkShare': '.source.ak',
+    'Cnki': '.source.cnki',
+    'HotTopic': '.source.weibo',
+    'WeiboSearch': '.source.weibo',
+    'Local': '.stream.local',
+    'Stock': '.stream.provider',
+    'cache': '.base',
+    'Request': '.base',
+    'ProxyRequest': '.base',
+    'DataBase': '.base',
+    'Loader': '.base',
+    'get_proxy': '.base',
+    'chd': '.base',
+    'ctd': '.base',
+    'async_job': '.base',
+}
+
+__all__ = list(_lazy.keys())
+
+__getattr__ = lazy_getattr(__name__, _lazy)
@@ -5,7 +5,6 @@ import random
 import pickle
 import hashlib
 import datetime
-import requests
 import pandas as pd
 from functools import wraps
 from ..tools import *
@@ -16,17 +15,21 @@ def cache(
     prefix: str = 'generic', 
     expire: float = 3600,
 ):
-    from diskcache import Cache
     if directory is None:
         directory = os.path.join(os.path.split(
             os.path.abspath(__file__))[0] , '..', 'cache')
-    _cache = Cache(directory=directory)
-    _cache.reset('size_limit', int(50e6))
-    _cache.reset('cull_limit', 0)
+    _cache = None
 
     def wrapper(func):
         @wraps(func)
         def wrapped(*args, **kwargs):
+            # cache database is opened on the first call
+            nonlocal _cache
+            if _cache is None:
+                from diskcache import Cache
+                _cache = Cache(directory=directory)
+                _cache.reset('size_limit', int(50e6))
+                _cache.reset('cull_limit', 0)
             hash_key = hashlib.md5(pickle.dumps(f'{func.__name__};{args};{kwargs}')).hexdigest()
             data = _cache.get(key=prefix + ':' + hash_key)
             if data is not None:
@@ -74,6 +77,7 @@ class Request:
         return base_header
 
     def get(self):
+        import requests
         try:
             response = requests.get(self.url, headers=self.headers, **self.kwargs)
             response.raise_for_status()
@@ -86,6 +90,7 @@ class Request:
                 print(f'[-] Error: {e}')
 
     def post(self):
+        import requests
         try:
             response = requests.post(self.url, headers=self.headers, **self.kwargs)
             response.raise_for_status()        
@@ -138,6 +143,7 @@ class ProxyRequest(Request):
         self.verbose = verbose
     
     def get(self):
+        import requests
         if isinstance(self.proxies, dict):
             self.proxies = [self.proxies]
         random.shuffle(self.proxies) 
@@ -156,6 +162,7 @@ class ProxyRequest(Request):
                     time.sleep(self.retry_delay)
 
     def post(self):
+        import requests
         if isinstance(self.proxies, dict):
             self.proxies = [self.proxies]
         random.shuffle(self.proxies) 
@@ -1,4 +1,5 @@
 import datetime
+import requests
 import pandas as pd
 from ..base import *
 from ...tools import *
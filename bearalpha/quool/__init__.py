@@ -1,47 +1,93 @@
-from .base import (
-    Strategy,
-    Indicator,
-    Analyzer,
-    Observer,
-    OrderTable,
-    from_array,
-    concat,
-    read_excel, read_csv,
-)
-
-from .artist import (
-    Drawer,
-    Printer,
-)
-
-from .analyst import (
-    Regressor,
-    Describer,
-    Decompositer,
-    SigTester,
-)
-
-from .fetcher import (
-    Filer,
-    Sqliter,
-    Mysqler,
-)
-
-from .calculator import (
-    Calculator
-)
-    
-from .processor import (
-    PreProcessor,
-    Converter,
-)
-
-from .backtester import (
-    Relocator,
-    BackTrader,
-    Factester,
-)
-
-from .evaluator import (
-    Evaluator,
-)
+import sys
+import importlib
+from ..tools.common import lazy_getattr, LazyAccessor
+
+# workers are loaded on first use, so that importing quool
+# won't pull in pandas, backtrader, matplotlib or sqlalchemy
+_lazy = {
+    'PanelCube': '.base',
+    'RaggedPanel': '.base',
+    'GroupIndex': '.base',
+    'SharedPanel': '.base',
+    'Strategy': '.strategy',
+    'Indicator': '.strategy',
+    'Analyzer': '.strategy',
+    'Observer': '.strategy',
+    'OrderTable': '.strategy',
+    'from_array': '.base',
+    'concat': '.base',
+    'read_excel': '.base',
+    'read_csv': '.base',
+    'Drawer': '.artist',
+    'Printer': '.artist',
+    'Regressor': '.analyst',
+    'Describer': '.analyst',
+    'Decompositer': '.analyst',
+    'SigTester': '.analyst',
+    'Filer': '.fetcher',
+    'Sqliter': '.fetcher',
+    'Mysqler': '.fetcher',
+    'PanelStore': '.fetcher',
+    'Calculator': '.calculator',
+    'Factory': '.factory',
+    'FactorCache': '.factory',
+    'PreProcessor': '.processor',
+    'Converter': '.processor',
+    'Relocator': '.backtester',
+    'BackTrader': '.backtester',
+    'Factester': '.backtester',
+    'Evaluator': '.evaluator',
+}
+
+# accessor name to the module registering it
+_accessors = {
+    'drawer': '.artist',
+    'printer': '.artist',
+    'regressor': '.analyst',
+    'describer': '.analyst',
+    'decompositer': '.analyst',
+    'sigtester': '.analyst',
+    'filer': '.fetcher',
+    'sqliter': '.fetcher',
+    'mysqler': '.fetcher',
+    'calculator': '.calculator',
+    'converter': '.processor',
+    'preprocessor': '.processor',
+    'relocator': '.backtester',
+    'backtrader': '.backtester',
+    'factester': '.backtester',
+    'evaluator': '.evaluator',
+}
+
+_registered = False
+
+def _register():
+    """install the placeholders of accessors on pandas once"""
+    global _registered
+    if _registered:
+        return
+    _registered = True
+    import pandas as pd
+    for name, module in _accessors.items():
+        for klass in (pd.DataFrame, pd.Series):
+            LazyAccessor.register(klass, name, lambda module=module: _load(module))
+
+def _load(module: str):
+    """remove the placeholders of accessors in module, then import it"""
+    import pandas as pd
+    _register()
+    for name, mod in _accessors.items():
+        if mod == module:
+            for klass in (pd.DataFrame, pd.Series):
+                if isinstance(klass.__dict__.get(name), LazyAccessor):
+                    delattr(klass, name)
+    return importlib.import_module(module, __name__)
+
+# the accessors are installed now if pandas is imported, otherwise
+# on the first use of a name in bearalpha, which imports pandas anyway
+if 'pandas' in sys.modules:
+    _register()
+
+__all__ = list(_lazy.keys())
+
+__getattr__ = lazy_getattr(__name__, _lazy, _load)
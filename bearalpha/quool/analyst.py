@@ -1,3 +1,4 @@
+import warnings
 import numpy as np
 import pandas as pd
 from .base import *
@@ -29,6 +30,99 @@ class Regressor(Worker):
         """To make data available for regress"""
         return data.dropna()
     
+    def _batched_ols(
+        self,
+        y: pd.Series,
+        intercept: bool = True,
+        chunksize: int = 256,
+    ) -> 'pd.DataFrame | pd.Series':
+        """Solve the OLS of every date at once with batched QR
+        -------------------------------------------------------
+
+        The data and y are aligned only once, the rows of each date are padded
+        into a (date, row, regressor) block with zeros, which change nothing in 
+        the least squares, and the blocks of chunksize dates are solved together
+
+        return: DataFrame indexed by date for panel, Series for others, with 
+            'coef', 'stderr', 'tvalue', 'pvalue' of each regressor, 'rsquared' and 'nobs'
+        """
+        from scipy import stats
+
+        x = self.data.to_frame() if self.isseries(self.data) else self.data
+        y = y.reindex(x.index)
+        valid = x.notna().all(axis=1).to_numpy() & y.notna().to_numpy()
+        x, y = x.loc[valid], y.to_numpy(dtype='float64')[valid]
+        names = (['const'] if intercept else []) + list(x.columns)
+        values = x.to_numpy(dtype='float64')
+        if intercept:
+            values = np.concatenate([np.ones((values.shape[0], 1)), values], axis=1)
+        
+        ispanel = self.type_ == Worker.PNFR or self.type_ == Worker.PNSR
+        if ispanel:
+            codes, dates = pd.factorize(x.index.get_level_values(0), sort=True)
+        else:
+            codes, dates = np.zeros(values.shape[0], dtype='int64'), pd.Index([0])
+        order = np.argsort(codes, kind='stable')
+        codes, values, y = codes[order], values[order], y[order]
+        counts = np.bincount(codes, minlength=dates.size)
+        offsets = np.concatenate([[0], np.cumsum(counts)])
+        rank = np.arange(codes.size) - offsets[codes]
+
+        nreg = len(names)
+        result = np.full((dates.size, 4 * nreg + 2), np.nan)
+        result[:, -1] = counts
+        for start in range(0, dates.size, chunksize):
+            stop = min(start + chunksize, dates.size)
+            rows = slice(offsets[start], offsets[stop])
+            nobs = counts[start:stop]
+            xblock = np.zeros((stop - start, max(nobs.max(initial=0), nreg), nreg))
+            yblock = np.zeros(xblock.shape[:2])
+            xblock[codes[rows] - start, rank[rows]] = values[rows]
+            yblock[codes[rows] - start, rank[rows]] = y[rows]
+
+            q, r = np.linalg.qr(xblock)
+            diagonal = np.abs(np.diagonal(r, axis1=-2, axis2=-1))
+            fullrank = diagonal.min(axis=-1) > 1e-10 * np.maximum(diagonal.max(axis=-1), 1e-300)
+            coef = np.full((stop - start, nreg), np.nan)
+            xtxinv = np.full((stop - start, nreg, nreg), np.nan)
+            matrank = np.full(stop - start, nreg)
+            if fullrank.any():
+                rinv = np.linalg.inv(r[fullrank])
+                coef[fullrank] = (rinv @ (q[fullrank].transpose(0, 2, 1) @ yblock[fullrank][..., None]))[..., 0]
+                xtxinv[fullrank] = rinv @ rinv.transpose(0, 2, 1)
+            if not fullrank.all():
+                # pseudo inverse like statsmodels for the collinear dates
+                pinv = np.linalg.pinv(xblock[~fullrank])
+                coef[~fullrank] = (pinv @ yblock[~fullrank][..., None])[..., 0]
+                xtxinv[~fullrank] = pinv @ pinv.transpose(0, 2, 1)
+                matrank[~fullrank] = np.linalg.matrix_rank(xblock[~fullrank])
+
+            # no inference without residual degrees of freedom, the exact fits keep coef
+            dof = nobs - matrank
+            infer = dof > 0
+            stderr, tvalue, pvalue = (np.full_like(coef, np.nan) for _ in range(3))
+            with np.errstate(divide='ignore', invalid='ignore'):
+                resid = yblock - (xblock @ coef[..., None])[..., 0]
+                ssr = (resid ** 2).sum(axis=1)
+                if infer.any():
+                    scale = ssr[infer] / dof[infer]
+                    stderr[infer] = np.sqrt(np.diagonal(xtxinv[infer], axis1=-2, axis2=-1) * scale[:, None])
+                    tvalue[infer] = coef[infer] / stderr[infer]
+                    pvalue[infer] = 2 * stats.t.sf(np.abs(tvalue[infer]), dof[infer][:, None])
+                tss = (yblock ** 2).sum(axis=1)
+                if intercept:
+                    tss -= yblock.sum(axis=1) ** 2 / nobs
+                rsquared = 1 - ssr / tss
+            block = np.concatenate([coef, stderr, tvalue, pvalue, rsquared[:, None]], axis=1)
+            block[nobs < nreg] = np.nan
+            result[start:stop, :-1] = block
+
+        columns = pd.MultiIndex.from_tuples([(stat, name) for stat in ['coef', 'stderr', 'tvalue', 'pvalue'] 
+            for name in names] + [('rsquared', ''), ('nobs', '')])
+        if not ispanel:
+            return pd.Series(result[0], index=columns)
+        return pd.DataFrame(result, index=pd.Index(dates, name=x.index.names[0]), columns=columns)
+
     def ols(
         self, 
         y: pd.Series, 
@@ -41,8 +135,14 @@ class Regressor(Worker):
 
         y: Series, assigned y value in a series form
         intercept: bool, whether to add a intercept value
-        kwargs: some other kwargs passed to backend
+        backend: str, 'statsmodels' or 'sklearn' returning the models, or 'numpy'
+            solving all the dates at once and returning the estimates only, the
+            inference is NaN for the dates without residual degrees of freedom
+        kwargs: some other kwargs passed to backend, chunksize for numpy
         """
+        if backend == 'numpy':
+            return self._batched_ols(y, intercept, **kwargs)
+
         data = self._valid(self.data.copy())
         y = self._valid(y)
 
@@ -250,6 +350,32 @@ class Describer(Worker):
             else:
                 return self.data.corr(method=method)
 
+    @staticmethod
+    def _csrank(values: np.ndarray) -> np.ndarray:
+        """average rank along the asset axis, NaN kept"""
+        shape = values.shape
+        flat = np.moveaxis(values, 1, 0).reshape((shape[1], -1))
+        ranked = pd.DataFrame(flat).rank(axis=0).to_numpy()
+        return np.moveaxis(ranked.reshape((shape[1], shape[0]) + shape[2:]), 0, 1)
+
+    @staticmethod
+    def _cscorr(x: np.ndarray, y: np.ndarray, method: str = 'pearson') -> np.ndarray:
+        """correlation along the asset axis of (date, asset, field) x and (date, asset) y"""
+        y = np.broadcast_to(y[:, :, None], x.shape)
+        valid = ~np.isnan(x) & ~np.isnan(y)
+        x = np.where(valid, x, np.nan)
+        y = np.where(valid, y, np.nan)
+        if method == 'spearman':
+            x, y = Describer._csrank(x), Describer._csrank(y)
+        with np.errstate(invalid='ignore', divide='ignore'), warnings.catch_warnings():
+            warnings.simplefilter('ignore', category=RuntimeWarning)
+            x = x - np.nanmean(x, axis=1, keepdims=True)
+            y = y - np.nanmean(y, axis=1, keepdims=True)
+            corr = np.nansum(x * y, axis=1) / np.sqrt(
+                np.nansum(x ** 2, axis=1) * np.nansum(y ** 2, axis=1))
+        corr[valid.sum(axis=1) < 2] = np.nan
+        return corr
+
     def ic(
         self, 
         ret: pd.Series, 
@@ -260,9 +386,49 @@ class Describer(Worker):
         ------------------------
 
         other: series, the forward column
+        grouper: Series or GroupIndex, the groups within each date
         method: str, 'spearman' means rank ic
         """
        
+        if (self.type_ == Worker.PNSR or self.type_ == Worker.PNFR) and grouper is None \
+            and method in ('pearson', 'spearman'):
+            # correlations of all dates and factors at once on the dense cube
+            cube = self._to_cube()
+            ret = ret.iloc[:, 0] if self.isframe(ret) else ret
+            ic = self._cscorr(cube.values, cube.reindex(ret), method)
+            ic = pd.DataFrame(ic, index=cube.dates, columns=cube.fields)
+            return ic.iloc[:, 0] if self.type_ == Worker.PNSR else ic
+
+        if (self.type_ == Worker.PNSR or self.type_ == Worker.PNFR) and self.isseries(grouper) \
+            and self.ispanel(grouper) and method in ('pearson', 'spearman'):
+            grouper = GroupIndex.from_data(grouper)
+
+        if (self.type_ == Worker.PNSR or self.type_ == Worker.PNFR) and isinstance(grouper, GroupIndex) \
+            and method in ('pearson', 'spearman'):
+            # correlations of all (date, group) segments at once
+            grouper = grouper.align(self.data.index)
+            ret = ret.iloc[:, 0] if self.isframe(ret) else ret
+            x = self.data.to_numpy(dtype='float64').reshape((self.data.shape[0], -1))
+            y = ret.reindex(self.data.index).to_numpy(dtype='float64')
+            valid = ~np.isnan(x) & ~np.isnan(y)[:, None] & (grouper.codes >= 0)[:, None]
+            x = np.where(valid, x, np.nan)
+            y = np.where(valid, y[:, None], np.nan)
+            if method == 'spearman':
+                x = pd.DataFrame(x).groupby(grouper.codes).rank().to_numpy()
+                y = pd.DataFrame(y).groupby(grouper.codes).rank().to_numpy()
+            with np.errstate(invalid='ignore', divide='ignore'):
+                x = x - grouper.transform(x, 'mean')
+                y = y - grouper.transform(y, 'mean')
+                ic = grouper.reduce(x * y, 'sum') / np.sqrt(
+                    grouper.reduce(x ** 2, 'sum') * grouper.reduce(y ** 2, 'sum'))
+            ic[grouper.reduce(valid.astype('float64'), 'sum') < 2] = np.nan
+            fields = [self.data.name] if self.isseries(self.data) else self.data.columns
+            ic = pd.DataFrame(ic, index=grouper.labels, columns=fields)
+            return ic.iloc[:, 0] if self.type_ == Worker.PNSR else ic
+
+        if isinstance(grouper, GroupIndex):
+            grouper = grouper.align(self.data.index).grouper
+
         groupers = [pd.Grouper(level=0)]
         if grouper is not None:
             groupers += item2list(grouper)
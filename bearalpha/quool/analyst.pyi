@@ -18,13 +18,16 @@ class Regressor(quool.base.Worker):
         intercept: bool = True,
         backend: str = 'statsmodels',
         **kwargs,
-    ) -> 'Series | Any':
+    ) -> 'Series | DataFrame | Any':
         """OLS Regression Function
         ---------------------------
 
         y: Series, assigned y value in a series form
         intercept: bool, whether to add a intercept value
-        kwargs: some other kwargs passed to backend
+        backend: str, 'statsmodels' or 'sklearn' returning the models, or 'numpy'
+            solving all the dates at once and returning the estimates only, the
+            inference is NaN for the dates without residual degrees of freedom
+        kwargs: some other kwargs passed to backend, chunksize for numpy
         """
 
     def logistics(
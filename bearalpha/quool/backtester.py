@@ -4,6 +4,7 @@ import numpy as np
 import backtrader as bt
 import matplotlib.pyplot as plt
 from .base import *
+from .strategy import *
 from ..tools import *
 
 
@@ -34,11 +35,32 @@ class Relocator(Worker):
         ---------------------------------------------
 
         ret: pd.Series, the return data in either PN series or TS frame form
-        portfolio: pd.Series, the portfolio tag marked by a series, 
+        portfolio: pd.Series or GroupIndex, the portfolio tag marked by a series, 
             only available when passing a PN
         """
         
         weight = self._valid(self.data)
+        if portfolio is None:
+            # weighted return of all dates at once on the dense cube
+            cube = self._to_cube() if self.ispanel(self.data) else PanelCube.from_data(weight)
+            w = cube.values[:, :, 0]
+            with np.errstate(invalid='ignore', divide='ignore'):
+                w = w / np.nansum(w, axis=1, keepdims=True)
+                r = cube.reindex(self._valid(ret))
+                return pd.Series(np.nansum(w * r, axis=1) / np.nansum(w, axis=1), index=cube.dates)
+
+        if self.isseries(portfolio) and self.ispanel(portfolio) and self.ispanel(weight):
+            portfolio = GroupIndex.from_data(portfolio)
+
+        if isinstance(portfolio, GroupIndex):
+            # the daily normalization cancels out within each (date, portfolio) segment
+            portfolio = portfolio.align(weight.index)
+            w = weight.to_numpy(dtype='float64')
+            r = self._valid(ret).reindex(weight.index).to_numpy(dtype='float64')
+            with np.errstate(invalid='ignore', divide='ignore'):
+                profit = portfolio.reduce(w * r, 'sum')[:, 0] / portfolio.reduce(w, 'sum')[:, 0]
+            return pd.Series(profit, index=portfolio.labels).swaplevel().sort_index()
+
         weight = weight.groupby(level=0).apply(lambda x: x / x.sum())
         ret = self._valid(ret)
 
@@ -90,20 +112,18 @@ class Relocator(Worker):
         side: str, choice between "buy", "short" or "both"
         """
         weight = self._valid(self.data)
-        weight = weight.groupby(level=0).apply(lambda x: x / x.sum())
-        weight = weight.reindex(pd.MultiIndex.from_product(
-            [weight.index.levels[0], weight.index.levels[1]],
-            names = ['date', 'asset'],
-        ))
-        delta = pd.concat([weight, weight.groupby(level=1).shift(1)], axis=0, 
-            keys=['cur', 'pre']).unstack(level=0).fillna(0)
-        delta = delta.iloc[:, 0] - delta.iloc[:, -1]
+        cube = self._to_cube() if self.ispanel(self.data) else PanelCube.from_data(weight)
+        weight = cube.values[:, :, 0]
+        with np.errstate(invalid='ignore', divide='ignore'):
+            weight = np.nan_to_num(weight / np.nansum(weight, axis=1, keepdims=True))
+        delta = weight - np.vstack([np.zeros((1, weight.shape[1])), weight[:-1]])
+        dates = cube.dates.rename('date')
         if side == 'both':
-            return delta.groupby(level=0).apply(lambda x: x.abs().sum())
+            return pd.Series(np.abs(delta).sum(axis=1), index=dates)
         elif side == 'buy':
-            return delta.groupby(level=0).apply(lambda x: x[x > 0].abs().sum())
+            return pd.Series(np.where(delta > 0, delta, 0).sum(axis=1), index=dates)
         elif side == 'sell':
-            return delta.groupby(level=0).apply(lambda x: x[x < 0].abs().sum())
+            return pd.Series(np.where(delta < 0, -delta, 0).sum(axis=1), index=dates)
 
 
 @pd.api.extensions.register_dataframe_accessor("backtrader")
@@ -595,8 +615,10 @@ class Factester(Worker):
         if data_writer is not None:
             factor.filer.to_excel(data_writer, sheet_name=f'factor_data')
         
+        # all the forward returns are computed in one pass
+        forward_returns = price.converter.price2ret(period=[-period - 1 for period in periods])
         for i, period in enumerate(periods):
-            forward_return = price.converter.price2ret(period=(-period - 1))
+            forward_return = forward_returns.loc[:, -period - 1].rename(price.name)
             # slice the common part of data
             Console().print(f'[green][PERIOD = {period}][/green] Filtering common part ... ')
             common_index = factor.index.intersection(forward_return.index)
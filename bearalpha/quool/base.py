@@ -1,9 +1,15 @@
 import os
 import re
+import sys
+import zlib
+import pickle
+import hashlib
+import weakref
 import datetime
+import threading
+import collections
 import numpy as np
 import pandas as pd
-import backtrader as bt
 from ..tools import *
 
 
@@ -16,6 +22,745 @@ class FrameWorkError(Exception):
         return f'[-] <{self.func}> {self.hint}'
 
 
+class PanelCube(object):
+    """Dense panel cube
+    ====================
+
+    PanelCube holds a panel in a date x asset x field ndarray, with
+    integer coded date and asset axes. The codes of each row are kept,
+    so any array in the shape of the cube can be mapped back to the
+    original long form without touching the MultiIndex again.
+
+    Examples:
+
+    >>> cube = PanelCube.from_data(data)
+    >>> demean = cube.values - np.nanmean(cube.values, axis=1, keepdims=True)
+    >>> cube.to_long(demean)
+    """
+
+    def __init__(
+        self,
+        values: np.ndarray,
+        dates: pd.Index,
+        assets: pd.Index,
+        fields: pd.Index,
+        date_codes: np.ndarray,
+        asset_codes: np.ndarray,
+        index: pd.MultiIndex,
+        exists: np.ndarray = None,
+        isseries: bool = False,
+    ):
+        self.values = values
+        self.dates = dates
+        self.assets = assets
+        self.fields = fields
+        self.date_codes = date_codes
+        self.asset_codes = asset_codes
+        self.index = index
+        self.isseries = isseries
+        if exists is None:
+            exists = np.zeros(values.shape[:2], dtype='bool')
+            exists[date_codes, asset_codes] = True
+        self.exists = exists
+
+    @staticmethod
+    def _compact(level: pd.Index, codes: np.ndarray):
+        """drop the unused values in level and sort it, remapping the codes"""
+        codes = np.asarray(codes)
+        if (codes < 0).any():
+            raise FrameWorkError('PanelCube', 'NaN value found in panel index')
+        used = np.bincount(codes, minlength=level.size) > 0
+        if not used.all():
+            remap = np.cumsum(used) - 1
+            level, codes = level[used], remap[codes]
+        if not level.is_monotonic_increasing:
+            order = level.argsort()
+            rank = np.empty_like(order)
+            rank[order] = np.arange(order.size)
+            level, codes = level[order], rank[codes]
+        return level, codes
+
+    @classmethod
+    def from_data(
+        cls,
+        data: 'pd.DataFrame | pd.Series',
+        dtype: str = 'float64',
+    ) -> 'PanelCube':
+        """Build a cube from a panel dataframe or series
+        ------------------------------------------------
+
+        data: DataFrame or Series, a panel indexed by (datetime, asset)
+        dtype: str, the data type of the cube, default float64
+        """
+        if not Worker.ispanel(data) or data.index.nlevels != 2:
+            raise FrameWorkError('PanelCube', 'Only panel data with (datetime, asset) index can be built into cube')
+
+        isseries = Worker.isseries(data)
+        dates, date_codes = PanelCube._compact(data.index.levels[0], data.index.codes[0])
+        assets, asset_codes = PanelCube._compact(data.index.levels[1], data.index.codes[1])
+        fields = pd.Index([data.name]) if isseries else data.columns
+
+        exists = np.zeros((dates.size, assets.size), dtype='bool')
+        exists[date_codes, asset_codes] = True
+        if exists.sum() != data.shape[0]:
+            raise FrameWorkError('PanelCube', 'Duplicated (datetime, asset) pairs found in panel')
+
+        try:
+            flat = data.to_numpy(dtype=dtype).reshape((data.shape[0], -1))
+        except (ValueError, TypeError):
+            raise FrameWorkError('PanelCube', 'Only numeric panel data can be built into cube')
+        values = np.full((dates.size, assets.size, fields.size), np.nan, dtype=dtype)
+        values[date_codes, asset_codes] = flat
+
+        return cls(values, dates, assets, fields, date_codes,
+            asset_codes, data.index, exists, isseries)
+
+    @property
+    def shape(self):
+        return self.values.shape
+
+    @staticmethod
+    def _shift(values: np.ndarray, periods: int) -> np.ndarray:
+        """shift along the first axis, filled with NaN"""
+        shifted = np.full(values.shape, np.nan)
+        if periods == 0:
+            shifted[:] = values
+        elif abs(periods) < values.shape[0]:
+            if periods > 0:
+                shifted[periods:] = values[:-periods]
+            else:
+                shifted[:periods] = values[-periods:]
+        return shifted
+
+    def compact(self, values: np.ndarray = None) -> np.ndarray:
+        """Move the existing rows of each asset to the top along the date axis
+        ----------------------------------------------------------------------
+
+        The k-th existing row of an asset is put on the k-th position, so the
+        missing (date, asset) pairs are skipped, use expand to put them back
+
+        values: ndarray, in (date, asset) or (date, asset, field) shape, default the cube itself
+        """
+        values = self.values if values is None else values
+        if self.exists.all():
+            return values
+        if not hasattr(self, '_rank'):
+            # position of each row among the existing rows of its asset
+            self._rank = (np.cumsum(self.exists, axis=0) - 1)[self.date_codes, self.asset_codes]
+        compact = np.full((self.exists.sum(axis=0).max(), ) + values.shape[1:], np.nan)
+        compact[self._rank, self.asset_codes] = values[self.date_codes, self.asset_codes]
+        return compact
+
+    def expand(self, compact: np.ndarray) -> np.ndarray:
+        """Put the compacted array back on the date axis, the reverse of compact"""
+        if self.exists.all():
+            return compact
+        values = np.full((self.dates.size, ) + compact.shape[1:], np.nan)
+        values[self.date_codes, self.asset_codes] = compact[self._rank, self.asset_codes]
+        return values
+
+    def shift(self, values: np.ndarray = None, periods: int = 1) -> np.ndarray:
+        """Shift along the date axis within each asset
+        ------------------------------------------------
+
+        Like groupby(level=1).shift on a date sorted panel, the shift runs over
+        the existing rows of each asset, the missing (date, asset) pairs are skipped
+
+        values: ndarray, in (date, asset) or (date, asset, field) shape, default the cube itself
+        periods: int, number of rows to shift, negative to get the future rows
+        """
+        return self.expand(self._shift(self.compact(values), periods))
+
+    def reindex(
+        self,
+        other: 'pd.DataFrame | pd.Series',
+        dtype: str = 'float64'
+    ) -> np.ndarray:
+        """Put another panel on the date and asset axes of the cube
+        -----------------------------------------------------------
+
+        other: DataFrame or Series, a panel indexed by (datetime, asset),
+            values out of the cube axes are dropped, missing ones are NaN
+        return: ndarray, (date, asset) shaped for series, (date, asset, field) for dataframe
+        """
+        if not Worker.ispanel(other):
+            raise FrameWorkError('PanelCube', 'Only panel data can be reindexed to cube')
+        dpos = self.dates.get_indexer(other.index.levels[0])[other.index.codes[0]]
+        apos = self.assets.get_indexer(other.index.levels[1])[other.index.codes[1]]
+        valid = (dpos >= 0) & (apos >= 0) & (other.index.codes[0] >= 0) & (other.index.codes[1] >= 0)
+        flat = other.to_numpy(dtype=dtype)
+        values = np.full((self.dates.size, self.assets.size) + flat.shape[1:], np.nan, dtype=dtype)
+        values[dpos[valid], apos[valid]] = flat[valid]
+        return values
+
+    def to_long(
+        self,
+        values: np.ndarray = None,
+        columns: 'pd.Index | list' = None,
+        name: str = None,
+        compacted: bool = False,
+    ) -> 'pd.DataFrame | pd.Series':
+        """Map an array in cube shape back to the original long form
+        ------------------------------------------------------------
+
+        values: ndarray, in (date, asset) or (date, asset, field) shape, default the cube itself
+        columns: Index or list, columns of the result, default to the cube fields
+        name: str, name of the result when values is in (date, asset) shape
+        compacted: bool, whether values come from compact, which saves the expand
+        """
+        values = self.values if values is None else values
+        if compacted and not self.exists.all():
+            flat = values[self._rank, self.asset_codes]
+        else:
+            flat = values[self.date_codes, self.asset_codes]
+        if flat.ndim == 1:
+            return pd.Series(flat, index=self.index, name=name)
+        columns = self.fields if columns is None else columns
+        if self.isseries and flat.shape[1] == 1:
+            return pd.Series(flat[:, 0], index=self.index, name=columns[0])
+        return pd.DataFrame(flat, index=self.index, columns=columns)
+
+    def to_wide(self, field = None) -> pd.DataFrame:
+        """Get a date x asset dataframe of one field
+        ---------------------------------------------
+
+        field: the field name, default to the first field
+        """
+        loc = 0 if field is None else self.fields.get_loc(field)
+        return pd.DataFrame(self.values[:, :, loc], index=self.dates, columns=self.assets)
+
+    def to_product(self, values: np.ndarray = None) -> 'pd.DataFrame | pd.Series':
+        """Map an array in cube shape to a full (datetime, asset) product panel
+        -----------------------------------------------------------------------
+
+        values: ndarray, in (date, asset) or (date, asset, field) shape, default the cube itself
+        """
+        values = self.values if values is None else values
+        index = pd.MultiIndex.from_product([self.dates, self.assets], names=self.index.names)
+        flat = values.reshape((self.dates.size * self.assets.size, ) + values.shape[2:])
+        if flat.ndim == 1:
+            return pd.Series(flat, index=index)
+        if self.isseries and flat.shape[1] == 1:
+            return pd.Series(flat[:, 0], index=index, name=self.fields[0])
+        return pd.DataFrame(flat, index=index, columns=self.fields)
+
+
+class RaggedPanel(object):
+    """Ragged panel
+    ================
+
+    RaggedPanel keeps only the existing rows of a panel, in contiguous
+    asset code and value arrays ordered by date then asset, with the rows
+    of the i-th date in `offsets[i]:offsets[i + 1]` (the CSR layout). 
+    Cross sectional statistics are computed on the segments directly,
+    so a panel with listings and delistings never pays for the
+    cartesian product of dates and assets, densify it only on demand.
+
+    Examples:
+
+    >>> ragged = RaggedPanel.from_data(data)
+    >>> demean = ragged.values - ragged.broadcast(ragged.reduce('mean'))
+    >>> ragged.to_long(demean)
+
+    The workers take a ragged panel directly, working on its long form and
+    returning long form results, the segments are reused without rebuilding:
+
+    >>> PreProcessor(ragged).standarize()
+    """
+
+    def __init__(
+        self,
+        values: np.ndarray,
+        dates: pd.Index,
+        assets: pd.Index,
+        fields: pd.Index,
+        offsets: np.ndarray,
+        asset_codes: np.ndarray,
+        index: pd.MultiIndex,
+        order: np.ndarray = None,
+        isseries: bool = False,
+    ):
+        self.values = values
+        self.dates = dates
+        self.assets = assets
+        self.fields = fields
+        self.offsets = offsets
+        self.asset_codes = asset_codes
+        self.index = index
+        self.order = order
+        self.isseries = isseries
+
+    @classmethod
+    def from_data(
+        cls,
+        data: 'pd.DataFrame | pd.Series',
+        dtype: str = 'float64',
+    ) -> 'RaggedPanel':
+        """Build a ragged panel from a panel dataframe or series
+        ---------------------------------------------------------
+
+        data: DataFrame or Series, a panel indexed by (datetime, asset)
+        dtype: str, the data type of the values, default float64
+        """
+        if not Worker.ispanel(data) or data.index.nlevels != 2:
+            raise FrameWorkError('RaggedPanel', 'Only panel data with (datetime, asset) index can be built into ragged panel')
+
+        isseries = Worker.isseries(data)
+        dates, date_codes = PanelCube._compact(data.index.levels[0], data.index.codes[0])
+        assets, asset_codes = PanelCube._compact(data.index.levels[1], data.index.codes[1])
+        fields = pd.Index([data.name]) if isseries else data.columns
+
+        try:
+            flat = data.to_numpy(dtype=dtype).reshape((data.shape[0], -1))
+        except (ValueError, TypeError):
+            raise FrameWorkError('RaggedPanel', 'Only numeric panel data can be built into ragged panel')
+        
+        key = date_codes.astype('int64') * assets.size + asset_codes
+        order = None
+        if (np.diff(key) <= 0).any():
+            order = np.argsort(key, kind='stable')
+            key, flat, asset_codes = key[order], flat[order], asset_codes[order]
+            date_codes = date_codes[order]
+        if (np.diff(key) == 0).any():
+            raise FrameWorkError('RaggedPanel', 'Duplicated (datetime, asset) pairs found in panel')
+        
+        offsets = np.zeros(dates.size + 1, dtype='int64')
+        offsets[1:] = np.cumsum(np.bincount(date_codes, minlength=dates.size))
+        return cls(flat, dates, assets, fields, offsets, 
+            asset_codes, data.index, order, isseries)
+
+    @property
+    def shape(self):
+        """the shape of the dense cube, (date, asset, field)"""
+        return (self.dates.size, self.assets.size, self.fields.size)
+
+    @property
+    def nnz(self):
+        return self.values.shape[0]
+
+    @property
+    def counts(self):
+        """number of the existing assets on each date"""
+        return np.diff(self.offsets)
+
+    @property
+    def date_codes(self):
+        return np.repeat(np.arange(self.dates.size), self.counts)
+
+    def cross_section(self, date) -> 'pd.DataFrame | pd.Series':
+        """Get the cross section on a date, indexed by asset"""
+        loc = self.dates.get_loc(date)
+        start, stop = self.offsets[loc], self.offsets[loc + 1]
+        assets = self.assets[self.asset_codes[start:stop]]
+        if self.isseries:
+            return pd.Series(self.values[start:stop, 0], index=assets, name=self.fields[0])
+        return pd.DataFrame(self.values[start:stop], index=assets, columns=self.fields)
+
+    def reduce(self, how: str = 'mean', values: np.ndarray = None, ddof: int = 1) -> np.ndarray:
+        """Reduce each cross section, skipping NaN
+        --------------------------------------------
+
+        how: str, one of 'sum', 'count', 'mean', 'std', 'min', 'max', 'median'
+        values: ndarray, in (nnz, field) shape, default the values of the panel
+        ddof: int, delta degrees of freedom for std
+        return: ndarray, in (date, field) shape
+        """
+        values = self.values if values is None else values
+        valid = ~np.isnan(values)
+
+        nonempty = self.counts > 0
+        def _segsum(array):
+            # reduceat on the non empty dates only, the empty ones get 0 instead of garbage
+            result = np.zeros((self.dates.size, ) + array.shape[1:])
+            if nonempty.any():
+                result[nonempty] = np.add.reduceat(array, self.offsets[:-1][nonempty], axis=0)
+            return result
+
+        if how == 'median':
+            return self.quantile(0.5, values)
+
+        with np.errstate(invalid='ignore', divide='ignore'):
+            if how in ('min', 'max'):
+                result = np.full((self.dates.size, ) + values.shape[1:], np.nan)
+                if nonempty.any():
+                    func = np.fmin if how == 'min' else np.fmax
+                    result[nonempty] = func.reduceat(values, self.offsets[:-1][nonempty], axis=0)
+                return result
+            
+            count = _segsum(valid.astype('float64'))
+            if how == 'count':
+                return count
+            total = _segsum(np.where(valid, values, 0))
+            if how == 'sum':
+                return total
+            mean = total / count
+            if how == 'mean':
+                return mean
+            if how == 'std':
+                # two pass for accuracy, the mean is broadcasted back to the rows
+                deviation = np.where(valid, values - self.broadcast(mean), 0)
+                return np.sqrt(_segsum(deviation ** 2) / np.where(count > ddof, count - ddof, np.nan))
+        raise FrameWorkError('RaggedPanel', f'Unsupported reduction {how}')
+
+    def quantile(self, q: float, values: np.ndarray = None) -> np.ndarray:
+        """Quantile of each cross section with linear interpolation, skipping NaN
+        ---------------------------------------------------------------------------
+
+        q: float, the quantile between 0 and 1
+        values: ndarray, in (nnz, field) shape, default the values of the panel
+        return: ndarray, in (date, field) shape
+        """
+        values = self.values if values is None else values
+        flat = values.reshape((values.shape[0], -1))
+        counts = self.counts
+        # pad the dates into a (date, rank, field) block, which sorts each date at once
+        date_codes = self.date_codes
+        rank = np.arange(flat.shape[0]) - np.repeat(self.offsets[:-1], counts)
+        block = np.full((self.dates.size, counts.max(initial=0), flat.shape[1]), np.nan)
+        block[date_codes, rank] = flat
+        block.sort(axis=1)
+
+        if not block.shape[1]:
+            return np.full((self.dates.size, ) + values.shape[1:], np.nan)
+        
+        count = self.reduce('count', flat)
+        position = q * np.maximum(count - 1, 0)
+        low = np.floor(position).astype('int64')
+        low_value = np.take_along_axis(block, low[:, None, :], axis=1)[:, 0, :]
+        high_value = np.take_along_axis(block, np.ceil(position).astype('int64')[:, None, :], axis=1)[:, 0, :]
+        result = low_value + (high_value - low_value) * (position - low)
+        result[count == 0] = np.nan
+        return result.reshape((self.dates.size, ) + values.shape[1:])
+
+    def broadcast(self, values: np.ndarray) -> np.ndarray:
+        """Broadcast a (date, ...) shaped array back to the (nnz, ...) rows"""
+        return np.repeat(values, self.counts, axis=0)
+
+    def to_long(
+        self,
+        values: np.ndarray = None,
+        columns: 'pd.Index | list' = None,
+        name: str = None,
+    ) -> 'pd.DataFrame | pd.Series':
+        """Map an array in (nnz, ...) shape back to the original long form
+        ------------------------------------------------------------------
+
+        values: ndarray, in (nnz, ) or (nnz, field) shape, default the values of the panel
+        columns: Index or list, columns of the result, default to the panel fields
+        name: str, name of the result when values is in (nnz, ) shape
+        """
+        values = self.values if values is None else values
+        if self.order is not None:
+            flat = np.empty_like(values)
+            flat[self.order] = values
+        else:
+            flat = values
+        if flat.ndim == 1:
+            return pd.Series(flat, index=self.index, name=name)
+        columns = self.fields if columns is None else columns
+        if self.isseries and flat.shape[1] == 1:
+            return pd.Series(flat[:, 0], index=self.index, name=columns[0])
+        return pd.DataFrame(flat, index=self.index, columns=columns)
+
+    def to_cube(self) -> PanelCube:
+        """Densify into a PanelCube"""
+        return PanelCube.from_data(self.to_long())
+
+    def to_product(self) -> 'pd.DataFrame | pd.Series':
+        """Densify into a full (datetime, asset) product panel"""
+        return self.to_cube().to_product()
+
+
+class GroupIndex(object):
+    """Group index
+    ===============
+
+    GroupIndex is built once from a panel grouper, like the industry of
+    each asset on each date. The rows are sorted by their (date, group)
+    segment only once, with the offsets and sizes of the segments kept,
+    so the accessors taking it as grouper reduce the segments directly
+    instead of factorizing the same grouper again on every call.
+
+    Examples:
+
+    >>> industry = GroupIndex.from_data(industry)
+    >>> factor.preprocessor.standarize(grouper=industry)
+    >>> factor.describer.ic(forward, grouper=industry)
+    """
+
+    def __init__(
+        self,
+        grouper: pd.Series,
+        dates: pd.Index,
+        groups: pd.Index,
+        segment_dates: np.ndarray,
+        segment_groups: np.ndarray,
+        codes: np.ndarray,
+        order: np.ndarray,
+        offsets: np.ndarray,
+    ):
+        self.grouper = grouper
+        self.index = grouper.index
+        self.dates = dates
+        self.groups = groups
+        self.segment_dates = segment_dates
+        self.segment_groups = segment_groups
+        self.codes = codes
+        self.order = order
+        self.offsets = offsets
+        self._valid = codes >= 0
+        self._dense = bool(self._valid.all())
+        self._safe_codes = codes if self._dense else np.where(self._valid, codes, 0)
+        self._aligned = (None, None)
+
+    @classmethod
+    def from_data(cls, grouper: pd.Series) -> 'GroupIndex':
+        """Build a group index from a panel grouper
+        ---------------------------------------------
+
+        grouper: Series, the group labels indexed by (datetime, asset),
+            rows with NaN label belong to no group
+        """
+        if not Worker.ispanel(grouper) or not Worker.isseries(grouper) or grouper.index.nlevels != 2:
+            raise FrameWorkError('GroupIndex', 'Only panel series with (datetime, asset) index can be a group index')
+        
+        dates, date_codes = PanelCube._compact(grouper.index.levels[0], grouper.index.codes[0])
+        group_codes, groups = pd.factorize(grouper, sort=True)
+        valid = group_codes >= 0
+        key = date_codes.astype('int64') * max(groups.size, 1) + group_codes
+        # only the observed segments, numbered in (date, group) order
+        segments, codes = np.unique(key[valid], return_inverse=True)
+        full_codes = np.full(grouper.size, -1, dtype='int64')
+        full_codes[valid] = codes
+        order = np.flatnonzero(valid)[np.argsort(codes, kind='stable')]
+        offsets = np.zeros(segments.size + 1, dtype='int64')
+        offsets[1:] = np.cumsum(np.bincount(codes, minlength=segments.size))
+        return cls(grouper, dates, pd.Index(groups, name=grouper.name), segments // max(groups.size, 1),
+            segments % max(groups.size, 1), full_codes, order, offsets)
+
+    @property
+    def sizes(self):
+        return np.diff(self.offsets)
+
+    @property
+    def labels(self) -> pd.MultiIndex:
+        """the (date, group) label of each segment"""
+        return pd.MultiIndex(levels=[self.dates, self.groups], 
+            codes=[self.segment_dates, self.segment_groups], 
+            names=[self.index.names[0], self.grouper.name], verify_integrity=False)
+
+    def align(self, index: pd.MultiIndex) -> 'GroupIndex':
+        """Get the group index on another panel index, the last one is cached"""
+        if index is self.index or index.equals(self.index):
+            return self
+        aligned_index, aligned = self._aligned
+        if aligned_index is not index:
+            aligned = GroupIndex.from_data(self.grouper.reindex(index))
+            self._aligned = (index, aligned)
+        return aligned
+
+    def segments(self, values: np.ndarray) -> RaggedPanel:
+        """Put the values in original row order into segments for reduction"""
+        values = values.reshape((values.shape[0], -1))[self.order]
+        return RaggedPanel(values, pd.RangeIndex(self.offsets.size - 1), None, 
+            pd.RangeIndex(values.shape[1]), self.offsets, None, None)
+
+    def reduce(self, values: np.ndarray, how: str = 'mean', *args) -> np.ndarray:
+        """Reduce each segment, skipping NaN
+        --------------------------------------
+
+        values: ndarray, in (row, ) or (row, field) shape in the original row order
+        how: str, one of 'sum', 'count', 'mean', 'std', 'min', 'max', 'median', 'quantile'
+        args: the quantile for 'quantile'
+        return: ndarray, in (segment, field) shape
+        """
+        values = values.reshape((values.shape[0], -1))
+        if how not in ('sum', 'count', 'mean', 'std'):
+            segments = self.segments(values)
+            if how == 'quantile':
+                return segments.quantile(*args)
+            return segments.reduce(how)
+        
+        # the moments are summed by bincount in the original row order, no sorting needed
+        valid, dense = self._valid, self._dense
+        codes = self.codes if dense else self.codes[valid]
+        def _segsum(array):
+            array = array if dense else array[valid]
+            return np.stack([np.bincount(codes, weights=array[:, j], minlength=self.offsets.size - 1)
+                for j in range(array.shape[1])], axis=1)
+        
+        notna = ~np.isnan(values)
+        count = _segsum(notna.astype('float64'))
+        if how == 'count':
+            return count
+        total = _segsum(np.where(notna, values, 0))
+        if how == 'sum':
+            return total
+        with np.errstate(invalid='ignore', divide='ignore'):
+            mean = total / count
+            if how == 'mean':
+                return mean
+            deviation = np.where(notna, values - np.take(mean, self._safe_codes, axis=0), 0)
+            # a segment of no valid value is NaN rather than -0
+            return np.sqrt(_segsum(deviation ** 2) / np.where(count > 1, count - 1, np.nan))
+
+    def transform(self, values: np.ndarray, how: str = 'mean', *args) -> np.ndarray:
+        """The reduction of the segment of each row, NaN for rows without group"""
+        reduced = self.reduce(values, how, *args)
+        result = np.take(reduced, self._safe_codes, axis=0)
+        if not self._dense:
+            result[~self._valid] = np.nan
+        return result
+
+
+class SharedPanel(object):
+    """Shared panel
+    ===============
+
+    SharedPanel publishes the dense cube of a panel only once, into a
+    shared memory block or a memory mapped .npy file, with the dates,
+    assets and fields kept as sidecars. Pickling a SharedPanel only
+    sends the handle, so the workers attach to the same memory without
+    copying or serializing the values.
+
+    Examples:
+
+    >>> shared = SharedPanel.publish(data)
+    >>> pool.apply_async(func, args=(shared, ))  # func works on shared.values
+    >>> shared.unlink()
+    """
+
+    def __init__(
+        self,
+        name: str,
+        shape: tuple,
+        dtype: str,
+        dates: pd.Index,
+        assets: pd.Index,
+        fields: pd.Index,
+        index_names: list = None,
+        path: str = None,
+    ):
+        self.name = name
+        self.shape = tuple(shape)
+        self.dtype = np.dtype(dtype)
+        self.dates = dates
+        self.assets = assets
+        self.fields = fields
+        self.index_names = index_names
+        self.path = path
+        self._shm = None
+        self._values = None
+
+    @classmethod
+    def publish(
+        cls,
+        data: 'pd.DataFrame | pd.Series | PanelCube',
+        path: str = None,
+    ) -> 'SharedPanel':
+        """Publish a panel into shared memory
+        --------------------------------------
+
+        data: DataFrame, Series or PanelCube, the panel to publish
+        path: str, path to a memory mapped .npy file, the index sidecar is
+            saved in path + '.index', default None to use a shared memory block
+        """
+        cube = data if isinstance(data, PanelCube) else PanelCube.from_data(data)
+        values = cube.values
+        shared = cls(None, values.shape, values.dtype.str, cube.dates, cube.assets,
+            cube.fields, list(cube.index.names), path)
+
+        if path is None:
+            from multiprocessing import shared_memory
+            shared._shm = shared_memory.SharedMemory(create=True, size=max(values.nbytes, 1))
+            shared.name = shared._shm.name
+            shared._values = np.ndarray(values.shape, dtype=values.dtype, buffer=shared._shm.buf)
+            shared._values[:] = values
+        else:
+            shared._values = np.lib.format.open_memmap(path, mode='w+', dtype=values.dtype, shape=values.shape)
+            shared._values[:] = values
+            shared._values.flush()
+            with open(path + '.index', 'wb') as f:
+                pickle.dump(dict(dates=cube.dates, assets=cube.assets, 
+                    fields=cube.fields, index_names=shared.index_names), f)
+        return shared
+
+    @classmethod
+    def attach(cls, path: str) -> 'SharedPanel':
+        """Attach to a panel published in a memory mapped file
+        -------------------------------------------------------
+
+        path: str, path to the memory mapped .npy file
+        """
+        with open(path + '.index', 'rb') as f:
+            meta = pickle.load(f)
+        values = np.load(path, mmap_mode='r')
+        shared = cls(None, values.shape, values.dtype.str, meta['dates'], 
+            meta['assets'], meta['fields'], meta['index_names'], path)
+        shared._values = values
+        return shared
+
+    @property
+    def values(self) -> np.ndarray:
+        """the (date, asset, field) array, attached on first access"""
+        if self._values is None:
+            if self.path is not None:
+                self._values = np.load(self.path, mmap_mode='r')
+            else:
+                from multiprocessing import shared_memory, resource_tracker
+                # attaching process should not unlink the block when exits
+                if sys.version_info >= (3, 13):
+                    self._shm = shared_memory.SharedMemory(name=self.name, track=False)
+                else:
+                    # the block is registered to the resource tracker on attaching before 3.13
+                    self._shm = shared_memory.SharedMemory(name=self.name)
+                    resource_tracker.unregister(self._shm._name, 'shared_memory')
+                self._values = np.ndarray(self.shape, dtype=self.dtype, buffer=self._shm.buf)
+        return self._values
+
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        state['_shm'] = None
+        state['_values'] = None
+        return state
+
+    def to_frame(self) -> pd.DataFrame:
+        """Reconstruct the (datetime, asset) product panel"""
+        index = pd.MultiIndex.from_product([self.dates, self.assets], names=self.index_names)
+        return from_array(self.values, index=index, columns=self.fields)
+
+    def close(self) -> None:
+        """Detach from the shared memory, views of values should be released before"""
+        self._values = None
+        if self._shm is not None:
+            self._shm.close()
+            self._shm = None
+
+    def unlink(self) -> None:
+        """Release the shared memory or remove the memory mapped files, called by the publisher"""
+        if self.path is None:
+            from multiprocessing import shared_memory, resource_tracker
+            if self._shm is None:
+                self._shm = shared_memory.SharedMemory(name=self.name)
+            elif sys.version_info < (3, 13):
+                # the workers sharing the resource tracker may have unregistered the block
+                resource_tracker.register(self._shm._name, 'shared_memory')
+            shm = self._shm
+            self.close()
+            shm.unlink()
+        else:
+            self.close()
+            for file in (self.path, self.path + '.index'):
+                if os.path.exists(file):
+                    os.remove(file)
+
+
+# layouts (cube, ragged panel) of the recently used data, see Worker._cached
+_LAYOUT_CACHE_SIZE = 8
+_layout_cache = collections.OrderedDict()
+_layout_lock = threading.Lock()
+
+
 class Worker(object):
     TSFR = 1
     CSFR = 2
@@ -28,8 +773,14 @@ class Worker(object):
     MCFR = 10
     MIMC = 11
     
-    def __init__(self, data: 'pd.DataFrame | pd.Series'):
+    def __init__(self, data: 'pd.DataFrame | pd.Series | RaggedPanel'):
+        ragged = data if isinstance(data, RaggedPanel) else None
+        if ragged is not None:
+            # a ragged panel is worked on in its long form, which has only the existing rows
+            data = ragged.to_long()
         self.data = data
+        self._origin = data
+        self._ragged = ragged
         self._validate()
     
     @staticmethod
@@ -165,8 +916,73 @@ class Worker(object):
         else:
             return data.copy()
 
+    @staticmethod
+    def _fingerprint(data: 'pd.DataFrame | pd.Series') -> tuple:
+        """Cheap fingerprint of the labels and values of data, which changes with
+        the inplace modifications like setting a column or assigning by loc"""
+        labels = ((data.name, ) if Worker.isseries(data) else tuple(data.columns)) + tuple(data.index.names)
+        blocks = []
+        for block in data._mgr.blocks:
+            values = block.values
+            if not isinstance(values, np.ndarray) or values.dtype == object:
+                values = pd.util.hash_array(np.asarray(values, dtype=object).ravel())
+            values = values.T if values.flags.f_contiguous else np.ascontiguousarray(values)
+            blocks.append((values.dtype.str, values.shape, tuple(block.mgr_locs.as_array),
+                zlib.crc32(values.reshape(-1).view(np.uint8))))
+        return labels, tuple(blocks)
+
+    def _cached(self, kind: str, build: ...):
+        """Get the layout of data built by build, cached for the original data
+        as long as the index and the fingerprint of data are unchanged, only 
+        a few recently used layouts are kept, and never keep the data alive,
+        the index of the original data is checked, as the single column frames 
+        are converted into series with a new index on every access
+        """
+        key = (kind, id(self._origin))
+        fingerprint = self._fingerprint(self.data)
+        with _layout_lock:
+            entry = _layout_cache.get(key)
+            if entry is not None and entry[0]() is self._origin \
+                and entry[1] is self._origin.index and entry[2] == fingerprint:
+                _layout_cache.move_to_end(key)
+                return entry[3]
+        
+        layout = build(self.data)
+        with _layout_lock:
+            _layout_cache[key] = (weakref.ref(self._origin, lambda _, key=key: _layout_cache.pop(key, None)),
+                self._origin.index, fingerprint, layout)
+            _layout_cache.move_to_end(key)
+            while len(_layout_cache) > _LAYOUT_CACHE_SIZE:
+                _layout_cache.popitem(last=False)
+        return layout
+
+    def _to_cube(self) -> PanelCube:
+        """Get the dense cube of a panel, which is shared by all the accessors 
+        of the data until the data is modified, see _cached"""
+        if self.type_ != Worker.PNFR and self.type_ != Worker.PNSR:
+            raise FrameWorkError('_to_cube', 'Only panel data can be converted to cube')
+        return self._cached('cube', PanelCube.from_data)
+
+    def _to_ragged(self) -> RaggedPanel:
+        """Get the ragged panel of a panel, cached like _to_cube, or the one the worker is built on"""
+        if self.type_ != Worker.PNFR and self.type_ != Worker.PNSR:
+            raise FrameWorkError('_to_ragged', 'Only panel data can be converted to ragged panel')
+        if self._ragged is not None:
+            return self._ragged
+        return self._cached('ragged', RaggedPanel.from_data)
+
+    def _to_shared(self, path: str = None) -> SharedPanel:
+        """Publish the cached cube of a panel into shared memory, see SharedPanel"""
+        return SharedPanel.publish(self._to_cube(), path)
+
     def _to_array(self, *axes):
 
+        if (self.type_ == Worker.PNFR or self.type_ == Worker.PNSR) \
+            and self.data.index.nlevels == 2 and (self.isseries(self.data) or not self.ismi(self.data.columns)):
+            cube = self._to_cube()
+            revalues = cube.values.copy() if self.type_ == Worker.PNFR else cube.values[:, :, 0].copy()
+            return revalues.transpose(*axes) if axes else revalues
+
         values = self.data.values.copy()
         if self.type_ == Worker.PNFR or self.type_ == Worker.PNSR:
             if not self.ismi(self.data.columns):
@@ -196,130 +1012,6 @@ class Worker(object):
             return revalues
 
 
-class Strategy(bt.Strategy):
-
-    def log(self, text: str, datetime: datetime.datetime = None, hint: str = 'INFO'):
-        """Logging function"""
-        datetime = datetime or self.data.datetime.date(0)
-        datetime = time2str(datetime)
-        if hint == "INFO":
-            color = "color"
-        elif hint == "WARN":
-            color = "yellow"
-        elif hint == "ERROR":
-            color = "red"
-        else:
-            color = "blue"
-        Console().print(f'[{color}][{hint}][/{color}] {datetime}: {text}')
-
-    def notify_order(self, order: bt.Order):
-        """order notification"""
-        # order possible status:
-        # 'Created'、'Submitted'、'Accepted'、'Partial'、'Completed'、
-        # 'Canceled'、'Expired'、'Margin'、'Rejected'
-        # broker submitted or accepted order do nothing
-        if order.status in [order.Submitted, order.Accepted, order.Created]:
-            return
-
-        # broker completed order, just hint
-        elif order.status in [order.Completed]:
-            self.log(f'Trade <{order.executed.size}> <{order.info.get("name", "data")}> at <{order.executed.price:.2f}>')
-            # record current bar number
-            self.bar_executed = len(self)
-
-        elif order.status in [order.Canceled, order.Margin, order.Rejected, order.Expired]:
-            self.log('Order canceled, margin, rejected or expired', hint='WARN')
-
-        # except the submitted, accepted, and created status,
-        # other order status should reset order variable
-        self.order = None
-
-    def notify_trade(self, trade):
-        """trade notification"""
-        if not trade.isclosed:
-            # trade not closed, skip
-            return
-        # else, log it
-        self.log(f'Gross Profit: {trade.pnl:.2f}, Net Profit {trade.pnlcomm:.2f}')
-
-
-class Indicator(bt.Indicator):
-    
-    def log(self, text: str, datetime: datetime.datetime = None, hint: str = 'INFO'):
-        """Logging function"""
-        datetime = datetime or self.data.datetime.date(0)
-        datetime = time2str(datetime)
-        if hint == "INFO":
-            color = "color"
-        elif hint == "WARN":
-            color = "yellow"
-        elif hint == "ERROR":
-            color = "red"
-        else:
-            color = "blue"
-        Console().print(f'[{color}][{hint}][/{color}] {datetime}: {text}')
-    
-
-class Analyzer(bt.Analyzer):
-
-    def log(self, text: str, datetime: datetime.datetime = None, hint: str = 'INFO'):
-        """Logging function"""
-        datetime = datetime or self.data.datetime.date(0)
-        datetime = time2str(datetime)
-        if hint == "INFO":
-            color = "color"
-        elif hint == "WARN":
-            color = "yellow"
-        elif hint == "ERROR":
-            color = "red"
-        else:
-            color = "blue"
-        Console().print(f'[{color}][{hint}][/{color}] {datetime}: {text}')
-
-
-class Observer(bt.Observer):
-
-    def log(self, text: str, datetime: datetime.datetime = None, hint: str = 'INFO'):
-        """Logging function"""
-        datetime = datetime or self.data.datetime.date(0)
-        datetime = time2str(datetime)
-        if hint == "INFO":
-            color = "color"
-        elif hint == "WARN":
-            color = "yellow"
-        elif hint == "ERROR":
-            color = "red"
-        else:
-            color = "blue"
-        Console().print(f'[{color}][{hint}][/{color}] {datetime}: {text}')
-
-
-class OrderTable(Analyzer):
-
-    def __init__(self):
-        self.orders = []
-
-    def notify_order(self, order):
-        if order.status == order.Completed:
-            if order.isbuy():
-                self.orders.append([
-                    self.data.datetime.date(0),
-                    order.info.get('name', 'data'), order.executed.size, 
-                    order.executed.price, 'BUY']
-                )
-            elif order.issell():
-                self.orders.append([
-                    self.data.datetime.date(0),
-                    order.info.get('name', 'data'), order.executed.size, 
-                    order.executed.price, 'SELL']
-                )
-        
-    def get_analysis(self):
-        self.rets = pd.DataFrame(self.orders, columns=['datetime', 'asset', 'size', 'price', 'direction'])
-        self.rets = self.rets.set_index('datetime')
-        return self.orders
-
-
 def from_array(
     arr: np.ndarray,
     index: pd.Index = None, 
@@ -375,10 +1067,92 @@ def concat(objs, colnames: list = None, **kwargs):
         concated = pd.concat(objs, **kwargs)
     return concated
 
+def _read_file(
+    path: str,
+    reader: ...,
+    perspective: str = None,
+    name: str = None,
+    **kwargs
+):
+    """read one file and put it in the perspective form"""
+    data = reader(path, **kwargs)
+    if perspective == "indicator":
+        data = data.stack()
+        data.name = name
+    elif perspective == "asset":
+        data.index = pd.MultiIndex.from_product([data.index, [name]])
+    elif perspective == "datetime":
+        data.index = pd.MultiIndex.from_product([pd.to_datetime([name]), data.index])
+    return data
+
+def _read_files(
+    paths: list,
+    names: list,
+    reader: ...,
+    perspective: str = None,
+    processes: int = 1,
+    backend: str = 'thread',
+    cache: str = None,
+    **kwargs
+) -> list:
+    """read files in a pool, parsed files are cached by path, mtime and size"""
+    results = [None] * len(paths)
+    keys = [None] * len(paths)
+
+    if cache is not None:
+        from diskcache import Cache
+        cache = Cache(directory=cache)
+
+    try:
+        if cache is not None:
+            # repr works for any kwargs, like the converter functions which can't be pickled
+            options = repr(sorted(kwargs.items()))
+            for i, path in enumerate(paths):
+                stat = os.stat(path)
+                keys[i] = hashlib.md5(repr((os.path.abspath(path), stat.st_mtime_ns, stat.st_size,
+                    reader.__module__, reader.__qualname__, perspective, names[i], options)
+                    ).encode()).hexdigest()
+                results[i] = cache.get(key='read_files:' + keys[i])
+
+        todo = [i for i, result in enumerate(results) if result is None]
+        if processes > 1 and len(todo) > 1:
+            from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor
+            if backend == 'thread':
+                pool = ThreadPoolExecutor(max_workers=processes)
+            elif backend == 'process':
+                import multiprocessing
+                pool = ProcessPoolExecutor(max_workers=processes, mp_context=multiprocessing.get_context('fork'))
+            else:
+                raise ValueError('backend must be in one of thread or process')
+            with pool:
+                futures = [pool.submit(_read_file, paths[i], reader, perspective, names[i], **kwargs) for i in todo]
+                for i, future in zip(todo, futures):
+                    results[i] = future.result()
+        else:
+            for i in todo:
+                results[i] = _read_file(paths[i], reader, perspective, names[i], **kwargs)
+
+        if cache is not None:
+            for i in todo:
+                cache.set(key='read_files:' + keys[i], value=results[i])
+    finally:
+        if cache is not None:
+            cache.close()
+    return results
+
+def _concat_files(datas: list, perspective: str = None):
+    """concat the files read in perspective form"""
+    if perspective == "indicator":
+        return pd.concat(datas, axis=1).sort_index()
+    return pd.concat(datas, axis=0).sort_index()
+
 def read_csv(
     path_or_buffer,
     perspective: str = None,
-    name_pattern: str = None,      
+    name_pattern: str = None,
+    processes: int = 1,
+    backend: str = 'thread',
+    cache: str = None,
     **kwargs
 ):
     '''A enhanced function for reading files in a directory to a panel DataFrame
@@ -387,7 +1161,11 @@ def read_csv(
     path: path to the directory
     perspective: 'datetime', 'asset', 'indicator'
     name_pattern: pattern to match the file name, which will be extracted as index
-    kwargs: other arguments for pd.read_csv
+    processes: int, the number of workers reading files, default 1
+    backend: str, choose between 'thread' and 'process' for the workers
+    cache: str, directory of the cache for parsed files, files are only parsed
+        again when their path, mtime or size changes, default None means no cache
+    kwargs: other arguments for pd.read_csv, pass engine='pyarrow' to use pyarrow csv parser
 
     **note: the name of the file in the directory will be interpreted as the 
     sign(column or index) to the data, so set it to the brief one
@@ -397,51 +1175,31 @@ def read_csv(
         return pd.read_csv(path_or_buffer, **kwargs)
     
     files = sorted(os.listdir(path_or_buffer))
-    datas = []
+    names = [None] * len(files)
 
-    if perspective is None:
-        for file in files:
-            data = pd.read_csv(os.path.join(path_or_buffer, file), **kwargs) 
-            datas.append(data)
-        datas = pd.concat(datas, axis=0).sort_index()
-    
-    elif perspective == "indicator":
+    if perspective == "indicator":
         name_pattern = name_pattern or r'.*'
-        for file in files:
-            basename = os.path.splitext(file)[0]
-            name = re.findall(name_pattern, basename)[0]
-            data = pd.read_csv(os.path.join(path_or_buffer, file), **kwargs)
-            data = data.stack()
-            data.name = name
-            datas.append(data)
-        datas = pd.concat(datas, axis=1).sort_index()
-
     elif perspective == "asset":
         name_pattern = name_pattern or r'[a-zA-Z\d]{6}\.[a-zA-Z]{2}|[a-zA-Z]{0,2}\..{6}'
-        for file in files:
-            basename = os.path.splitext(file)[0]
-            name = re.findall(name_pattern, basename)[0]
-            data = pd.read_csv(os.path.join(path_or_buffer, file), **kwargs)
-            data.index = pd.MultiIndex.from_product([data.index, [name]])
-            datas.append(data)
-        datas = pd.concat(datas).sort_index()
-        
     elif perspective == "datetime":
         name_pattern = name_pattern or r'\d{4}[./-]\d{2}[./-]\d{2}|\d{4}[./-]\d{2}[./-]\d{2}\s?\d{2}[:.]\d{2}[:.]\d{2}'
-        for file in files:
-            basename = os.path.splitext(file)[0]
-            name = re.findall(name_pattern, basename)[0]
-            data = pd.read_csv(os.path.join(path_or_buffer, file), **kwargs)
-            data.index = pd.MultiIndex.from_product([pd.to_datetime([name]), data.index])
-            datas.append(data)
-        datas = pd.concat(datas).sort_index()
+    elif perspective is not None:
+        raise ValueError('perspective must be in one of datetime, indicator or asset')
+
+    if perspective is not None:
+        names = [re.findall(name_pattern, os.path.splitext(file)[0])[0] for file in files]
     
-    return datas
+    datas = _read_files([os.path.join(path_or_buffer, file) for file in files], names, pd.read_csv, 
+        perspective, processes, backend, cache, **kwargs)
+    return _concat_files(datas, perspective)
 
 def read_excel(
     path_or_buffer,
     perspective: str = None,
     name_pattern: str = None,
+    processes: int = 1,
+    backend: str = 'thread',
+    cache: str = None,
     **kwargs,
 ):
     '''A enhanced function for reading files in a directory to a panel DataFrame
@@ -449,6 +1207,10 @@ def read_excel(
 
     path: path to the directory
     perspective: 'datetime', 'asset', 'indicator'
+    processes: int, the number of workers reading files, default 1
+    backend: str, choose between 'thread' and 'process' for the workers
+    cache: str, directory of the cache for parsed files, files are only parsed
+        again when their path, mtime or size changes, default None means no cache
     kwargs: other arguments for pd.read_excel
 
     **note: the name of the file in the directory will be interpreted as the 
@@ -490,44 +1252,21 @@ def read_excel(
 
     else:
 
-        files = os.listdir(path_or_buffer)
-        datas = []
-        
-        if perspective is None:
-            for file in files:
-                data = pd.read_csv(os.path.join(path_or_buffer, file), **kwargs) 
-                datas.append(data)
-            datas = pd.concat(datas, axis=0).sort_index()
+        files = sorted(os.listdir(path_or_buffer))
+        names = [None] * len(files)
 
-        elif perspective == "indicator":
+        if perspective == "indicator":
             name_pattern = name_pattern or r'.*'
-            for file in files:
-                basename = os.path.splitext(file)[0]
-                name = re.findall(name_pattern, basename)[0]
-                data = pd.read_excel(os.path.join(path_or_buffer, file), **kwargs)
-                data = data.stack()
-                data.name = name
-                datas.append(data)
-            datas = pd.concat(datas, axis=1).sort_index()
-
         elif perspective == "asset":
             name_pattern = name_pattern or r'[a-zA-Z\d]{6}\.[a-zA-Z]{2}|[a-zA-Z]{0,2}\..{6}'
-            for file in files:
-                basename = os.path.splitext(file)[0]
-                name = re.search(name_pattern, basename).group()
-                data = pd.read_excel(os.path.join(path_or_buffer, file), **kwargs)
-                data.index = pd.MultiIndex.from_product([data.index, [name]])
-                datas.append(data)
-            datas = pd.concat(datas).sort_index()
-            
         elif perspective == "datetime":
             name_pattern = name_pattern or r'\d{4}[./-]\d{2}[./-]\d{2}|\d{4}[./-]\d{2}[./-]\d{2}\s?\d{2}[:.]\d{2}[:.]\d{2}'
-            for file in files:
-                basename = os.path.splitext(file)[0]
-                name = re.search(name_pattern, basename).group()
-                data = pd.read_excel(os.path.join(path_or_buffer, file), **kwargs)
-                data.index = pd.MultiIndex.from_product([pd.to_datetime([name]), data.index])
-                datas.append(data)
-            datas = pd.concat(datas).sort_index()
-        
-        return datas
+        elif perspective is not None:
+            raise ValueError('perspective must be in one of datetime, indicator or asset')
+
+        if perspective is not None:
+            names = [re.search(name_pattern, os.path.splitext(file)[0]).group() for file in files]
+
+        datas = _read_files([os.path.join(path_or_buffer, file) for file in files], names, pd.read_excel,
+            perspective, processes, backend, cache, **kwargs)
+        return _concat_files(datas, perspective)
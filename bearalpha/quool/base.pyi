@@ -1,5 +1,4 @@
 import datetime
-import backtrader as bt
 import numpy as np
 from bearalpha import *
 from typing import overload
@@ -10,6 +9,281 @@ class FrameWorkError(Exception):
     def __str__(self) -> str: ...
 
 
+class PanelCube(object):
+    """Dense panel cube
+    ====================
+
+    PanelCube holds a panel in a date x asset x field ndarray, with
+    integer coded date and asset axes. The codes of each row are kept,
+    so any array in the shape of the cube can be mapped back to the
+    original long form without touching the MultiIndex again.
+    """
+    values: np.ndarray
+    dates: Index
+    assets: Index
+    fields: Index
+    date_codes: np.ndarray
+    asset_codes: np.ndarray
+    index: MultiIndex
+    exists: np.ndarray
+    isseries: bool
+
+    @classmethod
+    def from_data(
+        cls,
+        data: 'DataFrame | Series',
+        dtype: str = 'float64',
+    ) -> 'PanelCube':
+        """Build a cube from a panel dataframe or series
+        ------------------------------------------------
+
+        data: DataFrame or Series, a panel indexed by (datetime, asset)
+        dtype: str, the data type of the cube, default float64
+        """
+    @property
+    def shape(self) -> tuple: ...
+    def compact(self, values: np.ndarray = None) -> np.ndarray:
+        """Move the existing rows of each asset to the top along the date axis
+        ----------------------------------------------------------------------
+
+        values: ndarray, in (date, asset) or (date, asset, field) shape, default the cube itself
+        """
+    def expand(self, compact: np.ndarray) -> np.ndarray:
+        """Put the compacted array back on the date axis, the reverse of compact"""
+    def shift(self, values: np.ndarray = None, periods: int = 1) -> np.ndarray:
+        """Shift along the date axis within each asset
+        ------------------------------------------------
+
+        values: ndarray, in (date, asset) or (date, asset, field) shape, default the cube itself
+        periods: int, number of rows to shift, negative to get the future rows
+        """
+    def reindex(
+        self,
+        other: 'DataFrame | Series',
+        dtype: str = 'float64'
+    ) -> np.ndarray:
+        """Put another panel on the date and asset axes of the cube
+        -----------------------------------------------------------
+
+        other: DataFrame or Series, a panel indexed by (datetime, asset),
+            values out of the cube axes are dropped, missing ones are NaN
+        return: ndarray, (date, asset) shaped for series, (date, asset, field) for dataframe
+        """
+    def to_long(
+        self,
+        values: np.ndarray = None,
+        columns: 'Index | list' = None,
+        name: str = None,
+        compacted: bool = False,
+    ) -> 'DataFrame | Series':
+        """Map an array in cube shape back to the original long form
+        ------------------------------------------------------------
+
+        values: ndarray, in (date, asset) or (date, asset, field) shape, default the cube itself
+        columns: Index or list, columns of the result, default to the cube fields
+        name: str, name of the result when values is in (date, asset) shape
+        compacted: bool, whether values come from compact, which saves the expand
+        """
+    def to_wide(self, field = None) -> DataFrame:
+        """Get a date x asset dataframe of one field
+        ---------------------------------------------
+
+        field: the field name, default to the first field
+        """
+    def to_product(self, values: np.ndarray = None) -> 'DataFrame | Series':
+        """Map an array in cube shape to a full (datetime, asset) product panel
+        -----------------------------------------------------------------------
+
+        values: ndarray, in (date, asset) or (date, asset, field) shape, default the cube itself
+        """
+
+
+class RaggedPanel(object):
+    """Ragged panel
+    ================
+
+    RaggedPanel keeps only the existing rows of a panel, in contiguous
+    asset code and value arrays ordered by date then asset, with the rows
+    of the i-th date in `offsets[i]:offsets[i + 1]` (the CSR layout). 
+    Cross sectional statistics are computed on the segments directly,
+    so a panel with listings and delistings never pays for the
+    cartesian product of dates and assets, densify it only on demand.
+
+    The workers take a ragged panel directly, working on its long form and
+    returning long form results, the segments are reused without rebuilding:
+
+    >>> PreProcessor(ragged).standarize()
+    """
+    values: np.ndarray
+    dates: Index
+    assets: Index
+    fields: Index
+    offsets: np.ndarray
+    asset_codes: np.ndarray
+    index: MultiIndex
+    order: np.ndarray
+    isseries: bool
+
+    @classmethod
+    def from_data(
+        cls,
+        data: 'DataFrame | Series',
+        dtype: str = 'float64',
+    ) -> 'RaggedPanel':
+        """Build a ragged panel from a panel dataframe or series
+        ---------------------------------------------------------
+
+        data: DataFrame or Series, a panel indexed by (datetime, asset)
+        dtype: str, the data type of the values, default float64
+        """
+    @property
+    def shape(self) -> tuple: ...
+    @property
+    def nnz(self) -> int: ...
+    @property
+    def counts(self) -> np.ndarray: ...
+    @property
+    def date_codes(self) -> np.ndarray: ...
+    def cross_section(self, date) -> 'DataFrame | Series':
+        """Get the cross section on a date, indexed by asset"""
+    def reduce(self, how: str = 'mean', values: np.ndarray = None, ddof: int = 1) -> np.ndarray:
+        """Reduce each cross section, skipping NaN
+        --------------------------------------------
+
+        how: str, one of 'sum', 'count', 'mean', 'std', 'min', 'max', 'median'
+        values: ndarray, in (nnz, field) shape, default the values of the panel
+        ddof: int, delta degrees of freedom for std
+        return: ndarray, in (date, field) shape
+        """
+    def quantile(self, q: float, values: np.ndarray = None) -> np.ndarray:
+        """Quantile of each cross section with linear interpolation, skipping NaN
+        ---------------------------------------------------------------------------
+
+        q: float, the quantile between 0 and 1
+        values: ndarray, in (nnz, field) shape, default the values of the panel
+        return: ndarray, in (date, field) shape
+        """
+    def broadcast(self, values: np.ndarray) -> np.ndarray:
+        """Broadcast a (date, ...) shaped array back to the (nnz, ...) rows"""
+    def to_long(
+        self,
+        values: np.ndarray = None,
+        columns: 'Index | list' = None,
+        name: str = None,
+    ) -> 'DataFrame | Series':
+        """Map an array in (nnz, ...) shape back to the original long form
+        ------------------------------------------------------------------
+
+        values: ndarray, in (nnz, ) or (nnz, field) shape, default the values of the panel
+        columns: Index or list, columns of the result, default to the panel fields
+        name: str, name of the result when values is in (nnz, ) shape
+        """
+    def to_cube(self) -> PanelCube:
+        """Densify into a PanelCube"""
+    def to_product(self) -> 'DataFrame | Series':
+        """Densify into a full (datetime, asset) product panel"""
+
+
+class GroupIndex(object):
+    """Group index
+    ===============
+
+    GroupIndex is built once from a panel grouper, like the industry of
+    each asset on each date. The rows are sorted by their (date, group)
+    segment only once, with the offsets and sizes of the segments kept,
+    so the accessors taking it as grouper reduce the segments directly
+    instead of factorizing the same grouper again on every call.
+    """
+    grouper: Series
+    index: MultiIndex
+    dates: Index
+    groups: Index
+    segment_dates: np.ndarray
+    segment_groups: np.ndarray
+    codes: np.ndarray
+    order: np.ndarray
+    offsets: np.ndarray
+
+    @classmethod
+    def from_data(cls, grouper: Series) -> 'GroupIndex':
+        """Build a group index from a panel grouper
+        ---------------------------------------------
+
+        grouper: Series, the group labels indexed by (datetime, asset),
+            rows with NaN label belong to no group
+        """
+    @property
+    def sizes(self) -> np.ndarray: ...
+    @property
+    def labels(self) -> MultiIndex:
+        """the (date, group) label of each segment"""
+    def align(self, index: MultiIndex) -> 'GroupIndex':
+        """Get the group index on another panel index, the last one is cached"""
+    def segments(self, values: np.ndarray) -> RaggedPanel:
+        """Put the values in original row order into segments for reduction"""
+    def reduce(self, values: np.ndarray, how: str = 'mean', *args) -> np.ndarray:
+        """Reduce each segment, skipping NaN
+        --------------------------------------
+
+        values: ndarray, in (row, ) or (row, field) shape in the original row order
+        how: str, one of 'sum', 'count', 'mean', 'std', 'min', 'max', 'median', 'quantile'
+        args: the quantile for 'quantile'
+        return: ndarray, in (segment, field) shape
+        """
+    def transform(self, values: np.ndarray, how: str = 'mean', *args) -> np.ndarray:
+        """The reduction of the segment of each row, NaN for rows without group"""
+
+
+class SharedPanel(object):
+    """Shared panel
+    ===============
+
+    SharedPanel publishes the dense cube of a panel only once, into a
+    shared memory block or a memory mapped .npy file, with the dates,
+    assets and fields kept as sidecars. Pickling a SharedPanel only
+    sends the handle, so the workers attach to the same memory without
+    copying or serializing the values.
+    """
+    name: str
+    shape: tuple
+    dtype: np.dtype
+    dates: Index
+    assets: Index
+    fields: Index
+    index_names: list
+    path: str
+
+    @classmethod
+    def publish(
+        cls,
+        data: 'DataFrame | Series | PanelCube',
+        path: str = None,
+    ) -> 'SharedPanel':
+        """Publish a panel into shared memory
+        --------------------------------------
+
+        data: DataFrame, Series or PanelCube, the panel to publish
+        path: str, path to a memory mapped .npy file, the index sidecar is
+            saved in path + '.index', default None to use a shared memory block
+        """
+    @classmethod
+    def attach(cls, path: str) -> 'SharedPanel':
+        """Attach to a panel published in a memory mapped file
+        -------------------------------------------------------
+
+        path: str, path to the memory mapped .npy file
+        """
+    @property
+    def values(self) -> np.ndarray:
+        """the (date, asset, field) array, attached on first access"""
+    def to_frame(self) -> DataFrame:
+        """Reconstruct the (datetime, asset) product panel"""
+    def close(self) -> None:
+        """Detach from the shared memory, views of values should be released before"""
+    def unlink(self) -> None:
+        """Release the shared memory or remove the memory mapped files, called by the publisher"""
+
+
 class Worker(object):
     TSFR = 1
     CSFR = 2
@@ -22,6 +296,7 @@ class Worker(object):
     MCFR = 10
     MIMC = 11
 
+    def __init__(self, data: 'DataFrame | Series | RaggedPanel') -> None: ...
     @staticmethod
     def series2frame(data: Series, name: str = None) -> DataFrame: ...
     @staticmethod
@@ -40,26 +315,14 @@ class Worker(object):
     def ismi(index: Index) -> bool: ...
     def _validate(self) -> None: ...
     def _flat(self, datetime, asset, indicator) -> DataFrame: ...
+    @staticmethod
+    def _fingerprint(data: 'DataFrame | Series') -> tuple: ...
+    def _cached(self, kind: str, build: ...) -> 'PanelCube | RaggedPanel': ...
+    def _to_cube(self) -> PanelCube: ...
+    def _to_ragged(self) -> RaggedPanel: ...
+    def _to_shared(self, path: str = None) -> SharedPanel: ...
     def _to_array(self, *axes) -> array: ...
 
-class Strategy(bt.Strategy):
-    def log(self, text: str, datetime: datetime.datetime = None, hint: str = 'INFO') -> None: ...
-    def notify_order(self, order: bt.Order) -> None: ...
-    def notify_trade(self, trade) -> None: ...
-
-class Indicator(bt.Indicator):
-    def log(self, text: str, datetime: datetime.datetime = None, hint: str = 'INFO') -> None: ...
-
-class Analyzer(bt.Analyzer):
-    def log(self, text: str, datetime: datetime.datetime = None, hint: str = 'INFO') -> None: ...
-
-class Observer(bt.Observer):
-    def log(self, text: str, datetime: datetime.datetime = None, hint: str = 'INFO') -> None: ...
-
-class OrderTable(Analyzer):
-    def notify_order(self, order) -> None: ...
-    def get_analysis(self) -> DataFrame: ...
-
 def from_array(
     arr: np.ndarray,
     index: Index = None, 
@@ -81,7 +344,10 @@ def concat(objs, colnames: list = None, **kwargs) -> DataFrame: ...
 def read_csv(
     path_or_buffer,
     perspective: str = None,
-    name_pattern: str = None,      
+    name_pattern: str = None,
+    processes: int = 1,
+    backend: str = 'thread',
+    cache: str = None,
     **kwargs
 ) -> DataFrame:
     '''A enhanced function for reading files in a directory to a panel DataFrame
@@ -90,7 +356,11 @@ def read_csv(
     path: path to the directory
     perspective: 'datetime', 'asset', 'indicator'
     name_pattern: pattern to match the file name, which will be extracted as index
-    kwargs: other arguments for pd.read_csv
+    processes: int, the number of workers reading files, default 1
+    backend: str, choose between 'thread' and 'process' for the workers
+    cache: str, directory of the cache for parsed files, files are only parsed
+        again when their path, mtime or size changes, default None means no cache
+    kwargs: other arguments for pd.read_csv, pass engine='pyarrow' to use pyarrow csv parser
 
     **note: the name of the file in the directory will be interpreted as the 
     sign(column or index) to the data, so set it to the brief one
@@ -99,6 +369,9 @@ def read_excel(
     path_or_buffer,
     perspective: str = None,
     name_pattern: str = None,
+    processes: int = 1,
+    backend: str = 'thread',
+    cache: str = None,
     **kwargs,
 ) -> DataFrame:
     '''A enhanced function for reading files in a directory to a panel DataFrame
@@ -106,6 +379,10 @@ def read_excel(
 
     path: path to the directory
     perspective: 'datetime', 'asset', 'indicator'
+    processes: int, the number of workers reading files, default 1
+    backend: str, choose between 'thread' and 'process' for the workers
+    cache: str, directory of the cache for parsed files, files are only parsed
+        again when their path, mtime or size changes, default None means no cache
     kwargs: other arguments for pd.read_excel
 
     **note: the name of the file in the directory will be interpreted as the 
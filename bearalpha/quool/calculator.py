@@ -1,3 +1,4 @@
+import itertools
 import pandas as pd
 import numpy as np
 from .base import *
@@ -13,28 +14,88 @@ class CalculatorError(FrameWorkError):
 class Calculator(Worker):
 
     @staticmethod
-    def __split_job(data: 'list[tuple[any, pd.DataFrame | pd.Series]]', processes: int, 
-        func: ..., *args, **kwargs) -> 'dict[any, pd.DataFrame | pd.Series]':
+    def __split_job(job: tuple, chunks: ..., runner: ..., processes: int):
         '''Split job into processes
         ------------------------------
 
-        data: list[tuple[any, pd.DataFrame | pd.Series]], the data to split, with (index, data) form
+        job: tuple, the data and function shipped once to each process
+        chunks: iterable, the chunks of tasks sent to the processes
+        runner: module level function called as runner(job, chunk) in a process, returning a list
         processes: int, the number of processes used
-        func: the function applied to each group,
-        args: the arguments of func
-        kwargs: the keyword arguments of func
+        return: generator of the result list of each chunk, in the order of chunks
         '''
         import multiprocessing
+        from collections import deque
         context = multiprocessing.get_context('fork')
-        pool = context.Pool(processes=processes)
-        results = {}
-        for idx, dat in data:
-            results[idx] = pool.apply_async(func, args=(dat, ) + args, kwds=kwargs)
-        pool.close()
-        pool.join()
-        for idx, res in results.items():
-            results[idx] = res.get()
-        return results
+        # the job is inherited by the forked processes instead of being pickled
+        with context.Pool(processes=processes, initializer=_job_init,
+            initargs=(job, runner)) as pool:
+            pending = deque()
+            for chunk in chunks:
+                pending.append(pool.apply_async(_job_chunk, args=(chunk, )))
+                # bound the chunks in flight, the finished ones are collected in order
+                if len(pending) >= processes * 2:
+                    yield pending.popleft().get()
+            while pending:
+                yield pending.popleft().get()
+
+    def _window_source(self, raw: bool = False) -> 'tuple[pd.Index, tuple]':
+        """Prepare the window source and the window end labels
+        -------------------------------------------------------
+
+        raw: bool, make the source from the dense values
+        return: the datetime index and the source, ('view', values) for raw
+            windows, ('frame', data, bounds, ispanel) for dataframe windows
+        """
+        ispanel = self.type_ == Worker.PNFR or self.type_ == Worker.PNSR
+        if self.type_ == Worker.TSSR or self.type_ == Worker.TSFR:
+            data = self.data if self.data.index.is_monotonic_increasing else self.data.sort_index()
+            datetime_index = data.index
+            if raw:
+                return datetime_index, ('view', data.to_numpy(dtype='float64'))
+            bounds = np.arange(datetime_index.size + 1)
+        elif ispanel:
+            if raw:
+                cube = self._to_cube()
+                values = cube.values[:, :, 0] if self.isseries(self.data) else cube.values
+                return cube.dates, ('view', values)
+            data = self.data.sort_index()
+            data.index = data.index.remove_unused_levels()
+            datetime_index = data.index.levels[0]
+            # the rows of each date are contiguous in the sorted data
+            bounds = np.searchsorted(data.index.codes[0], np.arange(datetime_index.size + 1))
+        else:
+            raise TypeError('rolling only support for panel or time series data')
+        return datetime_index, ('frame', data, bounds, ispanel)
+
+    @staticmethod
+    def _window_at(source: tuple, window: int, end: int) -> 'np.ndarray | pd.DataFrame | pd.Series':
+        """Cut the window ending at position end from the source without copying"""
+        if source[0] == 'frame':
+            _, data, bounds, ispanel = source
+            window_data = data.iloc[bounds[end - window + 1]:bounds[end + 1]]
+            if ispanel:
+                window_data.index = window_data.index.remove_unused_levels()
+            return window_data
+        if source[0] == 'shared':
+            values = source[1].values[:, :, 0] if source[2] else source[1].values
+        else:
+            values = source[1]
+        views = np.lib.stride_tricks.sliding_window_view(values, window, axis=0)
+        # the window axis of sliding_window_view is the last one
+        return np.moveaxis(views[end - window + 1], -1, 0)
+
+    def _windows(self, window: int, interval: int = 1, offset: int = 0, raw: bool = False):
+        """Iterate the rolling windows as (label, window) pairs without copying
+        -------------------------------------------------------------------------
+
+        raw windows are strided views of the dense values, in (window, asset, field)
+        shape for panel and (window, field) for time series (the field axis is
+        dropped for series), others are positional slices of the sorted data
+        """
+        datetime_index, source = self._window_source(raw)
+        for i in range(window - 1, datetime_index.size, interval):
+            yield datetime_index[i - offset], self._window_at(source, window, i)
 
     def rolling(
         self, 
@@ -44,6 +105,8 @@ class Calculator(Worker):
         processes: int = 1,
         offset: int = 0, 
         interval: int = 1, 
+        raw: bool = False,
+        chunksize: int = None,
         **kwargs
     ):
         '''Provide rolling window func apply for pandas dataframe
@@ -53,64 +116,404 @@ class Calculator(Worker):
         func: unit calculation function
         args: arguments apply to func
         offset: int, the offset of the index, default 0 is the latest time
+        raw: bool, pass the window to func as a read only ndarray view of the dense
+            values, in (window, asset, field) shape for panel, (window, field) for
+            time series, without the field axis for series, instead of a dataframe
+        chunksize: int, the number of contiguous windows sent to a process at once,
+            default None to make about 4 chunks per process
         kwargs: the keyword argument applied in func
         '''
-        # in case of unsorted level and used level
-        data = self.data.sort_index().copy()
-        data.index = data.index.remove_unused_levels()
-
-        if self.type_ == Worker.TSSR or self.type_ == Worker.TSFR:
-            datetime_index = data.index
-        elif self.type_ == Worker.PNFR or self.type_ == Worker.PNSR:
-            datetime_index = data.index.levels[0]
-        else:
-            raise TypeError('rolling only support for panel or time series data')
-        
-        window_datas = []
-        for i in range(window - 1, datetime_index.size, interval):
-            window_data = data.loc[datetime_index[i - window + 1]:datetime_index[i]].copy()
-            window_data.index = window_data.index.remove_unused_levels()
-            window_datas.append((datetime_index[i - offset], window_data))
+        if raw:
+            assets = self._to_cube().assets if self.type_ == Worker.PNFR or self.type_ == Worker.PNSR else None
+            fields = None if self.isseries(self.data) else self.data.columns
+        datetime_index, source = self._window_source(raw)
+        positions = range(window - 1, datetime_index.size, interval)
+        labels = datetime_index[np.asarray(positions, dtype='int64') - offset]
 
+        shared = None
         if processes > 1:
-            results = self.__split_job(window_datas, processes, func, *args, **kwargs)
+            if raw and (self.type_ == Worker.PNFR or self.type_ == Worker.PNSR):
+                shared = SharedPanel.publish(self._to_cube())
+                source = ('shared', shared, self.isseries(self.data))
+            chunksize = chunksize or max(1, -(-len(positions) // (processes * 4)))
+            chunks = (positions[i:i + chunksize] for i in range(0, len(positions), chunksize))
+            jobs = self.__split_job((source, window, func, args, kwargs), chunks, _rolling_chunk, processes)
+            results = itertools.chain.from_iterable(jobs)
         else:
-            results = {}
-            for idx, dt in window_datas:
-                results[idx] = func(dt, *args, **kwargs)
+            results = (func(self._window_at(source, window, i), *args, **kwargs) for i in positions)
             
         result_data = []
-        for idx, res in results.items():
-            if isinstance(res, (pd.DataFrame, pd.Series)):
-                if isinstance(res.index, pd.MultiIndex) \
-                    and len(res.index.levshape) >= 2:
-                    raise CalculatorError('rolling', 'the result of func must be a single indexed')
+        try:
+            for idx, res in zip(labels, results):
+                if raw and isinstance(res, np.ndarray) and res.ndim:
+                    # per asset (and field) results of raw windows
+                    index = assets if assets is not None and res.shape[0] == assets.size else None
+                    res = pd.DataFrame(res, index=index, columns=fields if res.ndim == 2 
+                        and fields is not None and res.shape[1] == fields.size else None) \
+                        if res.ndim == 2 else pd.Series(res, index=index)
+                if isinstance(res, (pd.DataFrame, pd.Series)):
+                    if isinstance(res.index, pd.MultiIndex) \
+                        and len(res.index.levshape) >= 2:
+                        raise CalculatorError('rolling', 'the result of func must be a single indexed')
+                    else:
+                        res.index = pd.MultiIndex.from_product([[idx], res.index])
                 else:
-                    res.index = pd.MultiIndex.from_product([[idx], res.index])
-            else:
-                res = pd.DataFrame([res], index=[idx])
-            
-            result_data.append(res)
+                    res = pd.DataFrame([res], index=[idx])
             
+                result_data.append(res)
+        finally:
+            if processes > 1:
+                # terminate the pool before releasing the shared memory
+                jobs.close()
+            if shared is not None:
+                shared.unlink()
+
         result = pd.concat(result_data)
         return result
 
+    @staticmethod
+    def _blocks(values: np.ndarray, window: int) -> np.ndarray:
+        """overlapping blocks of 2 * window rows, starting every window rows from
+        window rows before the first one, zero padded, so the trailing window of
+        each row in the second half of a block lies in the block"""
+        nblock = -(-len(values) // window)
+        padded = np.zeros(((nblock + 1) * window, ) + values.shape[1:], dtype=values.dtype)
+        padded[window:window + len(values)] = values
+        padded = padded.reshape((nblock + 1, window) + values.shape[1:])
+        return np.concatenate([padded[:-1], padded[1:]], axis=1)
+
+    @staticmethod
+    def _unblock(values: np.ndarray, window: int, length: int) -> np.ndarray:
+        """rows of the second halves of blocks, broadcasting a value per block"""
+        if values.shape[1] != window:
+            values = np.repeat(values, window, axis=1)
+        return values.reshape((-1, ) + values.shape[2:])[:length]
+
+    @staticmethod
+    def _block_sum(blocks: np.ndarray, window: int, length: int) -> np.ndarray:
+        """sum over the trailing window of each row by the difference of cumulative sums in blocks"""
+        csum = np.cumsum(blocks, axis=1)
+        return Calculator._unblock(csum[:, window:] - csum[:, :window], window, length)
+
+    @staticmethod
+    def _window_sum(values: np.ndarray, window: int) -> np.ndarray:
+        """sum over the trailing window along the first axis by the difference of cumulative sums,
+        which restart every window rows so the rounding errors don't pile up along the dates"""
+        return Calculator._block_sum(Calculator._blocks(values, window), window, len(values))
+
+    @staticmethod
+    def _centered_blocks(values: np.ndarray, valid: np.ndarray, window: int):
+        """the valid values in blocks, zero elsewhere, each block centered on its own mean,
+        so their powers stay in the scale of the variation within the windows, and the
+        centers in rows"""
+        blocks, valid = Calculator._blocks(values, window), Calculator._blocks(valid, window)
+        blocks = np.where(valid, blocks, 0)
+        center = blocks.sum(axis=1, keepdims=True) / np.maximum(valid.sum(axis=1, keepdims=True), 1)
+        return blocks - center * valid, Calculator._unblock(center, window, len(values))
+
+    def _roll_values(self, other: 'pd.Series | pd.DataFrame' = None):
+        """Put the data (and other) on a time leading ndarray
+        ------------------------------------------------------
+
+        Panels are compacted along the date axis, so the window runs over
+        the existing rows of each asset like groupby(level=1).rolling
+
+        return: the data values, the aligned other values or None, and the
+            function mapping a result array (and its columns) back to pandas
+        """
+        if self.type_ == Worker.PNFR or self.type_ == Worker.PNSR:
+            cube = self._to_cube()
+            values = cube.compact(cube.values[:, :, 0] if self.isseries(self.data) else cube.values)
+            if other is not None:
+                if self.ists(other):
+                    other = other.reindex(cube.dates).to_numpy(dtype='float64')
+                    other = np.broadcast_to(other.reshape((cube.dates.size, 1) + other.shape[1:]), 
+                        (cube.dates.size, cube.assets.size) + other.shape[1:])
+                elif self.ispanel(other):
+                    other = cube.reindex(other if self.isseries(other) or self.isseries(self.data)
+                        else other.reindex(columns=cube.fields))
+                else:
+                    raise CalculatorError('rollstat', 'other should be a time series or a panel')
+                other = cube.compact(other)
+            mapback = lambda result, columns=None: cube.to_long(cube.expand(result), columns=columns)
+        elif self.type_ == Worker.TSSR or self.type_ == Worker.TSFR:
+            values = self.data.to_numpy(dtype='float64')
+            if other is not None:
+                if not self.ists(other):
+                    raise CalculatorError('rollstat', 'other should be a time series')
+                if self.isframe(other) and self.isframe(self.data):
+                    other = other.reindex(columns=self.data.columns)
+                other = other.reindex(self.data.index).to_numpy(dtype='float64')
+            mapback = lambda result, columns=None: pd.DataFrame(result, index=self.data.index, 
+                columns=self.data.columns if columns is None else columns) if result.ndim == 2 \
+                else pd.Series(result, index=self.data.index, name=self.data.name)
+        else:
+            raise CalculatorError('rollstat', 'rollstat only support for panel or time series data')
+        
+        if other is not None and other.ndim < values.ndim:
+            other = other[..., None]
+        return values, other, mapback
+
+    def rollstat(
+        self,
+        window: int,
+        how: str = 'mean',
+        other: 'pd.Series | pd.DataFrame' = None,
+        min_periods: int = None,
+        ddof: int = 1,
+    ) -> 'pd.DataFrame | pd.Series':
+        '''Rolling statistics of all the assets at once in O(N)
+        --------------------------------------------------------
+
+        The window sums are the differences of the cumulative sums of the
+        values centered in blocks of windows, the windows run over the existing 
+        rows of each asset
+
+        window: int, the rolling window length
+        how: str, one of 'sum', 'mean', 'std', 'var', 'skew', 
+            and 'cov', 'corr', 'beta' with other
+        other: Series or DataFrame, the time series (e.g. market return) or 
+            panel paired with data, beta is the slope of data on other
+        min_periods: int, the minimum valid observations in a window, default window
+        ddof: int, delta degrees of freedom of std, var and cov, default 1
+        '''
+        pairwise = ('cov', 'corr', 'beta')
+        if how not in ('sum', 'mean', 'std', 'var', 'skew') + pairwise:
+            raise CalculatorError('rollstat', f'unsupported statistic {how}')
+        if (how in pairwise) != (other is not None):
+            raise CalculatorError('rollstat', f'other is {"required" if how in pairwise else "only used"} for cov, corr and beta')
+        min_periods = max(window if min_periods is None else min_periods, 1)
+
+        x, y, mapback = self._roll_values(other)
+        valid = ~np.isnan(x)
+        if y is not None:
+            valid &= ~np.isnan(y)
+        count = self._window_sum(valid.astype('float64'), window)
+
+        def _sum(blocks):
+            return self._block_sum(blocks, window, len(x))
+        
+        with np.errstate(divide='ignore', invalid='ignore'):
+            xc, xcenter = self._centered_blocks(x, valid, window)
+            sx = _sum(xc)
+            if how == 'sum':
+                result = sx + count * xcenter
+            elif how == 'mean':
+                result = sx / count + xcenter
+            elif how in ('std', 'var'):
+                m2 = np.maximum(_sum(xc ** 2) - sx ** 2 / count, 0)
+                result = m2 / np.where(count > ddof, count - ddof, np.nan)
+                result = np.sqrt(result) if how == 'std' else result
+            elif how == 'skew':
+                mean = sx / count
+                m2 = _sum(xc ** 2) / count - mean ** 2
+                m3 = _sum(xc ** 3) / count - mean ** 3 - 3 * mean * m2
+                result = np.sqrt(count * (count - 1)) * m3 / ((count - 2) * m2 ** 1.5)
+                result[(count < 3) | (m2 <= 1e-14)] = np.nan
+            else:
+                yc, _ = self._centered_blocks(y, valid, window)
+                sy = _sum(yc)
+                cov = _sum(xc * yc) - sx * sy / count
+                if how == 'cov':
+                    result = cov / np.where(count > ddof, count - ddof, np.nan)
+                else:
+                    vary = _sum(yc ** 2) - sy ** 2 / count
+                    vary[vary <= 1e-14 * np.maximum(count, 1)] = np.nan
+                    if how == 'beta':
+                        result = cov / vary
+                    else:
+                        varx = _sum(xc ** 2) - sx ** 2 / count
+                        varx[varx <= 1e-14 * np.maximum(count, 1)] = np.nan
+                        result = np.clip(cov / np.sqrt(varx * vary), -1, 1)
+
+        result[count < min_periods] = np.nan
+        return mapback(result)
+
+    def rollreg(
+        self,
+        window: int,
+        x: 'pd.Series | pd.DataFrame',
+        intercept: bool = True,
+        min_periods: int = None,
+    ) -> pd.DataFrame:
+        '''Rolling time series regression of each asset on x at once
+        --------------------------------------------------------------
+
+        The normal equations are window sums of the cumulative cross products,
+        and are solved for all the (date, asset) windows with batched pseudo 
+        inverse, the windows run over the existing rows of each asset
+
+        window: int, the rolling window length
+        x: Series or DataFrame, the regressors, a time series (e.g. market return)
+            shared by all the assets or a panel
+        intercept: bool, whether to add a intercept value
+        min_periods: int, the minimum valid observations in a window, default window
+        return: DataFrame, with 'coef' and 'tvalue' of each regressor and 'resid_std' in columns
+        '''
+        if not self.isseries(self.data):
+            raise CalculatorError('rollreg', 'rollreg only support for series data as y')
+        names = [x.name] if self.isseries(x) else list(x.columns)
+        names = (['const'] if intercept else []) + names
+        min_periods = max(window if min_periods is None else min_periods, len(names) + 1)
+
+        y, x, mapback = self._roll_values(x)
+        if x.ndim == y.ndim:
+            x = x[..., None]
+        valid = ~np.isnan(y) & ~np.isnan(x).any(axis=-1)
+        y, x = np.where(valid, y, 0), np.where(valid[..., None], x, 0)
+        if intercept:
+            # centering keeps the cumulative sums small, the intercept is restored after
+            count = np.maximum(valid.sum(axis=0), 1)
+            ycenter, xcenter = y.sum(axis=0) / count, x.sum(axis=0) / count[..., None]
+            y, x = y - ycenter * valid, x - xcenter * valid[..., None]
+            x = np.concatenate([valid[..., None].astype('float64'), x], axis=-1)
+        
+        count = self._window_sum(valid.astype('float64'), window)
+        xx = self._window_sum(x[..., :, None] * x[..., None, :], window)
+        xy = self._window_sum(x * y[..., None], window)
+        yy = self._window_sum(y ** 2, window)
+
+        with np.errstate(divide='ignore', invalid='ignore'):
+            # pseudo inverse like statsmodels, so the collinear windows are still solved
+            xxinv = np.linalg.pinv(xx, hermitian=True)
+            coef = (xxinv @ xy[..., None])[..., 0]
+            ssr = np.maximum(yy - (coef * xy).sum(axis=-1), 0)
+            scale = ssr / (count - len(names))
+            cov = xxinv * scale[..., None, None]
+            if intercept:
+                # the intercept on the original scale is a linear combination of coef
+                combination = np.concatenate([np.ones(xcenter.shape[:-1] + (1, )), -xcenter], axis=-1)
+                coef[..., 0] += ycenter + (combination[..., 1:] * coef[..., 1:]).sum(axis=-1)
+                cov[..., 0, 0] = (combination[..., :, None] * cov * combination[..., None, :]).sum(axis=(-2, -1))
+            tvalue = coef / np.sqrt(np.diagonal(cov, axis1=-2, axis2=-1))
+            result = np.concatenate([coef, tvalue, np.sqrt(scale)[..., None]], axis=-1)
+        
+        result[count < min_periods] = np.nan
+        columns = pd.MultiIndex.from_tuples([('coef', name) for name in names] 
+            + [('tvalue', name) for name in names] + [('resid_std', '')])
+        return mapback(result, columns)
+
+    @staticmethod
+    def _group_at(source: tuple, key: ..., positions: np.ndarray) -> 'pd.DataFrame | pd.Series':
+        """Take the rows of a group from the source, named by the group key like groupby.apply"""
+        if source[0] == 'frame':
+            group = source[1].iloc[positions]
+        else:
+            _, shared, index, date_codes, asset_codes, isseries = source
+            values = shared.values[date_codes[positions], asset_codes[positions]]
+            group = pd.Series(values[:, 0], index=index[positions], name=shared.fields[0]) if isseries \
+                else pd.DataFrame(values, index=index[positions], columns=shared.fields)
+        object.__setattr__(group, 'name', key)
+        return group
+
     def group_apply(
         self, 
         grouper: ..., 
         func: ..., 
         *args, 
+        processes: int = 4,
+        backend: str = 'process',
+        progress: bool = True,
         **kwargs
     ) -> 'pd.Series | pd.DataFrame':
         '''multi-process apply a function to each group
         ----------------------------------------------
 
+        The groups are bin-packed by size into about 4 balanced chunks per 
+        process, and the results are put back in the order of the groups
+
         grouper: the grouper applied in func,
         func: the function applied to each group,
-        processes: the number of processes used, default 4
+        processes: the number of processes used, default 4, 1 runs in the current process
+        backend: str, 'thread' for the functions releasing GIL, 'process' for the 
+            forked processes inheriting the data, 'shared' for the processes reading 
+            a numeric panel from shared memory, default 'process'
+        progress: bool, whether to show the progress bar
         return: the result of func applied to each group
         '''
-        from pandarallel import pandarallel
-        pandarallel.initialize()
+        import heapq
+        if backend not in ('thread', 'process', 'shared'):
+            raise CalculatorError('group_apply', f'unsupported backend {backend}')
+
+        groupby = self.data.groupby(grouper)
+        keys = groupby.size().index
+        codes = groupby.ngroup().fillna(-1).to_numpy().astype('int64')
+        order = np.argsort(codes, kind='stable')
+        order = order[np.searchsorted(codes[order], 0):]
+        sizes = np.bincount(codes[codes >= 0], minlength=keys.size)
+        offsets = np.concatenate([[0], np.cumsum(sizes)])
+
+        # longest processing time first, each group goes to the lightest chunk
+        nchunks = max(1, min(keys.size, processes * 4))
+        loads = [(0, i) for i in range(nchunks)]
+        members = [[] for _ in range(nchunks)]
+        for group in np.argsort(-sizes, kind='stable'):
+            load, chunk = heapq.heappop(loads)
+            members[chunk].append(group)
+            heapq.heappush(loads, (load + sizes[group], chunk))
+        chunks = [sorted(member) for member in members if member]
+        tasks = [[(keys[group], order[offsets[group]:offsets[group + 1]]) for group in chunk] for chunk in chunks]
+
+        shared, jobs, executor = None, None, None
+        if backend == 'shared' and self.type_ != Worker.PNFR and self.type_ != Worker.PNSR:
+            raise CalculatorError('group_apply', 'shared backend only support for panel data')
+        if backend == 'shared' and processes > 1:
+            cube = self._to_cube()
+            shared = SharedPanel.publish(cube)
+            source = ('shared', shared, cube.index, cube.date_codes, cube.asset_codes, cube.isseries)
+        else:
+            source = ('frame', self.data)
+
+        results = [None] * keys.size
+        try:
+            with progressor(disable=not progress) as progress_bar:
+                bar = progress_bar.add_task('group apply', total=keys.size)
+                if processes <= 1:
+                    # no pool for a single process, the chunks run in place
+                    jobs = (_group_chunk((source, func, args, kwargs), task) for task in tasks)
+                elif backend == 'thread':
+                    from concurrent.futures import ThreadPoolExecutor
+                    executor = ThreadPoolExecutor(max_workers=processes)
+                    jobs = (future.result() for future in [executor.submit(_group_chunk, 
+                        (source, func, args, kwargs), task) for task in tasks])
+                else:
+                    jobs = self.__split_job((source, func, args, kwargs), tasks, _group_chunk, processes)
+                for chunk, chunk_results in zip(chunks, jobs):
+                    progress_bar.update(bar, advance=len(chunk))
+                    for group, result in zip(chunk, chunk_results):
+                        results[group] = result
+        finally:
+            if jobs is not None:
+                jobs.close()
+            if executor is not None:
+                executor.shutdown(cancel_futures=True)
+            if shared is not None:
+                shared.unlink()
+
+        if results and all(isinstance(result, pd.Series) for result in results) \
+            and all(result.index.equals(results[0].index) for result in results):
+            # like groupby.apply, the series indexed alike are stacked as rows
+            return pd.DataFrame(np.vstack([result.to_numpy() for result in results]), 
+                index=keys, columns=results[0].index)
+        if results and all(isinstance(result, (pd.Series, pd.DataFrame)) for result in results):
+            return pd.concat(results, keys=keys)
+        return pd.Series(results, index=keys, dtype=None if results else 'float64',
+            name=self.data.name if self.isseries(self.data) else None)
+
+
+_job_state = {}
+
+def _job_init(job: tuple, runner: ...) -> None:
+    _job_state['job'] = job
+    _job_state['runner'] = runner
+
+def _job_chunk(chunk: ...) -> list:
+    return _job_state['runner'](_job_state['job'], chunk)
+
+def _rolling_chunk(job: tuple, positions: range) -> list:
+    source, window, func, args, kwargs = job
+    return [func(Calculator._window_at(source, window, i), *args, **kwargs) for i in positions]
 
-        self.data.groupby(grouper).parallel_apply(func, *args, **kwargs)
+def _group_chunk(job: tuple, groups: list) -> list:
+    source, func, args, kwargs = job
+    return [func(Calculator._group_at(source, key, positions), *args, **kwargs) for key, positions in groups]
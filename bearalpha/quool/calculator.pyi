@@ -10,6 +10,8 @@ class Calculator(quool.base.Worker):
         processes: int = 1,
         offset: int = 0, 
         interval: int = 1, 
+        raw: bool = False,
+        chunksize: int = None,
         **kwargs
     ) -> 'DataFrame | Series':
         '''Provide rolling window func apply for pandas dataframe
@@ -19,23 +21,83 @@ class Calculator(quool.base.Worker):
         func: unit calculation function
         args: arguments apply to func
         offset: int, the offset of the index, default 0 is the latest time
+        raw: bool, pass the window to func as a read only ndarray view of the dense
+            values, in (window, asset, field) shape for panel, (window, field) for
+            time series, without the field axis for series, instead of a dataframe
+        chunksize: int, the number of contiguous windows sent to a process at once,
+            default None to make about 4 chunks per process
         kwargs: the keyword argument applied in func
         '''
 
 
+    def rollstat(
+        self,
+        window: int,
+        how: str = 'mean',
+        other: 'Series | DataFrame' = None,
+        min_periods: int = None,
+        ddof: int = 1,
+    ) -> 'DataFrame | Series':
+        '''Rolling statistics of all the assets at once in O(N)
+        --------------------------------------------------------
+
+        The window sums are the differences of the cumulative sums of the
+        values centered in blocks of windows, the windows run over the existing 
+        rows of each asset
+
+        window: int, the rolling window length
+        how: str, one of 'sum', 'mean', 'std', 'var', 'skew', 
+            and 'cov', 'corr', 'beta' with other
+        other: Series or DataFrame, the time series (e.g. market return) or 
+            panel paired with data, beta is the slope of data on other
+        min_periods: int, the minimum valid observations in a window, default window
+        ddof: int, delta degrees of freedom of std, var and cov, default 1
+        '''
+
+    def rollreg(
+        self,
+        window: int,
+        x: 'Series | DataFrame',
+        intercept: bool = True,
+        min_periods: int = None,
+    ) -> 'DataFrame':
+        '''Rolling time series regression of each asset on x at once
+        --------------------------------------------------------------
+
+        The normal equations are window sums of the cumulative cross products,
+        and are solved for all the (date, asset) windows with batched pseudo 
+        inverse, the windows run over the existing rows of each asset
+
+        window: int, the rolling window length
+        x: Series or DataFrame, the regressors, a time series (e.g. market return)
+            shared by all the assets or a panel
+        intercept: bool, whether to add a intercept value
+        min_periods: int, the minimum valid observations in a window, default window
+        return: DataFrame, with 'coef' and 'tvalue' of each regressor and 'resid_std' in columns
+        '''
+
     def group_apply(
         self, 
         grouper: ..., 
         func: ..., 
         *args, 
-        processes: int = 4, 
+        processes: int = 4,
+        backend: str = 'process',
+        progress: bool = True,
         **kwargs
     ) -> 'Series | DataFrame':
         '''multi-process apply a function to each group
         ----------------------------------------------
 
+        The groups are bin-packed by size into about 4 balanced chunks per 
+        process, and the results are put back in the order of the groups
+
         grouper: the grouper applied in func,
         func: the function applied to each group,
-        processes: the number of processes used, default 4
+        processes: the number of processes used, default 4, 1 runs in the current process
+        backend: str, 'thread' for the functions releasing GIL, 'process' for the 
+            forked processes inheriting the data, 'shared' for the processes reading 
+            a numeric panel from shared memory, default 'process'
+        progress: bool, whether to show the progress bar
         return: the result of func applied to each group
         '''
@@ -0,0 +1,579 @@
+import os
+import ast
+import json
+import hashlib
+import tempfile
+import inspect
+import warnings
+import numpy as np
+import pandas as pd
+from .base import *
+from .calculator import Calculator
+from ..tools import *
+
+
+class FactoryError(FrameWorkError):
+    pass
+
+
+def _finite(values: np.ndarray) -> np.ndarray:
+    """replace the infinite values with NaN"""
+    values = np.asarray(values, dtype='float64')
+    return np.where(np.isinf(values), np.nan, values)
+
+def _window(values: np.ndarray, window: int) -> np.ndarray:
+    """the trailing windows in (date, asset, window) shape, padded with NaN at the start"""
+    window = int(window)
+    if window < 1:
+        raise FactoryError('Factory', 'window of time series operator should be positive')
+    padded = np.concatenate([np.full((window - 1, ) + values.shape[1:], np.nan), values])
+    return np.lib.stride_tricks.sliding_window_view(padded, window, axis=0)
+
+def _ts_moments(window: int, *values: np.ndarray):
+    """window count and sums of the values and their cross products, skipping NaN pairwise"""
+    window = int(window)
+    valid = np.logical_and.reduce([~np.isnan(value) for value in values])
+    count = Calculator._window_sum(valid.astype('float64'), window)
+    # the values are centered in blocks of windows, like Calculator.rollstat
+    centered = [Calculator._centered_blocks(value, valid, window)[0] for value in values]
+    sums = [Calculator._block_sum(value, window, len(valid)) for value in centered]
+    cross = {(i, j): Calculator._block_sum(centered[i] * centered[j], window, len(valid))
+        for i in range(len(values)) for j in range(i, len(values))}
+    return count < window, count, sums, cross
+
+def ts_sum(x, window):
+    """window sum, NaN if the window contains NaN or both signs of infinity"""
+    x, window = np.asarray(x, dtype='float64'), int(window)
+    # the infinite values are counted aside, adding them up gives no finite sum
+    nan = Calculator._window_sum(np.isnan(x).astype('float64'), window) > 0
+    posinf = Calculator._window_sum((x == np.inf).astype('float64'), window) > 0
+    neginf = Calculator._window_sum((x == -np.inf).astype('float64'), window) > 0
+    result = Calculator._window_sum(np.where(np.isfinite(x), x, 0), window)
+    result[posinf] = np.inf
+    result[neginf] = -np.inf
+    result[nan | (posinf & neginf)] = np.nan
+    result[:window - 1] = np.nan
+    return result
+
+def ts_mean(x, window):
+    return ts_sum(x, window) / int(window)
+
+def ts_std(x, window):
+    invalid, count, (sx, ), cross = _ts_moments(window, x)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        result = np.sqrt(np.maximum(cross[0, 0] - sx ** 2 / count, 0) / (count - 1))
+    result[invalid] = np.nan
+    return result
+
+def ts_cov(x, y, window):
+    invalid, count, (sx, sy), cross = _ts_moments(window, x, y)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        result = (cross[0, 1] - sx * sy / count) / (count - 1)
+    result[invalid] = np.nan
+    return result
+
+def ts_corr(x, y, window):
+    invalid, count, (sx, sy), cross = _ts_moments(window, x, y)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        varx = cross[0, 0] - sx ** 2 / count
+        vary = cross[1, 1] - sy ** 2 / count
+        scale = 1e-14 * np.maximum(count, 1)
+        result = (cross[0, 1] - sx * sy / count) / np.sqrt(np.where((varx > scale) & (vary > scale), varx * vary, np.nan))
+    result[invalid] = np.nan
+    return np.clip(result, -1, 1)
+
+def ts_min(x, window):
+    return _window(np.asarray(x, dtype='float64'), window).min(axis=-1)
+
+def ts_max(x, window):
+    return _window(np.asarray(x, dtype='float64'), window).max(axis=-1)
+
+def ts_rank(x, window):
+    """percentage rank of the latest value in the window, ties averaged"""
+    windows = _window(np.asarray(x, dtype='float64'), window)
+    latest = windows[..., -1:]
+    with np.errstate(invalid='ignore'):
+        less = (windows < latest).sum(axis=-1)
+        equal = (windows == latest).sum(axis=-1)
+    result = (less + (equal + 1) / 2) / int(window)
+    result[np.isnan(windows).any(axis=-1)] = np.nan
+    return result
+
+def decay_linear(x, window):
+    """weighted mean with the linearly decayed weights, the latest weighs the most"""
+    weights = np.arange(1, int(window) + 1, dtype='float64')
+    return _window(np.asarray(x, dtype='float64'), window) @ (weights / weights.sum())
+
+def delay(x, period):
+    return PanelCube._shift(np.asarray(x, dtype='float64'), int(period))
+
+def delta(x, period):
+    return np.asarray(x, dtype='float64') - delay(x, period)
+
+def cs_rank(x):
+    """cross sectional percentage rank, ties averaged"""
+    return pd.DataFrame(x).rank(axis=1, pct=True).to_numpy()
+
+def cs_zscore(x):
+    with warnings.catch_warnings():
+        warnings.simplefilter('ignore', category=RuntimeWarning)
+        return _finite((x - np.nanmean(x, axis=1, keepdims=True)) / np.nanstd(x, axis=1, ddof=1, keepdims=True))
+
+def cs_demean(x):
+    with warnings.catch_warnings():
+        warnings.simplefilter('ignore', category=RuntimeWarning)
+        return x - np.nanmean(x, axis=1, keepdims=True)
+
+def cs_scale(x):
+    """scale the cross section to a unit sum of the absolute values"""
+    return _finite(x / np.nansum(np.abs(x), axis=1, keepdims=True))
+
+def where(condition, x, y):
+    condition = np.asarray(condition, dtype='float64')
+    return np.where(np.isnan(condition), np.nan, np.where(condition > 0, x, y))
+
+def _compare(func):
+    def compare(x, y):
+        with np.errstate(invalid='ignore'):
+            result = func(x, y).astype('float64')
+        result[np.isnan(x) | np.isnan(y)] = np.nan
+        return result
+    return compare
+
+def _elementwise(func):
+    def elementwise(*args):
+        with np.errstate(divide='ignore', invalid='ignore', over='ignore'):
+            return _finite(func(*args))
+    return elementwise
+
+
+class Factory(object):
+    """Factor factory
+    ==================
+
+    Factory compiles factor expressions like `cs_rank(ts_mean(close, 20) / delay(close, 5))`
+    into a DAG of operators on the date x asset matrices of the data fields.
+    The equal subexpressions of all the formulas are merged into one node,
+    and every node is computed only once. The intermediate results are 
+    released after their last consumer, and the requested factors are kept
+    in the factory for the later evaluations.
+
+    Operators working on the cross sections are prefixed with `cs_`,
+    those working along the existing rows of each asset with `ts_`, and the
+    time series windows containing NaN give NaN. `+ - * / **`, comparisons,
+    `abs`, `log`, `sign`, `sqrt`, `max`, `min` and `where` work elementwise.
+    More operators can be added into Factory.operators.
+
+    Examples:
+
+    >>> factory = Factory(data) # a panel dataframe with close, volume ...
+    >>> factory.evaluate({'momentum': 'cs_rank(ts_mean(close, 20) / delay(close, 5))',
+    >>>     'reversal': '-cs_rank(delta(close, 5))'})
+    """
+
+    operators = {
+        'add': _elementwise(np.add),
+        'sub': _elementwise(np.subtract),
+        'mul': _elementwise(np.multiply),
+        'div': _elementwise(np.divide),
+        'pow': _elementwise(np.power),
+        'neg': np.negative,
+        'abs': np.abs,
+        'log': _elementwise(lambda x: np.log(np.where(x > 0, x, np.nan))),
+        'sqrt': _elementwise(lambda x: np.sqrt(np.where(x >= 0, x, np.nan))),
+        'sign': np.sign,
+        'max': _elementwise(np.maximum),
+        'min': _elementwise(np.minimum),
+        'gt': _compare(np.greater),
+        'ge': _compare(np.greater_equal),
+        'lt': _compare(np.less),
+        'le': _compare(np.less_equal),
+        'eq': _compare(np.equal),
+        'ne': _compare(np.not_equal),
+        'where': where,
+        'delay': delay,
+        'delta': delta,
+        'ts_sum': ts_sum,
+        'ts_mean': ts_mean,
+        'ts_std': ts_std,
+        'ts_min': ts_min,
+        'ts_max': ts_max,
+        'ts_rank': ts_rank,
+        'ts_corr': ts_corr,
+        'ts_cov': ts_cov,
+        'decay_linear': decay_linear,
+        'cs_rank': cs_rank,
+        'cs_zscore': cs_zscore,
+        'cs_demean': cs_demean,
+        'cs_scale': cs_scale,
+    }
+
+    _binops = {ast.Add: 'add', ast.Sub: 'sub', ast.Mult: 'mul', ast.Div: 'div', ast.Pow: 'pow'}
+    _cmpops = {ast.Gt: 'gt', ast.GtE: 'ge', ast.Lt: 'lt', ast.LtE: 'le', ast.Eq: 'eq', ast.NotEq: 'ne'}
+    _commutative = ('add', 'mul', 'max', 'min', 'eq', 'ne')
+
+    def __init__(self, data: 'pd.DataFrame | pd.Series'):
+        if not Worker.ispanel(data):
+            raise FactoryError('Factory', 'Only panel data with (datetime, asset) index is supported')
+        self.data = data
+        self.cube = Worker(data)._to_cube()
+        self._values = {}
+        self.hits = 0
+        self.misses = 0
+
+    @property
+    def nodes(self) -> int:
+        """number of the computed nodes kept in the factory"""
+        return len(self._values)
+
+    def compile(self, expr: str) -> tuple:
+        """Parse an expression into the canonical key of its DAG node
+        ---------------------------------------------------------------
+
+        The key is a nested tuple, ('field', name), ('const', value) or
+        ('call', operator, *arguments), the operands of the commutative
+        operators are sorted, so the equal subexpressions share one key
+
+        expr: str, the factor expression
+        """
+        try:
+            tree = ast.parse(expr.strip(), mode='eval')
+        except SyntaxError as e:
+            raise FactoryError('compile', f'invalid expression {expr!r}: {e.msg}')
+        return self._compile(tree.body, expr)
+
+    def _compile(self, node: ast.AST, expr: str) -> tuple:
+        if isinstance(node, ast.Name):
+            if node.id not in self.cube.fields:
+                raise FactoryError('compile', f'unknown field {node.id!r} in {expr!r}')
+            return ('field', node.id)
+        if isinstance(node, ast.Constant) and isinstance(node.value, (int, float)) \
+            and not isinstance(node.value, bool):
+            return ('const', node.value)
+        if isinstance(node, ast.UnaryOp) and isinstance(node.op, (ast.USub, ast.UAdd)):
+            operand = self._compile(node.operand, expr)
+            if isinstance(node.op, ast.UAdd):
+                return operand
+            return ('const', -operand[1]) if operand[0] == 'const' else ('call', 'neg', operand)
+        if isinstance(node, ast.BinOp) and type(node.op) in self._binops:
+            return self._call(self._binops[type(node.op)],
+                [self._compile(node.left, expr), self._compile(node.right, expr)])
+        if isinstance(node, ast.Compare) and len(node.ops) == 1 and type(node.ops[0]) in self._cmpops:
+            return self._call(self._cmpops[type(node.ops[0])],
+                [self._compile(node.left, expr), self._compile(node.comparators[0], expr)])
+        if isinstance(node, ast.Call) and isinstance(node.func, ast.Name) and not node.keywords:
+            if node.func.id not in self.operators:
+                raise FactoryError('compile', f'unknown operator {node.func.id!r} in {expr!r}')
+            return self._call(node.func.id, [self._compile(arg, expr) for arg in node.args])
+        raise FactoryError('compile', f'unsupported syntax {ast.unparse(node)!r} in {expr!r}')
+
+    _windowed = ('delay', 'delta', 'ts_sum', 'ts_mean', 'ts_std', 'ts_min', 'ts_max',
+        'ts_rank', 'ts_corr', 'ts_cov', 'decay_linear')
+
+    def lookback(self, expr: 'str | tuple') -> int:
+        """Number of the previous dates needed to compute an expression on a date
+        --------------------------------------------------------------------------
+
+        The windows of the time series operators on a path of the DAG add up,
+        e.g. ts_mean(delay(close, 5), 20) looks back 5 + 19 dates
+
+        expr: str or tuple, the factor expression or its compiled key
+        """
+        key = self.compile(expr) if isinstance(expr, str) else expr
+        if key[0] != 'call':
+            return 0
+        lookback = max([self.lookback(argument) for argument in key[2:]] + [0])
+        if key[1] in self._windowed and key[-1][0] == 'const':
+            lookback += int(key[-1][1]) - (0 if key[1] in ('delay', 'delta') else 1)
+        return lookback
+
+    def warmup(self, expr: 'str | tuple | int', start: 'str | datetime.datetime') -> pd.Timestamp:
+        """The earliest date of the data needed to compute an expression since start
+        -----------------------------------------------------------------------------
+
+        The windows are followed down the DAG by the existing rows of each asset,
+        and the cross sectional operators need every asset on the dates they
+        are computed, so all the rows since the returned date give the same
+        results on the dates since start as the full data
+
+        expr: str or tuple, the factor expression or its compiled key, or
+            int, the number of the previous rows each asset looks back
+        start: the first date to compute
+        """
+        position = int(self.cube.dates.searchsorted(pd.Timestamp(start)))
+        if position >= self.cube.dates.size:
+            return pd.Timestamp(start)
+        if isinstance(expr, int):
+            return self.cube.dates[self._back(position, expr)]
+        key = self.compile(expr) if isinstance(expr, str) else expr
+        
+        def back(key, position):
+            if key[0] != 'call':
+                return position
+            if key[1] in self._windowed and key[-1][0] == 'const':
+                position = self._back(position, int(key[-1][1]) - (0 if key[1] in ('delay', 'delta') else 1))
+            return min([back(argument, position) for argument in key[2:]] + [position])
+        
+        return self.cube.dates[back(key, position)]
+
+    def _back(self, position: int, periods: int) -> int:
+        """the earliest date position among the rows `periods` rows before the 
+        first row on or after position of each asset"""
+        if periods <= 0:
+            return position
+        if not hasattr(self, '_rows'):
+            # date positions of the existing rows of each asset, and the rows before each date
+            self._rows = self.cube.compact(np.broadcast_to(np.arange(self.cube.dates.size, 
+                dtype='float64')[:, None], self.cube.shape[:2]))
+            self._counts = np.cumsum(self.cube.exists, axis=0)
+        before = self._counts[position - 1] if position else np.zeros(self.cube.assets.size, dtype='int64')
+        assets = np.flatnonzero(self._counts[-1] > before)
+        if not assets.size:
+            return position
+        return min(position, int(self._rows[np.maximum(before[assets] - periods, 0), assets].min()))
+
+    def _call(self, operator: str, arguments: list) -> tuple:
+        if operator in self._commutative:
+            arguments = sorted(arguments, key=repr)
+        return ('call', operator) + tuple(arguments)
+
+    def _plan(self, keys: list) -> 'tuple[list, dict]':
+        """the nodes to compute in the topological order, and the number of
+        the nodes computed on each of them"""
+        order, consumers, seen = [], {}, set()
+
+        def visit(key):
+            if key[0] == 'const':
+                return
+            if key in seen or key in self._values:
+                self.hits += 1
+                return
+            seen.add(key)
+            if key[0] == 'call':
+                for argument in set(key[2:]):
+                    consumers[argument] = consumers.get(argument, 0) + 1
+                for argument in key[2:]:
+                    visit(argument)
+            order.append(key)
+        
+        for key in keys:
+            visit(key)
+        return order, consumers
+
+    def _evaluate(self, key: tuple) -> np.ndarray:
+        self.misses += 1
+        if key[0] == 'field':
+            return self.cube.values[:, :, self.cube.fields.get_loc(key[1])]
+        
+        arguments = [argument[1] if argument[0] == 'const' else self._values[argument] 
+            for argument in key[2:]]
+        windowed = key[1] in self._windowed
+        if windowed:
+            # the windows run over the existing rows of each asset, like Calculator.rollstat
+            arguments = [self.cube.compact(argument) if isinstance(argument, np.ndarray) else argument
+                for argument in arguments]
+        try:
+            value = self.operators[key[1]](*arguments)
+        except TypeError as e:
+            raise FactoryError('evaluate', f'bad arguments of {key[1]}: {e}')
+        if windowed:
+            value = self.cube.expand(np.asarray(value, dtype='float64'))
+        return np.broadcast_to(np.asarray(value, dtype='float64'), self.cube.shape[:2])
+
+    def evaluate(
+        self,
+        exprs: 'str | list | dict',
+    ) -> 'pd.DataFrame | pd.Series':
+        """Evaluate the factor expressions on the data
+        -----------------------------------------------
+
+        exprs: str, list or dict, the expression(s), the keys of dict
+            are used as the factor names, otherwise the expressions are
+        return: Series for a single expression, DataFrame with factors in columns otherwise,
+            indexed as the data
+        """
+        if isinstance(exprs, str):
+            result = self.evaluate({exprs: exprs})
+            return result if isinstance(result, pd.Series) else result.iloc[:, 0]
+        if not isinstance(exprs, dict):
+            exprs = {expr: expr for expr in exprs}
+        keys = [self.compile(expr) for expr in exprs.values()]
+        order, consumers = self._plan(keys)
+        # the results kept from the earlier evaluations are not released
+        released = set(order) - set(keys)
+        for key in order:
+            self._values[key] = self._evaluate(key)
+            # the intermediate results are released after their last consumer
+            for argument in set(key[2:]) if key[0] == 'call' else ():
+                consumers[argument] -= 1
+                if not consumers[argument] and argument in released:
+                    self._values.pop(argument, None)
+        
+        values = np.stack([np.broadcast_to(key[1], self.cube.shape[:2]) if key[0] == 'const' 
+            else self._values[key] for key in keys], axis=-1)
+        return self.cube.to_long(values, columns=pd.Index(list(exprs.keys())))
+
+    def clear(self) -> None:
+        """Release the intermediate results kept in the factory"""
+        self._values.clear()
+        self.hits = self.misses = 0
+
+
+class FactorCache(object):
+    """Persistent factor cache
+    ===========================
+
+    FactorCache keeps the computed factor values in a PanelStore per factor,
+    keyed by the factor definition, the assets and the first date of the 
+    input data, with the fingerprint of the input data
+    up to the last cached date. When the input panel only gained new dates,
+    only the new tail is computed, on all the rows since the earliest date
+    any asset needs to warm up its windows (`lookback` rows of each asset for
+    the callables, see Factory.warmup for the expressions), and appended to 
+    the store; when the cached part of the input changed, the factor is 
+    computed again from scratch.
+
+    Examples:
+
+    >>> cache = FactorCache('path/to/cache')
+    >>> cache.get(data, 'cs_rank(ts_mean(close, 20) / delay(close, 5))')
+    >>> cache.get(data, lambda x: x.calculator.rollstat(20, 'std'), lookback=19)
+    >>> cache.report()
+    """
+
+    def __init__(self, path: str, freq: str = 'M'):
+        self.path = path
+        self.freq = freq
+        self.hits = 0
+        self.partials = 0
+        self.misses = 0
+        self.bytes_saved = 0
+
+    @staticmethod
+    def _definition(factor: 'str | callable', lookback: int) -> str:
+        """the text identifying a factor definition"""
+        if isinstance(factor, str):
+            return ast.unparse(ast.parse(factor.strip(), mode='eval'))
+        try:
+            source = inspect.getsource(factor)
+        except (OSError, TypeError):
+            source = ''
+        return f'{getattr(factor, "__module__", "")}.{getattr(factor, "__qualname__", repr(factor))}' \
+            f':{lookback}:{source}'
+
+    @staticmethod
+    def _fingerprint(data: 'pd.DataFrame | pd.Series') -> str:
+        """hash of the index and values of data, independent of the row order"""
+        hashes = pd.util.hash_pandas_object(data.sort_index(), index=True).to_numpy()
+        return hashlib.sha1(hashes.tobytes()).hexdigest()
+
+    @staticmethod
+    def _universe(data: 'pd.DataFrame | pd.Series') -> str:
+        """hash of the assets and the first date of data, which keep while the dates are appended"""
+        assets = data.index.get_level_values(1).unique().astype('str').sort_values()
+        start = str(data.index.get_level_values(0).min())
+        return hashlib.sha1('\n'.join([start] + list(assets)).encode()).hexdigest()
+
+    @staticmethod
+    def _compute(data: 'pd.DataFrame | pd.Series', factor: 'str | callable') -> pd.DataFrame:
+        result = Factory(data).evaluate(factor) if isinstance(factor, str) else factor(data)
+        if not Worker.ispanel(result):
+            raise FactoryError('FactorCache', 'factor should be computed into a panel')
+        return result.to_frame(name=result.name or 'factor') if Worker.isseries(result) else result
+
+    def get(
+        self,
+        data: 'pd.DataFrame | pd.Series',
+        factor: 'str | callable',
+        lookback: int = None,
+        name: str = None,
+    ) -> 'pd.DataFrame | pd.Series':
+        """Get the factor values of the data, computing only the uncached dates
+        ------------------------------------------------------------------------
+
+        data: DataFrame or Series, the input panel indexed by (datetime, asset)
+        factor: str or callable, a Factory expression, or a function computing
+            the factor panel from data
+        lookback: int, number of the previous dates needed to compute a date,
+            inferred for expressions, default None to compute the callables from 
+            scratch whenever the data changed
+        name: str, name of the factor in the result, default the expression or 
+            the name of the callable result
+        return: the factor panel indexed as the computed results
+        """
+        from .fetcher import PanelStore
+        if not Worker.ispanel(data):
+            raise FactoryError('FactorCache', 'Only panel data is supported')
+        if isinstance(factor, str) and lookback is None:
+            lookback = Factory(data).lookback(factor)
+        definition = self._definition(factor, lookback)
+        # the stores of a factor on different universes or date ranges are kept apart
+        key = f'{definition}\n{self._universe(data)}'
+        path = os.path.join(self.path, hashlib.sha1(key.encode()).hexdigest())
+        metafile = os.path.join(path, '_cache.json')
+        meta = None
+        if os.path.exists(metafile):
+            with open(metafile, 'r') as f:
+                meta = json.load(f)
+        
+        store = PanelStore(path, freq=self.freq)
+        dates = data.index.get_level_values(0)
+        last = None if meta is None else pd.Timestamp(meta['last'])
+        cached = fingerprint = None
+        if last is not None and meta['definition'] == definition:
+            fingerprint = self._fingerprint(data.loc[dates <= last])
+            # the store may hold the dates written before a failed meta update
+            cached = store.read(end=last) if fingerprint == meta['fingerprint'] else None
+        if cached is not None:
+            new_dates = dates[dates > last].unique().sort_values()
+            if new_dates.empty:
+                self.hits += 1
+                result = cached
+            elif lookback is not None:
+                self.partials += 1
+                # every row since the earliest date any asset needs, so the cross 
+                # sections computed inside the windows are complete
+                start = Factory(data).warmup(factor if isinstance(factor, str) else lookback, new_dates[0])
+                tail = self._compute(data.loc[dates >= start], factor)
+                tail = tail.loc[tail.index.get_level_values(0) > last]
+                tail.index.names = cached.index.names
+                tail.columns = cached.columns
+                store.write(tail.copy(), mode='append')
+                result = pd.concat([cached, tail])
+            else:
+                cached = None
+            if cached is not None:
+                self.bytes_saved += int(cached.memory_usage(deep=True).sum())
+        
+        if cached is None:
+            self.misses += 1
+            result = self._compute(data, factor)
+            store.write(result.copy(), mode='overwrite')
+        
+        if cached is None or not new_dates.empty:
+            fingerprint = self._fingerprint(data)
+        # the meta is replaced after the store is written, so it never runs ahead of the store
+        meta = dict(definition=definition, last=str(dates.max()), fingerprint=fingerprint)
+        handle, temp = tempfile.mkstemp(dir=path, prefix='_cache', suffix='.tmp')
+        try:
+            with os.fdopen(handle, 'w') as f:
+                json.dump(meta, f)
+            os.replace(temp, metafile)
+        except BaseException:
+            os.remove(temp)
+            raise
+        
+        if isinstance(factor, str):
+            result.columns = [name or factor]
+        elif name is not None and result.columns.size == 1:
+            result.columns = [name]
+        return result.iloc[:, 0] if result.columns.size == 1 else result
+
+    def report(self) -> None:
+        """Print the hits, partial hits, misses and bytes saved of the cache"""
+        table = Table(title='Factor Cache Report')
+        for col in ['hits', 'partial hits', 'misses', 'bytes saved']:
+            table.add_column(col, justify="center", no_wrap=True)
+        table.add_row(str(self.hits), str(self.partials), str(self.misses), 
+            f'{self.bytes_saved / 1024 ** 2:.2f} MB')
+        Console().print(table)
@@ -0,0 +1,145 @@
+import datetime
+import numpy as np
+from bearalpha import *
+
+
+class Factory(object):
+    """Factor factory
+    ==================
+
+    Factory compiles factor expressions like `cs_rank(ts_mean(close, 20) / delay(close, 5))`
+    into a DAG of operators on the date x asset matrices of the data fields.
+    The equal subexpressions of all the formulas are merged into one node,
+    and every node is computed only once. The intermediate results are 
+    released after their last consumer, and the requested factors are kept
+    in the factory for the later evaluations.
+
+    Operators working on the cross sections are prefixed with `cs_`,
+    those working along the existing rows of each asset with `ts_`, and the
+    time series windows containing NaN give NaN. `+ - * / **`, comparisons,
+    `abs`, `log`, `sign`, `sqrt`, `max`, `min` and `where` work elementwise.
+    More operators can be added into Factory.operators.
+
+    Examples:
+
+    >>> factory = Factory(data) # a panel dataframe with close, volume ...
+    >>> factory.evaluate({'momentum': 'cs_rank(ts_mean(close, 20) / delay(close, 5))',
+    >>>     'reversal': '-cs_rank(delta(close, 5))'})
+    """
+    operators: dict
+    data: 'DataFrame | Series'
+    cube: quool.base.PanelCube
+    hits: int
+    misses: int
+
+    def __init__(self, data: 'DataFrame | Series') -> None: ...
+
+    @property
+    def nodes(self) -> int:
+        """number of the computed nodes kept in the factory"""
+
+    def compile(self, expr: str) -> tuple:
+        """Parse an expression into the canonical key of its DAG node
+        ---------------------------------------------------------------
+
+        The key is a nested tuple, ('field', name), ('const', value) or
+        ('call', operator, *arguments), the operands of the commutative
+        operators are sorted, so the equal subexpressions share one key
+
+        expr: str, the factor expression
+        """
+
+    def lookback(self, expr: 'str | tuple') -> int:
+        """Number of the previous dates needed to compute an expression on a date
+        --------------------------------------------------------------------------
+
+        The windows of the time series operators on a path of the DAG add up,
+        e.g. ts_mean(delay(close, 5), 20) looks back 5 + 19 dates
+
+        expr: str or tuple, the factor expression or its compiled key
+        """
+
+    def warmup(self, expr: 'str | tuple | int', start: 'str | datetime.datetime') -> datetime.datetime:
+        """The earliest date of the data needed to compute an expression since start
+        -----------------------------------------------------------------------------
+
+        The windows are followed down the DAG by the existing rows of each asset,
+        and the cross sectional operators need every asset on the dates they
+        are computed, so all the rows since the returned date give the same
+        results on the dates since start as the full data
+
+        expr: str or tuple, the factor expression or its compiled key, or
+            int, the number of the previous rows each asset looks back
+        start: the first date to compute
+        """
+
+    def evaluate(
+        self,
+        exprs: 'str | list | dict',
+    ) -> 'DataFrame | Series':
+        """Evaluate the factor expressions on the data
+        -----------------------------------------------
+
+        exprs: str, list or dict, the expression(s), the keys of dict
+            are used as the factor names, otherwise the expressions are
+        return: Series for a single expression, DataFrame with factors in columns otherwise,
+            indexed as the data
+        """
+
+    def clear(self) -> None:
+        """Release the intermediate results kept in the factory"""
+
+
+class FactorCache(object):
+    """Persistent factor cache
+    ===========================
+
+    FactorCache keeps the computed factor values in a PanelStore per factor,
+    keyed by the factor definition, the assets and the first date of the 
+    input data, with the fingerprint of the input data
+    up to the last cached date. When the input panel only gained new dates,
+    only the new tail is computed, on all the rows since the earliest date
+    any asset needs to warm up its windows (`lookback` rows of each asset for
+    the callables, see Factory.warmup for the expressions), and appended to 
+    the store; when the cached part of the input changed, the factor is 
+    computed again from scratch.
+
+    Examples:
+
+    >>> cache = FactorCache('path/to/cache')
+    >>> cache.get(data, 'cs_rank(ts_mean(close, 20) / delay(close, 5))')
+    >>> cache.get(data, lambda x: x.calculator.rollstat(20, 'std'), lookback=19)
+    >>> cache.report()
+    """
+    path: str
+    freq: str
+    hits: int
+    partials: int
+    misses: int
+    bytes_saved: int
+
+    def __init__(self, path: str, freq: str = 'M') -> None: ...
+
+    def get(
+        self,
+        data: 'DataFrame | Series',
+        factor: 'str | callable',
+        lookback: int = None,
+        name: str = None,
+    ) -> 'DataFrame | Series':
+        """Get the factor values of the data, computing only the uncached dates
+        ------------------------------------------------------------------------
+
+        data: DataFrame or Series, the input panel indexed by (datetime, asset)
+        factor: str or callable, a Factory expression, or a function computing
+            the factor panel from data
+        lookback: int, number of the previous dates needed to compute a date,
+            inferred for expressions, default None to compute the callables from 
+            scratch whenever the data changed
+        name: str, name of the factor in the result, default the expression or 
+            the name of the callable result
+        return: the factor panel indexed as the computed results
+        """
+
+    def report(self) -> None:
+        """Print the hits, partial hits, misses and bytes saved of the cache"""
@@ -1,6 +1,9 @@
 import os
 import re
 import sys
+import json
+import shutil
+import tempfile
 import pandas as pd
 import sqlalchemy as sql
 from .base import *
@@ -75,6 +78,229 @@ class Filer(Worker):
         else:
             self.data.to_parquet(path, compression=compression, index=index, **kwargs)
 
+    def to_store(
+        self,
+        path: str,
+        freq: str = 'M',
+        mode: str = 'append',
+        compression: str = 'snappy',
+    ) -> 'PanelStore':
+        '''Save panel data into a date partitioned parquet store
+        ---------------------------------------------------------
+
+        path: path to the store directory
+        freq: str, the period of each partition, default 'M' for month
+        mode: str, 'append' merges data into the store, 'overwrite' clears the store first
+        compression: compression method
+        '''
+        store = PanelStore(path, freq=freq)
+        store.write(self.data, mode=mode, compression=compression)
+        return store
+
+
+class PanelStore(object):
+    """Date partitioned panel store
+    ==================================
+
+    PanelStore saves a panel as a parquet dataset partitioned by date
+    period, like `path/partition=20220101000000/20220104000000_20220128000000.parquet`,
+    the partitions are named by the start time of the periods, which sorts
+    as the periods for any frequency.
+    Appending only writes files for the new dates (a partition is rewritten
+    only when the new dates overlap with it), and reading pushes the date
+    range, asset list and columns selection down to the parquet files.
+
+    Examples:
+
+    >>> store = PanelStore('path/to/store', freq='M')
+    >>> store.write(data)
+    >>> store.read(start='2022-01-01', assets=['000001.SZ'], columns=['close'])
+    """
+
+    def __init__(self, path: str, freq: str = 'M'):
+        self.path = path
+        self.freq = freq
+        self.index_names = None
+        self.columns = None
+        meta = os.path.join(path, '_meta.json')
+        if os.path.exists(meta):
+            with open(meta, 'r') as f:
+                meta = json.load(f)
+            self.freq = meta['freq']
+            self.index_names = meta['index']
+            self.columns = meta['columns']
+            if meta.get('layout') != 'start':
+                self._migrate()
+
+    def _dump_meta(self):
+        meta = os.path.join(self.path, '_meta.json')
+        with open(meta + '.tmp', 'w') as f:
+            json.dump(dict(freq=self.freq, index=self.index_names, columns=self.columns, layout='start'), f)
+        os.replace(meta + '.tmp', meta)
+
+    def _partition(self, dates: 'pd.Series | pd.DatetimeIndex | datetime.datetime'):
+        """partition names of dates, the start time of their periods"""
+        if isinstance(dates, (pd.Series, pd.Index)):
+            return pd.PeriodIndex(dates, freq=self.freq).start_time.strftime('%Y%m%d%H%M%S')
+        return pd.Period(dates, freq=self.freq).start_time.strftime('%Y%m%d%H%M%S')
+
+    def _migrate(self):
+        """rename the partitions named by the period strings in the old stores"""
+        for name in os.listdir(self.path):
+            if not name.startswith('partition='):
+                continue
+            try:
+                partition = self._partition(pd.Period(name.split('=', 1)[1], freq=self.freq).start_time)
+            except ValueError:
+                continue
+            if name != f'partition={partition}':
+                os.replace(os.path.join(self.path, name), os.path.join(self.path, f'partition={partition}'))
+        self._dump_meta()
+
+    @staticmethod
+    def _span(file: str):
+        """the date span of a partition file from its name"""
+        start, end = os.path.splitext(os.path.basename(file))[0].split('_')[:2]
+        return pd.to_datetime(start, format='%Y%m%d%H%M%S'), pd.to_datetime(end, format='%Y%m%d%H%M%S')
+
+    @property
+    def partitions(self) -> list:
+        if not os.path.isdir(self.path):
+            return []
+        return sorted(d.split('=', 1)[1] for d in os.listdir(self.path) if d.startswith('partition='))
+
+    def _files(self, partition: str) -> list:
+        directory = os.path.join(self.path, f'partition={partition}')
+        if not os.path.isdir(directory):
+            return []
+        return sorted(os.path.join(directory, f) for f in os.listdir(directory) if f.endswith('.parquet'))
+
+    def _write_partition(self, partition: str, data: pd.DataFrame, compression: str = 'snappy'):
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+        directory = os.path.join(self.path, f'partition={partition}')
+        os.makedirs(directory, exist_ok=True)
+        dates = data[self.index_names[0]]
+        file = f"{dates.min().strftime('%Y%m%d%H%M%S')}_{dates.max().strftime('%Y%m%d%H%M%S')}.parquet"
+        file = os.path.join(directory, file)
+        # write aside and move into place, so readers never see a partial file
+        handle, temp = tempfile.mkstemp(dir=directory, prefix='.', suffix='.tmp')
+        os.close(handle)
+        try:
+            pq.write_table(pa.Table.from_pandas(data, preserve_index=False), temp, compression=compression)
+            os.replace(temp, file)
+        except BaseException:
+            os.remove(temp)
+            raise
+        return file
+
+    def write(
+        self,
+        data: 'pd.DataFrame | pd.Series',
+        mode: str = 'append',
+        compression: str = 'snappy',
+    ) -> None:
+        '''Write panel data into the store
+        -----------------------------------
+
+        data: DataFrame or Series, a panel indexed by (datetime, asset)
+        mode: str, 'append' merges data into the store, replacing the
+            duplicated (datetime, asset) rows, 'overwrite' clears the store first
+        compression: compression method
+        '''
+        if not Worker.ispanel(data):
+            raise FrameWorkError('PanelStore', 'Only panel data can be written into store')
+        data = data.to_frame() if Worker.isseries(data) else data.copy()
+
+        if mode == 'overwrite' and os.path.isdir(self.path):
+            shutil.rmtree(self.path)
+            self.index_names = self.columns = None
+        elif mode != 'append' and mode != 'overwrite':
+            raise ValueError('mode must be in one of append or overwrite')
+
+        if self.index_names is None:
+            self.index_names = [name or default for name, default in 
+                zip(data.index.names, ['datetime', 'asset'] + [f'level_{i}' for i in range(2, data.index.nlevels)])]
+            self.columns = [str(col) for col in data.columns]
+        if [str(col) for col in data.columns] != self.columns:
+            raise FrameWorkError('PanelStore', f'Columns should be the same as the store: {self.columns}')
+        data.index.names = self.index_names
+        data.columns = self.columns
+
+        os.makedirs(self.path, exist_ok=True)
+        data = data.sort_index().reset_index()
+        partitions = self._partition(data[self.index_names[0]])
+        for partition, chunk in data.groupby(partitions.values, sort=True):
+            files = self._files(partition)
+            if files and chunk[self.index_names[0]].min() <= max(self._span(f)[1] for f in files):
+                # overlapped dates, merge the partition and rewrite it
+                stored = pd.read_parquet(files, columns=self.index_names + self.columns)
+                chunk = pd.concat([stored, chunk]).drop_duplicates(
+                    subset=self.index_names, keep='last').sort_values(self.index_names)
+            else:
+                files = []
+            # the merged file is in place before the old ones are removed
+            merged = self._write_partition(partition, chunk, compression)
+            for f in files:
+                if f != merged:
+                    os.remove(f)
+        self._dump_meta()
+
+    def read(
+        self,
+        start: 'str | datetime.datetime' = None,
+        end: 'str | datetime.datetime' = None,
+        assets: 'str | list' = None,
+        columns: 'str | list' = None,
+    ) -> pd.DataFrame:
+        '''Read panel data from the store
+        ----------------------------------
+
+        start: str or datetime, the start date, default the earliest one
+        end: str or datetime, the end date, default the latest one
+        assets: str or list, assets to read, default all assets
+        columns: str or list, columns to read, default all columns
+        '''
+        import pyarrow as pa
+        import pyarrow.dataset as ds
+
+        if self.index_names is None:
+            raise FrameWorkError('PanelStore', f'No store found in {self.path}')
+        date, asset = self.index_names[:2]
+        dataset = ds.dataset(self.path, format='parquet', partitioning=ds.partitioning(
+            pa.schema([('partition', pa.string())]), flavor='hive'))
+        datetype = dataset.schema.field(date).type
+
+        condition = None
+        conditions = []
+        if start is not None:
+            start = str2time(start)
+            conditions.append(ds.field('partition') >= self._partition(start))
+            conditions.append(ds.field(date) >= pa.scalar(start, type=datetype))
+        if end is not None:
+            end = str2time(end)
+            conditions.append(ds.field('partition') <= self._partition(end))
+            conditions.append(ds.field(date) <= pa.scalar(end, type=datetype))
+        if assets is not None:
+            conditions.append(ds.field(asset).isin(item2list(assets)))
+        for cond in conditions:
+            condition = cond if condition is None else condition & cond
+
+        columns = self.columns if columns is None else [str(col) for col in item2list(columns)]
+        table = dataset.to_table(columns=self.index_names + columns, filter=condition)
+        return table.to_pandas().set_index(self.index_names).sort_index()
+
+    def compact(self, compression: str = 'snappy') -> None:
+        '''Merge the appended files in each partition into one file'''
+        for partition in self.partitions:
+            files = self._files(partition)
+            if len(files) > 1:
+                data = pd.read_parquet(files, columns=self.index_names + self.columns).sort_values(self.index_names)
+                merged = self._write_partition(partition, data, compression)
+                for f in files:
+                    if f != merged:
+                        os.remove(f)
+
 
 class Databaser(Worker):
 
@@ -1,3 +1,4 @@
+import datetime
 import sqlalchemy as sql
 from bearalpha import *
 
@@ -65,6 +66,73 @@ class Filer(quool.base.Worker):
         index: whether to write index to the parquet file
         '''
 
+    def to_store(
+        self,
+        path: str,
+        freq: str = 'M',
+        mode: str = 'append',
+        compression: str = 'snappy',
+    ) -> 'PanelStore':
+        '''Save panel data into a date partitioned parquet store
+        ---------------------------------------------------------
+
+        path: path to the store directory
+        freq: str, the period of each partition, default 'M' for month
+        mode: str, 'append' merges data into the store, 'overwrite' clears the store first
+        compression: compression method
+        '''
+
+
+class PanelStore(object):
+    """Date partitioned panel store
+    ==================================
+
+    PanelStore saves a panel as a parquet dataset partitioned by date
+    period, like `path/partition=2022-01/20220104000000_20220128000000.parquet`.
+    Appending only writes files for the new dates (a partition is rewritten
+    only when the new dates overlap with it), and reading pushes the date
+    range, asset list and columns selection down to the parquet files.
+    """
+    path: str
+    freq: str
+    index_names: list
+    columns: list
+
+    def __init__(self, path: str, freq: str = 'M') -> None: ...
+    @property
+    def partitions(self) -> list: ...
+    def write(
+        self,
+        data: 'DataFrame | Series',
+        mode: str = 'append',
+        compression: str = 'snappy',
+    ) -> None:
+        '''Write panel data into the store
+        -----------------------------------
+
+        data: DataFrame or Series, a panel indexed by (datetime, asset)
+        mode: str, 'append' merges data into the store, replacing the
+            duplicated (datetime, asset) rows, 'overwrite' clears the store first
+        compression: compression method
+        '''
+    def read(
+        self,
+        start: 'str | datetime.datetime' = None,
+        end: 'str | datetime.datetime' = None,
+        assets: 'str | list' = None,
+        columns: 'str | list' = None,
+    ) -> DataFrame:
+        '''Read panel data from the store
+        ----------------------------------
+
+        start: str or datetime, the start date, default the earliest one
+        end: str or datetime, the end date, default the latest one
+        assets: str or list, assets to read, default all assets
+        columns: str or list, columns to read, default all columns
+        '''
+    def compact(self, compression: str = 'snappy') -> None:
+        '''Merge the appended files in each partition into one file'''
+
 
 class Databaser(quool.base.Worker):
     ...
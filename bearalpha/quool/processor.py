@@ -1,4 +1,9 @@
-from inspect import isframe
+import os
+import pickle
+import hashlib
+import tempfile
+import warnings
+import collections
 import numpy as np
 import pandas as pd
 from .base import *
@@ -8,6 +13,9 @@ from ..tools import *
 class ProcessorError(FrameWorkError):
     pass
 
+_TDBUCKETS_CACHE_SIZE = 32
+_tdbuckets_cache = collections.OrderedDict()
+
 @pd.api.extensions.register_dataframe_accessor("converter")
 @pd.api.extensions.register_series_accessor("converter")
 class Converter(Worker):
@@ -25,13 +33,23 @@ class Converter(Worker):
         
         period: str or int or DateOffset, if in str and DateOffset format,
             return will be in like resample format, otherwise, you can get rolling
-            return formatted data
+            return formatted data, pass a list to get one column per period
         open_col: str, if you pass a dataframe, you need to assign which column
             represents open price
         colse_col: str, the same as open_col, but to assign close price
         method: str, choose between 'algret' and 'logret'
         lag: int, define how many day as lagged after the day of calculation forward return
         """
+        if (self.type_ == Worker.PNFR or self.type_ == Worker.PNSR) \
+            and all(isinstance(p, int) for p in item2list(period)) \
+            and self.data.index.nlevels == 2 and self.data.index.levels[0].is_monotonic_increasing \
+            and (np.diff(self.data.index.codes[0]) >= 0).all():
+            return self._panel_price2ret(period, open_col, close_col, method, lag)
+
+        if isinstance(period, list):
+            return pd.concat([self.price2ret(p, open_col, close_col, method, lag) 
+                for p in period], axis=1, keys=period)
+
         if self.type_ == Worker.PNFR:
             # https://pandas.pydata.org/docs/reference/api/pandas.Grouper.html
             # https://stackoverflow.com/questions/15799162/
@@ -140,24 +158,143 @@ class Converter(Worker):
         elif method == 'logret':
             return np.log(close_price / open_price)
         
+    def _panel_price2ret(
+        self,
+        period: 'int | list',
+        open_col: str = 'close',
+        close_col: str = 'close',
+        method: str = 'algret',
+        lag: int = 1,
+    ):
+        """integer period price2ret on a date sorted panel, shifting the wide matrix
+        once instead of grouping by asset, the same as the groupby shift results.
+        A list of periods is computed on one compacted (log) price matrix"""
+        if self.type_ == Worker.PNSR:
+            cube = self._to_cube()
+            open_price = close_price = cube.values[:, :, 0]
+            name = self.data.name
+        else:
+            if self.data.dtypes.map(pd.api.types.is_numeric_dtype).all():
+                cube = self._to_cube()
+            else:
+                cube = PanelCube.from_data(self.data.loc[:, list(dict.fromkeys([open_col, close_col]))])
+            open_price = cube.values[:, :, cube.fields.get_loc(open_col)]
+            close_price = cube.values[:, :, cube.fields.get_loc(close_col)]
+            name = close_col if open_col == close_col else None
+
+        with np.errstate(invalid='ignore', divide='ignore'):
+            open_price = cube.compact(open_price)
+            close_price = open_price if open_col == close_col else cube.compact(close_price)
+            if method == 'logret':
+                open_price = np.log(open_price)
+                close_price = open_price if open_col == close_col else np.log(close_price)
+
+            rets = []
+            for p in item2list(period):
+                if p > 0:
+                    close_shift, open_shift = close_price, cube._shift(open_price, p)
+                else:
+                    close_shift, open_shift = cube._shift(close_price, p - lag), cube._shift(open_price, -lag)
+                if method == 'algret':
+                    rets.append((close_shift - open_shift) / open_shift)
+                elif method == 'logret':
+                    rets.append(close_shift - open_shift)
+        
+        if isinstance(period, list):
+            return cube.to_long(np.stack(rets, axis=-1), columns=period, compacted=True)
+        return cube.to_long(rets[0], name=name, compacted=True)
+
     def cum2diff(
         self,
         grouper = None, 
         period: int = 1, 
         axis: int = 0, 
-        keep: bool = True
+        keep: bool = True,
+        ytd: bool = False,
     ):
+        """Convert the cumulative data to the data of each period
+        ----------------------------------------------------------
+
+        grouper: the grouper within which the data is cumulated, like the year
+        period: int, the difference period, in quarters with ytd
+        axis: int, the axis to diff along, only available without grouper
+        keep: bool, whether to keep the first period data in each group
+        ytd: bool, whether the data are year to date financial statements, then 
+            the data in each report period is diffed with the previous `period` 
+            quarter of the same asset in the same year, and the missing 
+            previous quarters lead to NaN
+        """
         def _diff(data):
             diff = data.diff(period, axis=axis)
             if keep:
                 diff.iloc[:period] = data.iloc[:period]
             return diff
         
-        if grouper is None:
-            diff = _diff(self.data)
+        if grouper is not None and ytd:
+            raise ProcessorError('cum2diff', 'grouper is not available for year to date data')
+        
+        if grouper is None and not ytd:
+            return _diff(self.data)
+        
+        if self.data.index.nlevels < 2:
+            raise ProcessorError('cum2diff', 'Grouped cum2diff only available for panel data')
+        
+        values = self.data.to_numpy(dtype='float64').reshape(self.data.shape[0], -1)
+        asset = self.data.index.codes[1].astype('int64')
+        if ytd:
+            diff = self._ytd2diff(values, asset, period, keep)
         else:
-            diff = self.data.groupby(grouper).apply(lambda x: x.groupby(level=1).apply(_diff))
-            
+            group = self.data.groupby(grouper, sort=False).ngroup().fillna(-1).to_numpy().astype('int64')
+            diff = self._run2diff(values, group, asset, period, keep)
+        
+        if self.isseries(self.data):
+            return pd.Series(diff[:, 0], index=self.data.index, name=self.data.name)
+        return pd.DataFrame(diff, index=self.data.index, columns=self.data.columns)
+    
+    @staticmethod
+    def _run2diff(values: np.ndarray, group: np.ndarray, asset: np.ndarray, period: int, keep: bool):
+        """diff the rows of each (group, asset) pair in their original order,
+        the same as the nested groupby diff without calling on each group"""
+        order = np.lexsort((np.arange(values.shape[0]), asset, group))
+        sorted_values = values[order]
+        sorted_key = np.stack([group[order], asset[order]], axis=1)
+        diff = np.full_like(sorted_values, np.nan)
+        if 0 < period < values.shape[0]:
+            # only diff with the row in the same (group, asset) pair
+            same = (sorted_key[period:] == sorted_key[:-period]).all(axis=1)
+            diff[period:][same] = sorted_values[period:][same] - sorted_values[:-period][same]
+            first = np.ones(values.shape[0], dtype='bool')
+            first[period:] = ~same
+        else:
+            first = np.ones(values.shape[0], dtype='bool')
+        if keep:
+            diff[first] = sorted_values[first]
+        # the rows without a group are dropped by groupby
+        diff[sorted_key[:, 0] < 0] = np.nan
+
+        result = np.empty_like(diff)
+        result[order] = diff
+        return result
+    
+    def _ytd2diff(self, values: np.ndarray, asset: np.ndarray, period: int, keep: bool):
+        """year to date data to single quarter data, each report period is
+        diffed with the previous `period` quarter of the same asset in the same year"""
+        dates = pd.DatetimeIndex(self.data.index.get_level_values(0))
+        quarter = (dates.year.to_numpy().astype('int64') * 4 + (dates.month.to_numpy() - 1) // 3)
+        # quarter ordinals are below 4 * 10000 till year 9999
+        key = pd.Index(asset * 4 * 10000 + quarter)
+        if not key.is_unique:
+            raise ProcessorError('cum2diff', 'Duplicated report period found for the same asset')
+        
+        # the first quarters of a year have nothing to diff with
+        isfirst = quarter % 4 < period
+        previous = key.get_indexer(key - period)
+        previous[isfirst] = -1
+        diff = np.full_like(values, np.nan)
+        found = previous >= 0
+        diff[found] = values[found] - values[previous[found]]
+        if keep:
+            diff[isfirst] = values[isfirst]
         return diff
 
     def dummy2category(
@@ -194,18 +331,124 @@ class Converter(Worker):
         elif self.type_ == Worker.PNFR or self.type_ == Worker.PNSR:
             return self.data.groupby([pd.Grouper(level=0, freq=rule, **kwargs), pd.Grouper(level=1)])
 
-    def spdatetime(self, level: int = 0, axis: int = 0):
+    def _barhow(self, how: 'str | dict' = None):
+        """the aggregations for bars, 'first' for open, 'max' for high, 'min' for low,
+        'sum' for volume and amount, 'last' for the others"""
+        if how is not None:
+            return how
+        defaults = {'open': 'first', 'high': 'max', 'low': 'min', 'volume': 'sum', 'amount': 'sum'}
+        return 'last' if self.isseries(self.data) else \
+            {col: defaults.get(col, 'last') for col in self.data.columns}
+
+    @staticmethod
+    def _tdbuckets(calendar: pd.DatetimeIndex, rule: 'str | int', label: str = 'right'):
+        """bucket ids of each trading day in calendar and the label of each bucket,
+        cached by the calendar and the rule, so they are only computed once"""
+        key = (rule, label, calendar.size, hashlib.md5(calendar.asi8.tobytes()).hexdigest())
+        if key in _tdbuckets_cache:
+            _tdbuckets_cache.move_to_end(key)
+            return _tdbuckets_cache[key]
+        
+        if isinstance(rule, int):
+            buckets = np.arange(calendar.size) // rule
+        else:
+            buckets, _ = pd.factorize(calendar.to_period(rule))
+        # the first trading day of each bucket starts a new bucket
+        starts = np.flatnonzero(np.r_[True, buckets[1:] != buckets[:-1]])
+        buckets = np.cumsum(np.r_[True, buckets[1:] != buckets[:-1]]) - 1
+        ends = np.r_[starts[1:] - 1, calendar.size - 1]
+        labels = calendar[ends] if label == 'right' else calendar[starts]
+        _tdbuckets_cache[key] = (buckets, labels)
+        while len(_tdbuckets_cache) > _TDBUCKETS_CACHE_SIZE:
+            _tdbuckets_cache.popitem(last=False)
+        return buckets, labels
+
+    def tdresample(
+        self, 
+        rule: 'str | int', 
+        how: 'str | dict' = None, 
+        calendar: 'pd.DatetimeIndex | pd.offsets.CustomBusinessDay' = None,
+        label: str = 'right',
+    ):
+        """Resample by the trading calendar
+        -------------------------------------
+
+        The trading days are put into buckets once (cached by calendar and rule),
+        and the data is aggregated by the bucket ids and assets in one pass
+
+        rule: str or int, period alias like 'W', 'M', 'Q', 'Y' for the trading days
+            in the same natural period, or int for every n trading days
+        how: str or dict, the aggregation, default 'first' for open, 'max' for high,
+            'min' for low, 'sum' for volume and amount, 'last' for the others
+        calendar: DatetimeIndex or CustomBusinessDay (like oxygene.ctd()), the
+            trading calendar, default the dates in data
+        label: str, 'right' to label each bucket by its last trading day, 'left' by the first
+        """
+        if not (self.type_ == Worker.TSSR or self.type_ == Worker.TSFR 
+            or self.type_ == Worker.PNFR or self.type_ == Worker.PNSR):
+            raise ProcessorError('tdresample', 'Only time series or panel data can be resampled')
+        
+        ispanel = self.type_ == Worker.PNFR or self.type_ == Worker.PNSR
+        index = self.data.index.levels[0] if ispanel else self.data.index
+        if calendar is None:
+            calendar = index.unique().sort_values()
+        elif isinstance(calendar, pd.offsets.BaseOffset):
+            calendar = pd.date_range(index.min(), index.max(), freq=calendar)
+        calendar = pd.DatetimeIndex(calendar).unique().sort_values()
+        buckets, labels = self._tdbuckets(calendar, rule, label)
+
+        position = calendar.get_indexer(index)
+        if (position < 0).any():
+            raise ProcessorError('tdresample', f'{index[position < 0][0]} is not in the trading calendar')
+        
+        how = self._barhow(how)
+        if ispanel:
+            # one integer key for each (bucket, asset) pair, cheaper to group than two keys
+            nassets = self.data.index.levels[1].size
+            key = buckets[position][self.data.index.codes[0]].astype('int64') * nassets \
+                + self.data.index.codes[1]
+        else:
+            key = buckets[position]
+        result = self.data.groupby(key, sort=True).agg(how)
+        
+        if ispanel:
+            key = result.index.to_numpy()
+            result.index = pd.MultiIndex(
+                levels=[labels, self.data.index.levels[1]], 
+                codes=[key // nassets, key % nassets],
+                names=self.data.index.names,
+            ).remove_unused_levels()
+        else:
+            result.index = labels[result.index.to_numpy()].rename(self.data.index.name)
+        return result
+
+    def spdatetime(self, level: int = 0, axis: int = 0, coded: bool = False):
         """Split data with datetime into date and time formatted index
         ------------------------------------------------------------
 
         level: int, the level the datetime index exists, only available when not matching standard data types
         axis: int, the axis the datetime index exists, only available when not matching standard data types
+        coded: bool, for time series and panel, split into a datetime64 date level and an int16
+            minute of day level instead of python date and time objects, which is much
+            more compact for minute bars
         """
         data = self.data.copy()
 
         if self.type_ == Worker.CSSR or self.type_ == Worker.CSFR:
             raise ProcessorError('spdatetime', 'Cross section data cannot be splited by datetime')
         
+        if coded and (self.type_ == Worker.TSSR or self.type_ == Worker.TSFR
+            or self.type_ == Worker.PNFR or self.type_ == Worker.PNSR):
+            days, day_codes, minutes, minute_codes, _, _ = self._intraday_codes()
+            levels = [days.rename('date'), minutes.rename('minute')]
+            codes = [day_codes, minute_codes]
+            if self.type_ == Worker.PNFR or self.type_ == Worker.PNSR:
+                levels.append(data.index.levels[1])
+                codes.append(data.index.codes[1])
+            data.index = pd.MultiIndex(levels=levels, codes=codes, 
+                names=[level.name for level in levels], verify_integrity=False)
+            return data
+
         elif self.type_ == Worker.TSSR or self.type_ == Worker.TSFR:
             data.index = pd.MultiIndex.from_arrays([data.index.get_level_values(0).date, 
                 data.index.get_level_values(0).time], names=['date', 'time'])
@@ -228,14 +471,163 @@ class Converter(Worker):
         
         return data
             
-    def panelize(self):
+    def _intraday_codes(self):
+        """trading days, minutes of day and assets of minute bar data, with the
+        codes of each row, computed on the unique datetimes only. The minutes
+        are sorted, so a minute code is the bar position in the session"""
+        index = self.data.index
+        if index.nlevels == 3 and isinstance(index.levels[0], pd.DatetimeIndex) \
+            and pd.api.types.is_integer_dtype(index.levels[1].dtype):
+            # already coded by spdatetime
+            return (index.levels[0], index.codes[0], index.levels[1], index.codes[1], 
+                index.levels[2], index.codes[2])
+        
+        datetimes = index.levels[0] if index.nlevels > 1 else index
+        if not isinstance(datetimes, pd.DatetimeIndex):
+            raise ProcessorError('intraday', 'Intraday data should be indexed by datetime')
+        codes = index.codes[0] if index.nlevels > 1 else np.arange(index.size)
+        if index.nlevels == 1 and not index.is_unique:
+            raise ProcessorError('intraday', 'Duplicated datetime found in time series')
+        
+        normalized = datetimes.normalize()
+        minute = ((datetimes - normalized) // pd.Timedelta(minutes=1)).to_numpy().astype('int16')
+        day_map, days = pd.factorize(normalized, sort=True)
+        minute_map, minutes = pd.factorize(minute, sort=True)
+        assets, asset_codes = (index.levels[1], index.codes[1]) if index.nlevels > 1 \
+            else (pd.Index([0]), np.zeros(index.size, dtype='int8'))
+        return (pd.DatetimeIndex(days), day_map[codes], pd.Index(minutes, dtype='int16'), 
+            minute_map[codes], assets, asset_codes)
+
+    def minute2bar(self, n: int = None, how: 'str | dict' = None):
+        """Aggregate minute bars into n minute bars or daily bars
+        -----------------------------------------------------------
+
+        The buckets are counted by bar position in each session, so the lunch
+        break doesn't make an incomplete bar, and are aggregated in one pass
+
+        n: int, number of minute bars in a bar, default None for daily bars
+        how: str or dict, the aggregation, default 'first' for open, 'max' for high,
+            'min' for low, 'sum' for volume and amount, 'last' for the others
+        return: data indexed by (date, asset) for daily bars, otherwise by 
+            (datetime, asset) labeled by the last minute in each bar
+        """
+        if not (self.type_ == Worker.TSSR or self.type_ == Worker.TSFR 
+            or self.type_ == Worker.PNFR or self.type_ == Worker.PNSR or self.data.index.nlevels == 3):
+            raise ProcessorError('minute2bar', 'Only minute bar time series or panel can be aggregated')
+        
+        days, day_codes, minutes, minute_codes, assets, asset_codes = self._intraday_codes()
+        nbars = 1 if n is None else -(-minutes.size // n)
+        bucket = day_codes.astype('int64') * nbars
+        if n is not None:
+            bucket += minute_codes // n
+        key = bucket * assets.size + asset_codes
+        result = self.data.groupby(key, sort=True).agg(self._barhow(how))
+        
+        key = result.index.to_numpy()
+        bucket, asset_codes = key // assets.size, key % assets.size
+        if n is None:
+            dates = days[bucket].rename('date')
+        else:
+            last = np.minimum((bucket % nbars + 1) * n - 1, minutes.size - 1)
+            dates = (days[bucket // nbars] + pd.to_timedelta(minutes[last].astype('int64'), unit='min'))\
+                .rename('datetime')
+        if self.type_ == Worker.TSSR or self.type_ == Worker.TSFR:
+            result.index = dates
+        else:
+            result.index = pd.MultiIndex.from_arrays([dates, assets[asset_codes]],
+                names=[dates.name, self.data.index.names[-1]])
+        return result
+
+    def minute2ret(
+        self,
+        period: int = 1,
+        open_col: str = 'close',
+        close_col: str = 'close',
+        method: str = 'algret',
+        lag: int = 1,
+        session: str = 'within',
+    ):
+        """Convert minute bar price to return
+        ---------------------------------------
+
+        The same as price2ret with integer period, but the bars are shifted
+        by their position within the session or across sessions
+
+        period: int, number of bars, negative for the forward return
+        open_col: str, the column represents open price for dataframe
+        close_col: str, the column represents close price for dataframe
+        method: str, choose between 'algret' and 'logret'
+        lag: int, number of bars lagged for the forward return
+        session: str, 'within' to leave the bars that need another session NaN,
+            'across' to shift through the overnight gap
+        """
+        days, day_codes, minutes, minute_codes, assets, asset_codes = self._intraday_codes()
+        if self.isseries(self.data):
+            open_price = close_price = self.data.to_numpy(dtype='float64')
+            name = self.data.name
+        else:
+            open_price = self.data[open_col].to_numpy(dtype='float64')
+            close_price = self.data[close_col].to_numpy(dtype='float64')
+            name = close_col if open_col == close_col else None
+        
+        order = np.lexsort((minute_codes, day_codes, asset_codes))
+        run = asset_codes[order].astype('int64')
+        if session == 'within':
+            run = run * days.size + day_codes[order]
+        
+        def _shift(values, periods):
+            # shift the sorted values, only within the same run
+            sorted_values = values[order]
+            shifted = np.full(values.shape, np.nan)
+            if periods == 0:
+                shifted[:] = sorted_values
+            elif abs(periods) < values.size:
+                if periods > 0:
+                    same = run[periods:] == run[:-periods]
+                    shifted[periods:][same] = sorted_values[:-periods][same]
+                else:
+                    same = run[:periods] == run[-periods:]
+                    shifted[:periods][same] = sorted_values[-periods:][same]
+            return shifted
+        
+        if period > 0:
+            close_shift, open_shift = close_price[order], _shift(open_price, period)
+        else:
+            close_shift, open_shift = _shift(close_price, period - lag), _shift(open_price, -lag)
+        with np.errstate(invalid='ignore', divide='ignore'):
+            if method == 'algret':
+                ret = (close_shift - open_shift) / open_shift
+            elif method == 'logret':
+                ret = np.log(close_shift / open_shift)
+            else:
+                raise ProcessorError('minute2ret', 'method should be algret or logret')
+        
+        result = np.empty_like(ret)
+        result[order] = ret
+        return pd.Series(result, index=self.data.index, name=name)
+
+    def panelize(self, ragged: bool = False):
         """Panelize a dataframe
         ------------------------
         
         Specifically used for imbalanced panel data, this
         function will help you deal with that
+
+        ragged: bool, return a RaggedPanel which keeps only the existing
+            rows instead of the cartesian product, densify it by to_product
         """
         data = self.data.copy()
+        dtypes = data.dtypes if self.isframe(data) else pd.Series([data.dtype])
+        if ragged:
+            if not (self.type_ == Worker.PNFR or self.type_ == Worker.PNSR) or data.index.nlevels != 2:
+                raise ProcessorError('panelize', 'Only panel data with (datetime, asset) index can be ragged')
+            return self._to_ragged()
+
+        if (self.type_ == Worker.PNFR or self.type_ == Worker.PNSR) and data.index.nlevels == 2 \
+            and dtypes.map(pd.api.types.is_numeric_dtype).all():
+            # dense cube is already the cartesian product of dates and assets
+            return self._to_cube().to_product()
+
         if (
             self.type_ == Worker.PNFR or self.type_ == Worker.PNSR or
             self.type_ == Worker.MIFR or self.type_ == Worker.MISR
@@ -268,100 +660,235 @@ class Converter(Worker):
                 )
         return data
     
-    def shrink(self, retframe: bool = False, allow_halffloat: bool = True):
+    @staticmethod
+    def _shrink_column(data: pd.Series, rtol: float, allow_halffloat: bool):
+        """pick the smallest dtype for a column, floats are checked against
+        the relative error after casting, others are lossless"""
+        dtype = data.dtype
+        if pd.api.types.is_bool_dtype(dtype):
+            return dtype
+        
+        if pd.api.types.is_integer_dtype(dtype) and isinstance(dtype, np.dtype):
+            if data.empty:
+                return dtype
+            c_min, c_max = data.min(), data.max()
+            candidates = [np.uint8, np.uint16, np.uint32, np.uint64] if dtype.kind == 'u' \
+                else [np.int8, np.int16, np.int32, np.int64]
+            for candidate in candidates:
+                if np.iinfo(candidate).min <= c_min and c_max <= np.iinfo(candidate).max:
+                    return np.dtype(candidate)
+            return dtype
+        
+        if pd.api.types.is_float_dtype(dtype) and isinstance(dtype, np.dtype):
+            values = data.to_numpy(dtype='float64')
+            finite = np.isfinite(values)
+            nonzero = finite & (values != 0)
+            candidates = ([np.float16] if allow_halffloat else []) + [np.float32]
+            for candidate in candidates:
+                if np.dtype(candidate).itemsize >= dtype.itemsize:
+                    break
+                with np.errstate(over='ignore', invalid='ignore'):
+                    casted = values.astype(candidate).astype('float64')
+                # overflow and underflow are never allowed, the relative error is checked on the rest
+                if not np.isfinite(casted[finite]).all() or (casted[nonzero] == 0).any():
+                    continue
+                if not nonzero.any() or np.max(np.abs(casted[nonzero] - values[nonzero])
+                    / np.abs(values[nonzero])) <= rtol:
+                    return np.dtype(candidate)
+            return dtype
+        
+        if pd.api.types.is_object_dtype(dtype) or pd.api.types.is_string_dtype(dtype):
+            # category only pays off when values repeat
+            if data.nunique(dropna=True) < 0.5 * data.size:
+                return pd.CategoricalDtype()
+        return dtype
+
+    def shrink(
+        self, 
+        retframe: bool = False, 
+        allow_halffloat: bool = True,
+        rtol: float = 1e-6,
+        index: bool = False,
+    ):
         """Reduce the memory usage for a dataframe
         -----------------------------------------
 
         iterate through all the columns of a dataframe and modify the data type
-        to reduce memory usage.
+        to reduce memory usage. Float columns are only casted when the maximum
+        relative error is under rtol, integer and object columns are casted
+        losslessly. Date index levels become int32 day ordinals and string
+        index levels become int32 category codes. The data is modified in place.
+
+        retframe: bool, return the shrinked data instead of the schema
+        allow_halffloat: bool, whether float16 can be chosen
+        rtol: float, the maximum relative error allowed for float columns
+        index: bool, whether to shrink the index levels
+        return: the schema for Converter.unshrink to restore the data, or the data if retframe
         """
-        start_mem = self.data.memory_usage().sum()
-        Console().print(f'[yellow][=][/yellow] Memory usage of dataframe is {start_mem:.2f} MB')
-        for col in self.data.columns:
-            col_type = self.data[col].dtype
-            if col_type != object:
-                c_min = self.data[col].min()
-                c_max = self.data[col].max()
-                if str(col_type).startswith('int'):
-                    if c_min > np.iinfo(np.int8).min and c_max < np.iinfo(np.int8).max:
-                        self.data[col] = self.data[col].astype(np.int8)
-                    elif c_min > np.iinfo(np.int16).min and c_max < np.iinfo(np.int16).max:
-                        self.data[col] = self.data[col].astype(np.int16)
-                    elif c_min > np.iinfo(np.int32).min and c_max < np.iinfo(np.int32).max:
-                        self.data[col] = self.data[col].astype(np.int32)
-                    elif c_min > np.iinfo(np.int64).min and c_max < np.iinfo(np.int64).max:
-                        self.data[col] = self.data[col].astype(np.int64)
-                elif str(col_type).startswith('uint'):
-                    if c_min > np.iinfo(np.uint8).min and c_max < np.iinfo(np.uint8).max:
-                        self.data[col] = self.data[col].astype(np.uint8)
-                    elif c_min > np.iinfo(np.uint16).min and c_max < np.iinfo(np.uint16).max:
-                        self.data[col] = self.data[col].astype(np.uint16)
-                    elif c_min > np.iinfo(np.uint32).min and c_max < np.iinfo(np.uint32).max:
-                        self.data[col] = self.data[col].astype(np.uint32)
-                    elif c_min > np.iinfo(np.uint64).min and c_max < np.iinfo(np.uint64).max:
-                        self.data[col] = self.data[col].astype(np.uint64)
-                else:
-                    if allow_halffloat and c_min > np.finfo(np.float16).min and c_max < np.finfo(np.float16).max:
-                        self.data[col] = self.data[col].astype(np.float16)
-                    elif c_min > np.finfo(np.float32).min and c_max < np.finfo(np.float32).max:
-                        self.data[col] = self.data[col].astype(np.float32)
+        # one column frames are squeezed in self.data, shrink the frame itself
+        data = self._origin
+        if self.isseries(data):
+            raise ProcessorError('shrink', 'Series cannot be shrinked in place, use to_frame first')
+        
+        schema = {'columns': {}, 'index': {}}
+        report = []
+        start_mem = data.memory_usage(deep=True).sum()
+        Console().print(f'[yellow][=][/yellow] Memory usage of dataframe is {start_mem / 1024 ** 2:.2f} MB')
+        
+        for col in data.columns:
+            col_type = data[col].dtype
+            before = data[col].memory_usage(index=False, deep=True)
+            target = self._shrink_column(data[col], rtol, allow_halffloat)
+            if target != col_type:
+                data[col] = data[col].astype(target)
+                schema['columns'][col] = col_type
+            report.append([str(col), str(col_type), str(data[col].dtype), 
+                before, data[col].memory_usage(index=False, deep=True)])
+        
+        if index:
+            before = data.index.memory_usage(deep=True)
+            ismulti = isinstance(data.index, pd.MultiIndex)
+            levels = list(data.index.levels) if ismulti else [data.index]
+            codes = list(data.index.codes) if ismulti else [None]
+            for i, level in enumerate(levels):
+                if isinstance(level, pd.DatetimeIndex) and level.tz is None and (level == level.normalize()).all():
+                    kind = 'date'
+                    ordinals = level.values.astype('datetime64[D]').astype('int64')
+                    if ordinals.size and (ordinals.min() < np.iinfo(np.int32).min 
+                        or ordinals.max() > np.iinfo(np.int32).max):
+                        continue
+                    levels[i] = pd.Index(ordinals.astype('int32'), name=level.name)
+                    categories = None
+                elif pd.api.types.is_object_dtype(level.dtype) or pd.api.types.is_string_dtype(level.dtype):
+                    kind = 'category'
+                    if ismulti:
+                        categories = level
+                        levels[i] = pd.Index(np.arange(level.size, dtype='int32'), name=level.name)
                     else:
-                        self.data[col] = self.data[col].astype(np.float64)
+                        level_codes, categories = pd.factorize(level)
+                        levels[i] = pd.Index(level_codes.astype('int32'), name=level.name)
+                else:
+                    continue
+                schema['index'][i] = {'kind': kind, 'dtype': level.dtype, 'categories': categories}
+            
+            if ismulti:
+                data.index = pd.MultiIndex(levels=levels, codes=codes, 
+                    names=data.index.names, verify_integrity=False)
             else:
-                self.data[col] = self.data[col].astype('category')
-        end_mem = self.data.memory_usage().sum()
-        Console().print(f'[green][=][/green] Memory usage after optimization is {end_mem:.2f} MB')
+                data.index = levels[0]
+            report.append(['(index)', '', '', before, data.index.memory_usage(deep=True)])
+
+        table = Table(title='Shrink Report')
+        for col in ['column', 'dtype before', 'dtype after', 'memory before', 'memory after']:
+            table.add_column(col, justify="center", no_wrap=True)
+        for row in report:
+            table.add_row(*row[:3], f'{row[3] / 1024 ** 2:.2f} MB', f'{row[4] / 1024 ** 2:.2f} MB')
+        Console().print(table)
+
+        end_mem = data.memory_usage(deep=True).sum()
+        Console().print(f'[green][=][/green] Memory usage after optimization is {end_mem / 1024 ** 2:.2f} MB')
         Console().print(f'[green][=][/green] Decreased by {100 * (start_mem - end_mem) / start_mem:.1f}%')
+        data.attrs['shrink'] = schema
         if retframe:
-            return self.data
+            return data
+        return schema
+    
+    def unshrink(self, schema: dict = None):
+        """Restore the data shrinked by Converter.shrink
+        ------------------------------------------------
+
+        schema: dict, the schema returned by shrink, default the one kept in data.attrs
+        """
+        schema = schema or self._origin.attrs.get('shrink')
+        if schema is None:
+            raise ProcessorError('unshrink', 'No schema found, pass the one returned by shrink')
+        
+        data = self._origin.copy()
+        for col, dtype in schema['columns'].items():
+            data[col] = data[col].astype(dtype)
+        
+        ismulti = isinstance(data.index, pd.MultiIndex)
+        levels = list(data.index.levels) if ismulti else [data.index]
+        for i, level_schema in schema['index'].items():
+            level = levels[i]
+            if level_schema['kind'] == 'date':
+                restored = pd.Index(level.values.astype('int64').astype('datetime64[D]'),
+                    name=level.name).astype(level_schema['dtype'])
+            else:
+                restored = pd.Index(level_schema['categories'].take(level.values), name=level.name)
+            levels[i] = restored
+        if ismulti:
+            data.index = pd.MultiIndex(levels=levels, codes=data.index.codes, 
+                names=data.index.names, verify_integrity=False)
+        else:
+            data.index = levels[0]
+        
+        data.attrs.pop('shrink', None)
+        return data
 
 @pd.api.extensions.register_dataframe_accessor("preprocessor")
 @pd.api.extensions.register_series_accessor("preprocessor")
 class PreProcessor(Worker):
+
+    def _grouper(self, grouper = None):
+        """panel data is always grouped by date first, others only by grouper"""
+        if isinstance(grouper, GroupIndex):
+            return grouper
+        if self.type_ == Worker.PNFR or self.type_ == Worker.PNSR:
+            if grouper is not None:
+                return [pd.Grouper(level=0)] + item2list(grouper)
+            return pd.Grouper(level=0)
+        return grouper
+
+    @staticmethod
+    def _transform(data: pd.DataFrame, grouper, how: str, *args):
+        """the statistic of the group of each row, aligned with data, by the
+        cythonized groupby transform, or the statistic of each column without grouper"""
+        if grouper is None:
+            return getattr(data, how)(*args)
+        if isinstance(grouper, GroupIndex):
+            values = grouper.align(data.index).transform(data.to_numpy(dtype='float64'), how, *args)
+            return pd.DataFrame(values, index=data.index, columns=data.columns)
+        return data.groupby(grouper).transform(how, *args)
+
+    @staticmethod
+    def _clip(data: pd.DataFrame, down, up):
+        return data.clip(down, up, axis=1 if isinstance(down, pd.Series) else None)
+
+    @staticmethod
+    def _fill(data: pd.DataFrame, value):
+        # where is much faster than fillna with a column wise series
+        return data.where(data.notna(), value, axis=1 if isinstance(value, pd.Series) else None)
     
     def standarize(
         self, 
         method: str = 'zscore', 
         grouper = None
     ):
-        def _zscore(data):
-            mean = data.mean()
-            std = data.std()
-            zscore = (data - mean) / std
-            return zscore
-
-        def _minmax(data):
-            min_ = data.min()
-            max_ = data.max()
-            minmax = (data - min_) / (max_ - min_)
-            return minmax
-
-        if not self.isframe(self.data):
-            data = self.data.to_frame().copy()
-        else:
-            data = self.data.copy()
+        if (self.type_ == Worker.PNFR or self.type_ == Worker.PNSR) and grouper is None \
+            and ('zscore' in method or 'minmax' in method):
+            # cross sectional standarize on the date segments of the ragged panel
+            ragged = self._to_ragged()
+            with np.errstate(invalid='ignore', divide='ignore'):
+                if 'zscore' in method:
+                    values = (ragged.values - ragged.broadcast(ragged.reduce('mean'))) \
+                        / ragged.broadcast(ragged.reduce('std'))
+                else:
+                    min_ = ragged.broadcast(ragged.reduce('min'))
+                    values = (ragged.values - min_) / (ragged.broadcast(ragged.reduce('max')) - min_)
+            result = ragged.to_long(values)
+            return result.to_frame() if self.isseries(result) else result
 
-        if self.type_ == Worker.PNFR or self.type_ == Worker.PNSR:
-            if grouper is not None:
-                grouper = [pd.Grouper(level=0)] + item2list(grouper)
-            else:
-                grouper = pd.Grouper(level=0)
+        data = self.data.to_frame() if not self.isframe(self.data) else self.data
+        grouper = self._grouper(grouper)
 
         if 'zscore' in method:
-            if self.type_ == Worker.PNFR or self.type_ == Worker.PNSR:
-                return data.groupby(grouper).apply(_zscore)
-            elif grouper is not None:
-                return data.groupby(grouper).apply(_zscore)
-            else:
-                return _zscore(data)
+            return (data - self._transform(data, grouper, 'mean')) \
+                / self._transform(data, grouper, 'std')
 
         elif 'minmax' in method:
-            if self.type_ == Worker.PNFR or self.type_ == Worker.PNSR:
-                return data.groupby(grouper).apply(_minmax)
-            elif grouper is not None:
-                return data.groupby(grouper).apply(_minmax)
-            else:
-                return _minmax(data)
+            min_ = self._transform(data, grouper, 'min')
+            return (data - min_) / (self._transform(data, grouper, 'max') - min_)
 
     def deextreme(
         self,
@@ -369,142 +896,346 @@ class PreProcessor(Worker):
         grouper = None, 
         n = None
     ):
-
-        def _mad(data):
-            median = data.median()
-            mad = (data - median).abs().median()
-            mad = mad.values.reshape((1, -1)).repeat(len(data), axis=0).reshape(data.shape)
-            mad = pd.DataFrame(mad, index=data.index, columns=data.columns)
-            madup = median + n * mad
-            maddown = median - n * mad
-            data[data > madup] = madup
-            data[data < maddown] = maddown
-            return data
-            
-        def _std(data):
-            mean = data.mean()
-            mean = mean.values.reshape((1, -1)).repeat(len(data), axis=0).reshape(data.shape)
-            mean = pd.DataFrame(mean, index=data.index, columns=data.columns)
-            std = data.std()
-            up = mean + n * std
-            down = mean - n * std
-            data[data > up] = up
-            data[data < down] = down
-            return data
-        
-        def _drop_odd(data):
-            if not isinstance(n, (list, tuple)):
-                min_, max_ = n / 2, 1 - n /2
-            else:
-                min_, max_ = n[0], n[1]
-            down = data.quantile(min_)
-            up = data.quantile(max_)
-            down = down.values.reshape((1, -1)).repeat(len(data), axis=0).reshape(data.shape)
-            up = up.values.reshape((1, -1)).repeat(len(data), axis=0).reshape(data.shape)
-            data[data > up] = up
-            data[data < down] = down
-            return data
-        
-        if not self.isframe(self.data):
-            data = self.data.to_frame().copy()
-        else:
-            data = self.data.copy()
-        
-        if self.type_ == Worker.PNFR or self.type_ == Worker.PNSR:
-            if grouper is not None:
-                grouper = [pd.Grouper(level=0)] + item2list(grouper)
-            else:
-                grouper = pd.Grouper(level=0)
+        data = self.data.to_frame() if not self.isframe(self.data) else self.data
+        grouper = self._grouper(grouper)
     
         if 'mad' in method:
             if n is None:
                 n = 5
-            if self.type_ == Worker.PNFR or self.type_ == Worker.PNSR:
-                return data.groupby(grouper).apply(_mad)
-            elif grouper is not None:
-                return data.groupby(grouper).apply(_mad)
-            else:
-                return _mad(data)
-
+            median = self._transform(data, grouper, 'median')
+            mad = self._transform((data - median).abs(), grouper, 'median')
+            return self._clip(data, median - n * mad, median + n * mad)
 
         elif 'std' in method:
             if n is None:
                 n = 3
-            if self.type_ == Worker.PNFR or self.type_ == Worker.PNSR:
-                return data.groupby(grouper).apply(_std)
-            elif grouper is not None:
-                return data.groupby(grouper).apply(_std)
-            else:
-                return _std(data)
+            mean = self._transform(data, grouper, 'mean')
+            std = self._transform(data, grouper, 'std')
+            return self._clip(data, mean - n * std, mean + n * std)
         
         elif 'drop' in method:
             if n is None:
                 n = 0.1
-            if self.type_ == Worker.PNFR or self.type_ == Worker.PNSR:
-                return data.groupby(grouper).apply(_drop_odd)
-            elif grouper is not None:
-                return data.groupby(grouper).apply(_drop_odd)
+            if not isinstance(n, (list, tuple)):
+                min_, max_ = n / 2, 1 - n /2
             else:
-                return _drop_odd(data)
+                min_, max_ = n[0], n[1]
+            down = self._transform(data, grouper, 'quantile', min_)
+            up = self._transform(data, grouper, 'quantile', max_)
+            return self._clip(data, down, up)
     
     def fillna(
         self, 
         method = 'zero', 
         grouper = None
     ):
+        data = self.data.to_frame() if not self.isframe(self.data) else self.data
+        grouper = self._grouper(grouper)
 
-        def _zero(data):
-            data = data.fillna(0)
-            return data
+        if 'zero' in method:
+            return data.fillna(0)
+
+        elif 'mean' in method:
+            return self._fill(data, self._transform(data, grouper, 'mean'))
+        
+        elif 'median' in method:
+            return self._fill(data, self._transform(data, grouper, 'median'))
+
+        elif 'ffill' in method:
+            # time series fill, by asset for panel
+            if self.type_ == Worker.PNFR or self.type_ == Worker.PNSR:
+                return data.groupby(level=1).ffill()
+            return data.ffill()
+
+    def neutralize(
+        self,
+        industry: pd.Series = None,
+        size: 'pd.Series | pd.DataFrame' = None,
+        logsize: bool = True,
+    ):
+        """Neutralize the factors by industry and size
+        -----------------------------------------------
+
+        The residuals of the cross sectional regressions on industry dummies
+        and size on each date. The dummies are absorbed by demeaning within 
+        each (date, industry) group, and the size coefficients of all the dates 
+        are solved at once from the per date normal equations, so no model is 
+        built on each date. Rows with NaN in factor, industry or size are left 
+        out of the regression of that factor and are NaN in the result.
+
+        industry: Series or GroupIndex, a panel of industry labels, default None
+        size: Series or DataFrame, a panel of the market value, or other 
+            numeric exposures, default None
+        logsize: bool, whether to take logarithm of size
+        """
+        if not (self.type_ == Worker.PNFR or self.type_ == Worker.PNSR) or self.data.index.nlevels != 2:
+            raise ProcessorError('neutralize', 'Only panel data can be neutralized')
+        
+        data = self.data.to_frame() if not self.isframe(self.data) else self.data
+        values = data.to_numpy(dtype='float64')
+        date_codes = data.index.codes[0].astype('int64')
+        ndates = data.index.levels[0].size
+        
+        if isinstance(industry, GroupIndex):
+            # the segments are already (date, industry) groups
+            groups = industry.align(data.index).codes
+            valid = groups >= 0
+            groups = np.where(valid, groups, 0)
+        elif industry is not None:
+            industry = industry.reindex(data.index)
+            industry_codes, _ = pd.factorize(industry)
+            valid = industry_codes >= 0
+            industry_codes = np.where(valid, industry_codes, 0).astype('int64')
+            groups = date_codes * (industry_codes.max() + 1) + industry_codes
+        else:
+            valid = np.ones(values.shape[0], dtype='bool')
+            groups = date_codes
+        
+        if size is not None:
+            exposure = size.reindex(data.index).to_numpy(dtype='float64').reshape((values.shape[0], -1))
+            if logsize:
+                with np.errstate(invalid='ignore', divide='ignore'):
+                    exposure = np.log(exposure)
+            valid &= np.isfinite(exposure).all(axis=1)
+        else:
+            exposure = np.empty((values.shape[0], 0))
+        
+        ngroups = groups.max() + 1 if groups.size else 0
+        nexposures = exposure.shape[1]
+        result = np.full(values.shape, np.nan)
+        with np.errstate(invalid='ignore', divide='ignore'):
+            for j in range(values.shape[1]):
+                rows = valid & ~np.isnan(values[:, j])
+                group, date = groups[rows], date_codes[rows]
+                # demeaning within the groups absorbs the dummies (or the intercept)
+                count = np.bincount(group, minlength=ngroups)
+                def _demean(array):
+                    return array - (np.bincount(group, weights=array, minlength=ngroups) / count)[group]
+                y = _demean(values[rows, j])
+                x = np.stack([_demean(exposure[rows, k]) for k in range(nexposures)], axis=1) \
+                    if nexposures else np.empty((y.size, 0))
+                
+                if nexposures:
+                    # per date normal equations, solved for all the dates in one batch
+                    xtx = np.empty((ndates, nexposures, nexposures))
+                    xty = np.empty((ndates, nexposures))
+                    for k in range(nexposures):
+                        xty[:, k] = np.bincount(date, weights=x[:, k] * y, minlength=ndates)
+                        for l in range(k, nexposures):
+                            xtx[:, k, l] = xtx[:, l, k] = np.bincount(date, 
+                                weights=x[:, k] * x[:, l], minlength=ndates)
+                    beta = np.einsum('tkl,tl->tk', np.linalg.pinv(xtx), xty)
+                    y = y - np.einsum('nk,nk->n', x, beta[date])
+                result[rows, j] = y
+        
+        return pd.DataFrame(result, index=data.index, columns=data.columns)
+
+    @staticmethod
+    def _pipeline_steps(steps: list):
+        """normalize the steps into (function, method, kwargs) tuples"""
+        defaults = {'standarize': 'zscore', 'deextreme': 'mad', 'fillna': 'zero'}
+        normalized = []
+        for step in steps:
+            step = (step, ) if isinstance(step, str) else tuple(step)
+            func = step[0]
+            if func not in defaults:
+                raise ProcessorError('pipeline', f'Unsupported step {func}')
+            method = step[1] if len(step) > 1 else defaults[func]
+            kwargs = step[2] if len(step) > 2 else {}
+            normalized.append((func, method, kwargs))
+        return normalized
+
+    @staticmethod
+    def _pipeline_chunk(segment: RaggedPanel, steps: list):
+        """run all the steps on the segments of a chunk, inplace on its values"""
+        buffer = segment.values
+        broadcast = segment.broadcast
+        with np.errstate(invalid='ignore', divide='ignore'):
+            for func, method, kwargs in steps:
+                if func == 'deextreme':
+                    n = kwargs.get('n')
+                    if 'mad' in method:
+                        n = 5 if n is None else n
+                        median = broadcast(segment.reduce('median', buffer))
+                        mad = broadcast(segment.reduce('median', np.abs(buffer - median)))
+                        down, up = median - n * mad, median + n * mad
+                    elif 'std' in method:
+                        n = 3 if n is None else n
+                        mean = broadcast(segment.reduce('mean', buffer))
+                        std = broadcast(segment.reduce('std', buffer))
+                        down, up = mean - n * std, mean + n * std
+                    elif 'drop' in method:
+                        n = 0.1 if n is None else n
+                        min_, max_ = (n / 2, 1 - n / 2) if not isinstance(n, (list, tuple)) else n
+                        down = broadcast(segment.quantile(min_, buffer))
+                        up = broadcast(segment.quantile(max_, buffer))
+                    # comparing with NaN is always false, so the NaN bounds clip nothing
+                    np.copyto(buffer, up, where=buffer > up)
+                    np.copyto(buffer, down, where=buffer < down)
+                
+                elif func == 'fillna':
+                    if 'zero' in method:
+                        np.copyto(buffer, 0, where=np.isnan(buffer))
+                    elif 'mean' in method or 'median' in method:
+                        how = 'mean' if 'mean' in method else 'median'
+                        np.copyto(buffer, broadcast(segment.reduce(how, buffer)), where=np.isnan(buffer))
+                
+                elif func == 'standarize':
+                    if 'zscore' in method:
+                        buffer -= broadcast(segment.reduce('mean', buffer))
+                        buffer /= broadcast(segment.reduce('std', buffer))
+                    elif 'minmax' in method:
+                        min_ = broadcast(segment.reduce('min', buffer))
+                        buffer -= min_
+                        buffer /= broadcast(segment.reduce('max', buffer))
+
+    def pipeline(
+        self,
+        steps: list,
+        grouper = None,
+        threads: int = 1,
+    ):
+        """Run the preprocessing steps in one pass
+        --------------------------------------------
+
+        The rows are sorted by their cross section (date, and grouper if given)
+        only once into a single buffer, then all the steps run on the segments
+        of the buffer inplace, the same as calling the steps one by one
+
+        steps: list, each step is a function name or a (function, method) or a 
+            (function, method, kwargs) tuple, like
+            [('deextreme', 'mad'), ('fillna', 'median'), ('standarize', 'zscore')]
+        grouper: the grouper within each date, like industry, the rows without 
+            a group are NaN in the result
+        threads: int, number of threads working on the chunks of dates
+        """
+        return self._stages(self._pipeline_steps(steps), grouper, threads)
+
+    def _stages(self, steps: list, grouper = None, threads: int = 1, state: dict = None):
+        """split the steps at the time series fills, the cross sectional steps
+        between them are fused, the fills carry the last values in state if given"""
+        data, stage = self.data, []
+        for i, step in enumerate(steps + [None]):
+            if step is not None and not (step[0] == 'fillna' and 'ffill' in step[1]):
+                stage.append(step)
+                continue
+            if stage:
+                data, stage = data.preprocessor._fused(stage, grouper, threads), []
+            if step is None:
+                break
             
-        def _mean(data):
-            mean = data.mean(axis=0)
-            mean = mean.values.reshape((1, -1)).repeat(len(data), axis=0).reshape(data.shape)
-            mean = pd.DataFrame(mean, columns=data.columns, index=data.index)
-            data = data.fillna(mean)
-            return data
+            filled = data.preprocessor.fillna(step[1])
+            if state is not None:
+                previous = state.get(i)
+                if previous is not None:
+                    carry = previous.reindex(index=filled.index.get_level_values(1), columns=filled.columns)
+                    filled = filled.where(filled.notna(), carry.to_numpy())
+                last = filled.groupby(level=1).last()
+                state[i] = last if previous is None else last.combine_first(previous)
+            data = filled
+        return data
 
-        def _median(data):
-            median = data.median(axis=0)
-            median = median.values.reshape((1, -1)).repeat(len(data), axis=0).reshape(data.shape)
-            median = pd.DataFrame(median, columns=data.columns, index=data.index)
-            data = data.fillna(median)
+    def _fused(self, steps: list, grouper = None, threads: int = 1):
+        """run the cross sectional steps in one pass, see pipeline"""
+        if not (self.type_ == Worker.PNFR or self.type_ == Worker.PNSR) or self.data.index.nlevels != 2:
+            # no cross sections to fuse, just call the steps one by one
+            data = self.data
+            for func, method, kwargs in steps:
+                data = getattr(data.preprocessor, func)(method, grouper=grouper, **kwargs)
             return data
-
-        if not self.isframe(self.data):
-            data = self.data.to_frame().copy()
+        
+        data = self.data.to_frame() if not self.isframe(self.data) else self.data
+        if grouper is None:
+            ragged = self._to_ragged()
+            buffer = ragged.values.copy()
+            offsets = ragged.offsets
+            positions = ragged.order if ragged.order is not None else np.arange(buffer.shape[0])
+        elif isinstance(grouper, GroupIndex):
+            grouper = grouper.align(data.index)
+            positions, offsets = grouper.order, grouper.offsets
+            buffer = data.to_numpy(dtype='float64')[positions]
         else:
-            data = self.data.copy()
+            codes = data.groupby(self._grouper(grouper)).ngroup().fillna(-1).to_numpy().astype('int64')
+            positions = np.flatnonzero(codes >= 0)
+            positions = positions[np.argsort(codes[positions], kind='stable')]
+            buffer = data.to_numpy(dtype='float64')[positions]
+            offsets = np.zeros(codes.max() + 2, dtype='int64')
+            offsets[1:] = np.cumsum(np.bincount(codes[positions], minlength=codes.max() + 1))
         
-        if self.type_ == Worker.PNFR or self.type_ == Worker.PNSR:
-            if grouper is not None:
-                grouper = [pd.Grouper(level=0)] + item2list(grouper)
-            else:
-                grouper = pd.Grouper(level=0)
+        # chunks with about the same number of rows, cut at the segment boundaries
+        nchunks = max(1, threads * 4) if threads > 1 else 1
+        bounds = np.unique(np.searchsorted(offsets, np.linspace(0, buffer.shape[0], nchunks + 1)))
+        bounds[0], bounds[-1] = 0, offsets.size - 1
+        segments = [RaggedPanel(buffer[offsets[a]:offsets[b]], pd.RangeIndex(b - a), None, data.columns,
+            offsets[a:b + 1] - offsets[a], None, None) for a, b in zip(bounds[:-1], bounds[1:]) if b > a]
+        if threads > 1:
+            from concurrent.futures import ThreadPoolExecutor
+            with ThreadPoolExecutor(max_workers=threads) as pool:
+                list(pool.map(lambda segment: self._pipeline_chunk(segment, steps), segments))
+        else:
+            for segment in segments:
+                self._pipeline_chunk(segment, steps)
+        
+        result = np.full(data.shape, np.nan)
+        result[positions] = buffer
+        return pd.DataFrame(result, index=data.index, columns=data.columns)
 
-        if 'zero' in method:
-            if self.type_ == Worker.PNFR or self.type_ == Worker.PNSR:
-                return data.groupby(grouper).apply(_zero)
-            elif grouper is not None:
-                return data.groupby(grouper).apply(_zero)
-            else:
-                return _zero(data)
+    def incremental(
+        self,
+        store: 'str | PanelStore',
+        steps: list,
+        grouper = None,
+        threads: int = 1,
+    ):
+        """Preprocess only the new dates and append them to a store
+        -------------------------------------------------------------
 
-        elif 'mean' in method:
-            if self.type_ == Worker.PNFR or self.type_ == Worker.PNSR:
-                return data.groupby(grouper).apply(_mean)
-            elif grouper is not None:
-                return data.groupby(grouper).apply(_mean)
-            else:
-                return _mean(data)
+        The cross sectional steps only need the data on the same date, so
+        processing the new dates alone is exact, and the time series fills
+        (fillna with 'ffill') carry the last values of each asset, kept in
+        the store along with the last processed date
+
+        store: str or PanelStore, the store keeping the processed data
+        steps: list, the preprocessing steps, see pipeline
+        grouper: the grouper within each date, like industry
+        threads: int, number of threads working on the chunks of dates
+        return: the processed data of the new dates
+        """
+        from .fetcher import PanelStore
+        if not (self.type_ == Worker.PNFR or self.type_ == Worker.PNSR):
+            raise ProcessorError('incremental', 'Only panel data can be processed incrementally')
+
+        store = store if isinstance(store, PanelStore) else PanelStore(store)
+        steps = self._pipeline_steps(steps)
+        statefile = os.path.join(store.path, '_preprocess.pkl')
+        state = {'steps': steps, 'last': None, 'fill': {}}
+        if os.path.exists(statefile):
+            with open(statefile, 'rb') as f:
+                state = pickle.load(f)
+            if state['steps'] != steps:
+                raise ProcessorError('incremental', f'The store was processed by other steps: {state["steps"]}')
         
-        elif 'median' in method:
-            if self.type_ == Worker.PNFR or self.type_ == Worker.PNSR:
-                return data.groupby(grouper).apply(_median)
-            elif grouper is not None:
-                return data.groupby(grouper).apply(_median)
-            else:
-                return _median(data)
+        data = self.data
+        if state['last'] is not None:
+            data = data.loc[data.index.get_level_values(0) > state['last']]
+        if data.empty:
+            return data.to_frame() if self.isseries(data) else data
+        
+        if grouper is not None and self.isseries(grouper):
+            grouper = grouper.reindex(data.index)
+        result = data.preprocessor._stages(steps, grouper, threads, state['fill'])
+        store.write(result.copy(), mode='append')
+        state['last'] = result.index.get_level_values(0).max()
+        # the state is replaced after the store is written, so it never runs ahead of the store
+        handle, temp = tempfile.mkstemp(dir=store.path, prefix='_preprocess', suffix='.tmp')
+        try:
+            with os.fdopen(handle, 'wb') as f:
+                pickle.dump(state, f)
+            os.replace(temp, statefile)
+        except BaseException:
+            os.remove(temp)
+            raise
+        return result
 
 if __name__ == "__main__":
     import numpy as np
@@ -5,7 +5,7 @@ class Converter(quool.base.Worker):
 
     def price2ret(
         self, 
-        period: 'str | int', 
+        period: 'str | int | list', 
         open_col: str = 'close', 
         close_col: str = 'close', 
         method: str = 'algret',
@@ -16,7 +16,8 @@ class Converter(quool.base.Worker):
         
         period: str or int or DateOffset, if in str and DateOffset format,
             return will be in like resample format, otherwise, you can get rolling
-            return formatted data
+            return formatted data, pass a list to get one column per period,
+            integer periods on a panel are computed in a single pass
         open_col: str, if you pass a dataframe, you need to assign which column
             represents open price
         colse_col: str, the same as open_col, but to assign close price
@@ -29,8 +30,21 @@ class Converter(quool.base.Worker):
         grouper = None, 
         period: int = 1, 
         axis: int = 0, 
-        keep: bool = True
-    ) -> 'DataFrame | Series': ...
+        keep: bool = True,
+        ytd: bool = False,
+    ) -> 'DataFrame | Series':
+        """Convert the cumulative data to the data of each period
+        ----------------------------------------------------------
+
+        grouper: the grouper within which the data is cumulated, like the year
+        period: int, the difference period, in quarters with ytd
+        axis: int, the axis to diff along, only available without grouper
+        keep: bool, whether to keep the first period data in each group
+        ytd: bool, whether the data are year to date financial statements, then 
+            the data in each report period is diffed with the previous `period` 
+            quarter of the same asset in the same year, and the missing 
+            previous quarters lead to NaN
+        """
 
     def dummy2category(
         self, 
@@ -42,28 +56,116 @@ class Converter(quool.base.Worker):
 
     def resample(self, rule: str, **kwargs) -> 'DataFrame | Series': ...
 
-    def spdatetime(self, level: int = None, axis: int = 0) -> 'DataFrame | Series':
+    def tdresample(
+        self, 
+        rule: 'str | int', 
+        how: 'str | dict' = None, 
+        calendar: 'DatetimeIndex | pd.offsets.CustomBusinessDay' = None,
+        label: str = 'right',
+    ) -> 'DataFrame | Series':
+        """Resample by the trading calendar
+        -------------------------------------
+
+        The trading days are put into buckets once (cached by calendar and rule),
+        and the data is aggregated by the bucket ids and assets in one pass
+
+        rule: str or int, period alias like 'W', 'M', 'Q', 'Y' for the trading days
+            in the same natural period, or int for every n trading days
+        how: str or dict, the aggregation, default 'first' for open, 'max' for high,
+            'min' for low, 'sum' for volume and amount, 'last' for the others
+        calendar: DatetimeIndex or CustomBusinessDay (like oxygene.ctd()), the
+            trading calendar, default the dates in data
+        label: str, 'right' to label each bucket by its last trading day, 'left' by the first
+        """
+
+    def spdatetime(self, level: int = None, axis: int = 0, coded: bool = False) -> 'DataFrame | Series':
         """Split data with datetime into date and time formatted index
         ------------------------------------------------------------
 
         level: int, the level the datetime index exists, only available when not matching standard data types
         axis: int, the axis the datetime index exists, only available when not matching standard data types
+        coded: bool, for time series and panel, split into a datetime64 date level and an int16
+            minute of day level instead of python date and time objects, which is much
+            more compact for minute bars
         """
 
-    def panelize(self) -> 'DataFrame | Series':
+    def minute2bar(self, n: int = None, how: 'str | dict' = None) -> 'DataFrame | Series':
+        """Aggregate minute bars into n minute bars or daily bars
+        -----------------------------------------------------------
+
+        The buckets are counted by bar position in each session, so the lunch
+        break doesn't make an incomplete bar, and are aggregated in one pass
+
+        n: int, number of minute bars in a bar, default None for daily bars
+        how: str or dict, the aggregation, default 'first' for open, 'max' for high,
+            'min' for low, 'sum' for volume and amount, 'last' for the others
+        return: data indexed by (date, asset) for daily bars, otherwise by 
+            (datetime, asset) labeled by the last minute in each bar
+        """
+
+    def minute2ret(
+        self,
+        period: int = 1,
+        open_col: str = 'close',
+        close_col: str = 'close',
+        method: str = 'algret',
+        lag: int = 1,
+        session: str = 'within',
+    ) -> Series:
+        """Convert minute bar price to return
+        ---------------------------------------
+
+        The same as price2ret with integer period, but the bars are shifted
+        by their position within the session or across sessions
+
+        period: int, number of bars, negative for the forward return
+        open_col: str, the column represents open price for dataframe
+        close_col: str, the column represents close price for dataframe
+        method: str, choose between 'algret' and 'logret'
+        lag: int, number of bars lagged for the forward return
+        session: str, 'within' to leave the bars that need another session NaN,
+            'across' to shift through the overnight gap
+        """
+
+    def panelize(self, ragged: bool = False) -> 'DataFrame | Series | RaggedPanel':
         """Panelize a dataframe
         ------------------------
         
         Specifically used for imbalanced panel data, this
         function will help you deal with that
+
+        ragged: bool, return a RaggedPanel which keeps only the existing
+            rows instead of the cartesian product, densify it by to_product
         """
 
-    def reduce_memory(self) -> DataFrame:
+    def shrink(
+        self, 
+        retframe: bool = False, 
+        allow_halffloat: bool = True,
+        rtol: float = 1e-6,
+        index: bool = False,
+    ) -> 'dict | DataFrame':
         """Reduce the memory usage for a dataframe
         -----------------------------------------
 
         iterate through all the columns of a dataframe and modify the data type
-        to reduce memory usage.
+        to reduce memory usage. Float columns are only casted when the maximum
+        relative error is under rtol, integer and object columns are casted
+        losslessly. Date index levels become int32 day ordinals and string
+        index levels become int32 category codes. The data is modified in place.
+
+        retframe: bool, return the shrinked data instead of the schema
+        allow_halffloat: bool, whether float16 can be chosen
+        rtol: float, the maximum relative error allowed for float columns
+        index: bool, whether to shrink the index levels
+        return: the schema for Converter.unshrink to restore the data, or the data if retframe
+        """
+
+    def unshrink(self, schema: dict = None) -> DataFrame:
+        """Restore the data shrinked by Converter.shrink
+        ------------------------------------------------
+
+        schema: dict, the schema returned by shrink, default the one kept in data.attrs
         """
 
 
@@ -86,4 +188,68 @@ class PreProcessor(quool.base.Worker):
         self, 
         method = 'pad_zero', 
         grouper = None
-    ) -> 'DataFrame | Series': ...
\ No newline at end of file
+    ) -> 'DataFrame | Series': ...
+    def neutralize(
+        self,
+        industry: 'Series | GroupIndex' = None,
+        size: 'Series | DataFrame' = None,
+        logsize: bool = True,
+    ) -> DataFrame:
+        """Neutralize the factors by industry and size
+        -----------------------------------------------
+
+        The residuals of the cross sectional regressions on industry dummies
+        and size on each date. The dummies are absorbed by demeaning within 
+        each (date, industry) group, and the size coefficients of all the dates 
+        are solved at once from the per date normal equations, so no model is 
+        built on each date. Rows with NaN in factor, industry or size are left 
+        out of the regression of that factor and are NaN in the result.
+
+        industry: Series or GroupIndex, a panel of industry labels, default None
+        size: Series or DataFrame, a panel of the market value, or other 
+            numeric exposures, default None
+        logsize: bool, whether to take logarithm of size
+        """
+
+    def pipeline(
+        self,
+        steps: list,
+        grouper = None,
+        threads: int = 1,
+    ) -> DataFrame:
+        """Run the preprocessing steps in one pass
+        --------------------------------------------
+
+        The rows are sorted by their cross section (date, and grouper if given)
+        only once into a single buffer, then all the steps run on the segments
+        of the buffer inplace, the same as calling the steps one by one
+
+        steps: list, each step is a function name or a (function, method) or a 
+            (function, method, kwargs) tuple, like
+            [('deextreme', 'mad'), ('fillna', 'median'), ('standarize', 'zscore')]
+        grouper: the grouper within each date, like industry, the rows without 
+            a group are NaN in the result
+        threads: int, number of threads working on the chunks of dates
+        """
+
+    def incremental(
+        self,
+        store: 'str | PanelStore',
+        steps: list,
+        grouper = None,
+        threads: int = 1,
+    ) -> DataFrame:
+        """Preprocess only the new dates and append them to a store
+        -------------------------------------------------------------
+
+        The cross sectional steps only need the data on the same date, so
+        processing the new dates alone is exact, and the time series fills
+        (fillna with 'ffill') carry the last values of each asset, kept in
+        the store along with the last processed date
+
+        store: str or PanelStore, the store keeping the processed data
+        steps: list, the preprocessing steps, see pipeline
+        grouper: the grouper within each date, like industry
+        threads: int, number of threads working on the chunks of dates
+        return: the processed data of the new dates
+        """
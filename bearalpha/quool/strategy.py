@@ -0,0 +1,128 @@
+import datetime
+import pandas as pd
+import backtrader as bt
+from ..tools import *
+
+
+class Strategy(bt.Strategy):
+
+    def log(self, text: str, datetime: datetime.datetime = None, hint: str = 'INFO'):
+        """Logging function"""
+        datetime = datetime or self.data.datetime.date(0)
+        datetime = time2str(datetime)
+        if hint == "INFO":
+            color = "color"
+        elif hint == "WARN":
+            color = "yellow"
+        elif hint == "ERROR":
+            color = "red"
+        else:
+            color = "blue"
+        Console().print(f'[{color}][{hint}][/{color}] {datetime}: {text}')
+
+    def notify_order(self, order: bt.Order):
+        """order notification"""
+        # order possible status:
+        # 'Created'、'Submitted'、'Accepted'、'Partial'、'Completed'、
+        # 'Canceled'、'Expired'、'Margin'、'Rejected'
+        # broker submitted or accepted order do nothing
+        if order.status in [order.Submitted, order.Accepted, order.Created]:
+            return
+
+        # broker completed order, just hint
+        elif order.status in [order.Completed]:
+            self.log(f'Trade <{order.executed.size}> <{order.info.get("name", "data")}> at <{order.executed.price:.2f}>')
+            # record current bar number
+            self.bar_executed = len(self)
+
+        elif order.status in [order.Canceled, order.Margin, order.Rejected, order.Expired]:
+            self.log('Order canceled, margin, rejected or expired', hint='WARN')
+
+        # except the submitted, accepted, and created status,
+        # other order status should reset order variable
+        self.order = None
+
+    def notify_trade(self, trade):
+        """trade notification"""
+        if not trade.isclosed:
+            # trade not closed, skip
+            return
+        # else, log it
+        self.log(f'Gross Profit: {trade.pnl:.2f}, Net Profit {trade.pnlcomm:.2f}')
+
+
+class Indicator(bt.Indicator):
+    
+    def log(self, text: str, datetime: datetime.datetime = None, hint: str = 'INFO'):
+        """Logging function"""
+        datetime = datetime or self.data.datetime.date(0)
+        datetime = time2str(datetime)
+        if hint == "INFO":
+            color = "color"
+        elif hint == "WARN":
+            color = "yellow"
+        elif hint == "ERROR":
+            color = "red"
+        else:
+            color = "blue"
+        Console().print(f'[{color}][{hint}][/{color}] {datetime}: {text}')
+    
+
+class Analyzer(bt.Analyzer):
+
+    def log(self, text: str, datetime: datetime.datetime = None, hint: str = 'INFO'):
+        """Logging function"""
+        datetime = datetime or self.data.datetime.date(0)
+        datetime = time2str(datetime)
+        if hint == "INFO":
+            color = "color"
+        elif hint == "WARN":
+            color = "yellow"
+        elif hint == "ERROR":
+            color = "red"
+        else:
+            color = "blue"
+        Console().print(f'[{color}][{hint}][/{color}] {datetime}: {text}')
+
+
+class Observer(bt.Observer):
+
+    def log(self, text: str, datetime: datetime.datetime = None, hint: str = 'INFO'):
+        """Logging function"""
+        datetime = datetime or self.data.datetime.date(0)
+        datetime = time2str(datetime)
+        if hint == "INFO":
+            color = "color"
+        elif hint == "WARN":
+            color = "yellow"
+        elif hint == "ERROR":
+            color = "red"
+        else:
+            color = "blue"
+        Console().print(f'[{color}][{hint}][/{color}] {datetime}: {text}')
+
+
+class OrderTable(Analyzer):
+
+    def __init__(self):
+        self.orders = []
+
+    def notify_order(self, order):
+        if order.status == order.Completed:
+            if order.isbuy():
+                self.orders.append([
+                    self.data.datetime.date(0),
+                    order.info.get('name', 'data'), order.executed.size, 
+                    order.executed.price, 'BUY']
+                )
+            elif order.issell():
+                self.orders.append([
+                    self.data.datetime.date(0),
+                    order.info.get('name', 'data'), order.executed.size, 
+                    order.executed.price, 'SELL']
+                )
+        
+    def get_analysis(self):
+        self.rets = pd.DataFrame(self.orders, columns=['datetime', 'asset', 'size', 'price', 'direction'])
+        self.rets = self.rets.set_index('datetime')
+        return self.orders
@@ -0,0 +1,22 @@
+import datetime
+import backtrader as bt
+from bearalpha import *
+
+
+class Strategy(bt.Strategy):
+    def log(self, text: str, datetime: datetime.datetime = None, hint: str = 'INFO') -> None: ...
+    def notify_order(self, order: bt.Order) -> None: ...
+    def notify_trade(self, trade) -> None: ...
+
+class Indicator(bt.Indicator):
+    def log(self, text: str, datetime: datetime.datetime = None, hint: str = 'INFO') -> None: ...
+
+class Analyzer(bt.Analyzer):
+    def log(self, text: str, datetime: datetime.datetime = None, hint: str = 'INFO') -> None: ...
+
+class Observer(bt.Observer):
+    def log(self, text: str, datetime: datetime.datetime = None, hint: str = 'INFO') -> None: ...
+
+class OrderTable(Analyzer):
+    def notify_order(self, order) -> None: ...
+    def get_analysis(self) -> DataFrame: ...
@@ -24,13 +24,28 @@ from .common import (
     strip_stock_code, wrap_stock_code,
     timeit,
     varexist,
+    lazy_getattr,
 )
 
-from .io import (
-    Console,
-    Table,
-    track,
-    progressor,
-    beautify_traceback,
-    reg_font,
-)
+# rich based io tools are loaded on first use
+_lazy = {
+    'Console': '.io',
+    'Table': '.io',
+    'track': '.io',
+    'progressor': '.io',
+    'beautify_traceback': '.io',
+    'reg_font': '.io',
+}
+
+__all__ = [
+    'time2str',
+    'str2time',
+    'item2list',
+    'hump2snake',
+    'latest_report_period',
+    'strip_stock_code', 'wrap_stock_code',
+    'timeit',
+    'varexist',
+] + list(_lazy.keys())
+
+__getattr__ = lazy_getattr(__name__, _lazy)
@@ -12,14 +12,16 @@ Examples:
 """
 
 import re
+import sys
 import time
 import datetime
-import pandas as pd
+import importlib
 from functools import wraps
 
 
 def time2str(date: 'str | datetime.datetime | int | datetime.date', formatstr: str = r'%Y-%m-%d') -> str:
     """convert a datetime class to time-like string"""
+    import pandas as pd
     if isinstance(date, int):
         date = str(date)
     date = pd.to_datetime(date)
@@ -29,6 +31,7 @@ def time2str(date: 'str | datetime.datetime | int | datetime.date', formatstr: s
 
 def str2time(date: 'str | datetime.datetime') -> datetime.datetime:
     """convert a time-like string to datetime class"""
+    import pandas as pd
     if isinstance(date, (str, datetime.date)):
         date = pd.to_datetime(date)
     elif isinstance(date, (float, int)):
@@ -96,6 +99,7 @@ def latest_report_period(date: 'str | datetime.datetime | datetime.date',
     report_date = list(filter(lambda x: x <= date.strftime(r'%Y-%m-%d')[-5:], 
         nearest_report_date.keys()))[-1]
     report_date = nearest_report_date[report_date]
+    import pandas as pd
     fundmental_dates = pd.date_range(end=report_date, periods=n, freq='q')
     fundmental_dates = list(map(lambda x: x.strftime(r'%Y-%m-%d'), fundmental_dates))
     return fundmental_dates
@@ -133,6 +137,50 @@ def varexist(varname):
     except:
         return False
 
+def lazy_getattr(package: str, mapping: dict, loader = None):
+    """Make a module level __getattr__ to import attributes on first use
+    --------------------------------------------------------------------
+
+    package: str, the name of the package, in which relative modules are resolved
+    mapping: dict, attribute name to the relative module path defining it
+    loader: callable, taking the relative module path and returning the module,
+        default to importlib.import_module
+    """
+    loader = loader or (lambda module: importlib.import_module(module, package))
+
+    def __getattr__(name: str):
+        if name not in mapping:
+            raise AttributeError(f'module {package!r} has no attribute {name!r}')
+        value = getattr(loader(mapping[name]), name)
+        setattr(sys.modules[package], name, value)
+        return value
+    
+    return __getattr__
+
+
+class LazyAccessor(object):
+    """Placeholder of a pandas accessor, the loader is called to register
+    the real accessor only when the accessor is accessed for the first time.
+    The loader should remove the placeholder before registering.
+    """
+
+    def __init__(self, name: str, loader):
+        self.name = name
+        self.loader = loader
+
+    @classmethod
+    def register(cls, klass: type, name: str, loader):
+        """Install a placeholder named name on klass, skip if name exists"""
+        if not hasattr(klass, name):
+            setattr(klass, name, cls(name, loader))
+            klass._accessors.add(name)
+
+    def __get__(self, obj, klass):
+        self.loader()
+        if klass.__dict__.get(self.name) is self:
+            raise AttributeError(f'accessor {self.name!r} is not registered by its loader')
+        return getattr(klass if obj is None else obj, self.name)
+
 
 if __name__ == '__main__':
     pass
\ No newline at end of file
@@ -13,9 +13,6 @@ Examples:
 
 
 import rich
-import numpy
-import pandas
-import matplotlib
 from six import with_metaclass
 from rich.console import Console as RichConsole
 from rich.progress import track
@@ -86,6 +83,9 @@ def beautify_traceback(
     max_frames: int = 100
 ):
     """Enable traceback beautifier backend by rich"""
+    import numpy
+    import pandas
+    import matplotlib
     import backtrader
     install(
         console = console,
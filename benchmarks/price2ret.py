@@ -0,0 +1,70 @@
+"""Time Converter.price2ret against the per asset groupby shift it replaced
+
+    python benchmarks/price2ret.py --dates 2500 --assets 4000
+"""
+import time
+import argparse
+import numpy as np
+import pandas as pd
+import bearalpha
+
+
+def groupby_price2ret(data, period, open_col='close', close_col='close', method='algret', lag=1):
+    grouped = data.groupby(level=1)
+    if period > 0:
+        close_price = data
+        open_price = grouped.shift(period)
+    else:
+        close_price = grouped.shift(period - lag)
+        open_price = grouped.shift(-lag)
+    close_price, open_price = close_price[close_col], open_price[open_col]
+    if method == 'algret':
+        return (close_price - open_price) / open_price
+    return np.log(close_price / open_price)
+
+
+def panel(dates, assets, missing=0.05, seed=0):
+    rng = np.random.default_rng(seed)
+    index = pd.MultiIndex.from_product([pd.bdate_range('2010-01-01', periods=dates), 
+        [f'{i:06d}' for i in range(assets)]], names=['datetime', 'asset'])
+    close = 10 * np.exp(rng.normal(scale=0.02, size=(dates, assets)).cumsum(axis=0)).ravel()
+    data = pd.DataFrame({'open': close * rng.uniform(0.98, 1.02, size=close.size), 
+        'close': close}, index=index)
+    return data[rng.uniform(size=len(data)) >= missing]
+
+
+def timeit(func, repeat):
+    best = np.inf
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = func()
+        best = min(best, time.perf_counter() - start)
+    return best, result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--dates', type=int, default=1000)
+    parser.add_argument('--assets', type=int, default=2000)
+    parser.add_argument('--repeat', type=int, default=3)
+    args = parser.parse_args()
+
+    data = panel(args.dates, args.assets)
+    print(f'{len(data)} rows, {args.dates} dates x {args.assets} assets')
+    cases = [(1, 'close', 'close', 'algret', 1), (-1, 'close', 'close', 'algret', 1), 
+        (-5, 'open', 'close', 'logret', 1), (-20, 'open', 'close', 'algret', 2)]
+    for period, open_col, close_col, method, lag in cases:
+        old, expected = timeit(lambda: groupby_price2ret(data, period, open_col, close_col, method, lag), args.repeat)
+        new, result = timeit(lambda: data.converter.price2ret(period, open_col, close_col, method, lag), args.repeat)
+        np.testing.assert_allclose(result.to_numpy(), expected.to_numpy(), rtol=1e-12, atol=1e-12)
+        print(f'period={period:>4} {open_col}->{close_col} {method} lag={lag}: '
+            f'groupby {old:.3f}s, price2ret {new:.3f}s, x{old / new:.1f}')
+
+    periods = list(range(1, 61))
+    old, _ = timeit(lambda: [groupby_price2ret(data, -p) for p in periods], 1)
+    new, _ = timeit(lambda: data.converter.price2ret([-p for p in periods]), 1)
+    print(f'periods -1..-60: groupby {old:.3f}s, price2ret {new:.3f}s, x{old / new:.1f}')
+
+
+if __name__ == '__main__':
+    main()
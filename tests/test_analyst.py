@@ -0,0 +1,65 @@
+import warnings
+import numpy as np
+import pandas as pd
+import pytest
+import bearalpha
+
+
+def test_batched_ols_exact_fit_is_quiet():
+    rng = np.random.default_rng(0)
+    index = pd.MultiIndex.from_product([pd.bdate_range('2020-01-01', periods=3), list('abcde')])
+    x = pd.Series(rng.random(len(index)), index=index, name='x')
+    y = pd.Series(rng.random(len(index)), index=index)
+    # two observations for two regressors on the first date, one on the second
+    x = x.drop(index[[0, 1, 2, 5, 6, 7, 8]])
+    with warnings.catch_warnings():
+        warnings.simplefilter('error')
+        result = x.regressor.ols(y, backend='numpy')
+    exact = result.iloc[0]
+    expected = np.polyfit(x.iloc[:2].to_numpy(), y.loc[x.index[:2]].to_numpy(), 1)[::-1]
+    np.testing.assert_allclose(exact['coef'].to_numpy(), expected)
+    assert exact[['stderr', 'tvalue', 'pvalue']].isna().all()
+    assert result.iloc[1].drop('nobs', level=0).isna().all()
+    assert result.iloc[2].notna().all()
+
+
+def _factor_and_return(missing=True):
+    rng = np.random.default_rng(0)
+    index = pd.MultiIndex.from_product([pd.bdate_range('2020-01-01', periods=15), 
+        [f'{i:03d}' for i in range(40)]], names=['datetime', 'asset'])
+    factor = pd.DataFrame({'x': rng.normal(size=len(index)), 'y': rng.normal(size=len(index))}, index=index)
+    ret = (0.3 * factor['x'] + rng.normal(size=len(index))).rename('ret')
+    factor = factor.mask(rng.uniform(size=factor.shape) < 0.1)
+    ret = ret.mask(rng.uniform(size=ret.size) < 0.1)
+    industry = pd.Series(rng.choice(['bank', 'steel', 'media'], size=len(index)), index=index, name='industry')
+    if missing:
+        keep = rng.uniform(size=len(index)) > 0.2
+        factor, ret, industry = factor[keep], ret[keep], industry[keep]
+    return factor, ret, industry
+
+
+def _pandas_ic(factor, ret, keys, method):
+    data = factor.join(ret)
+    return data.groupby(keys).apply(lambda x: x[factor.columns].corrwith(x['ret'], method=method))
+
+
+@pytest.mark.parametrize('method', ['pearson', 'spearman'])
+@pytest.mark.parametrize('missing', [False, True])
+def test_ic_matches_pandas(method, missing):
+    factor, ret, _ = _factor_and_return(missing)
+    expected = _pandas_ic(factor, ret, pd.Grouper(level=0), method)
+    pd.testing.assert_frame_equal(factor.describer.ic(ret, method=method), expected, 
+        check_names=False, check_freq=False)
+    pd.testing.assert_series_equal(factor['x'].describer.ic(ret, method=method), expected['x'], 
+        check_names=False, check_freq=False)
+
+
+@pytest.mark.parametrize('method', ['pearson', 'spearman'])
+def test_ic_by_group_index_matches_pandas(method):
+    from bearalpha.quool import GroupIndex
+    factor, ret, industry = _factor_and_return()
+    expected = _pandas_ic(factor, ret, [pd.Grouper(level=0), industry], method)
+    result = factor.describer.ic(ret, grouper=GroupIndex.from_data(industry), method=method)
+    pd.testing.assert_frame_equal(result, expected, check_names=False)
+    pd.testing.assert_frame_equal(factor.describer.ic(ret, grouper=industry, method=method), 
+        expected, check_names=False)
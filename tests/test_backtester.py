@@ -0,0 +1,41 @@
+import numpy as np
+import pandas as pd
+import pytest
+import bearalpha
+
+
+def _weight_and_return():
+    rng = np.random.default_rng(0)
+    index = pd.MultiIndex.from_product([pd.bdate_range('2020-01-01', periods=10), 
+        [f'{i:03d}' for i in range(20)]], names=['datetime', 'asset'])
+    weight = pd.Series(rng.uniform(size=len(index)), index=index, name='weight')
+    ret = pd.Series(rng.normal(scale=0.02, size=len(index)), index=index, name='ret')
+    ret = ret.mask(rng.uniform(size=ret.size) < 0.1)
+    portfolio = pd.Series(rng.integers(1, 4, size=len(index)), index=index, name='portfolio')
+    keep = rng.uniform(size=len(index)) > 0.2
+    return weight[keep], ret, portfolio[keep]
+
+
+def test_profit_matches_pandas():
+    weight, ret, _ = _weight_and_return()
+    expected = weight.groupby(level=0).apply(lambda w: (w * ret.reindex(w.index)).sum() / w.sum())
+    pd.testing.assert_series_equal(weight.relocator.profit(ret), expected, check_names=False, check_freq=False)
+
+
+def test_profit_by_group_index_matches_pandas():
+    from bearalpha.quool import GroupIndex
+    weight, ret, portfolio = _weight_and_return()
+    expected = weight.groupby([portfolio, pd.Grouper(level=0)]).apply(
+        lambda w: (w * ret.reindex(w.index)).sum() / w.sum())
+    result = weight.relocator.profit(ret, portfolio=GroupIndex.from_data(portfolio))
+    pd.testing.assert_series_equal(result, expected, check_names=False)
+    pd.testing.assert_series_equal(weight.relocator.profit(ret, portfolio=portfolio), expected, check_names=False)
+
+
+@pytest.mark.parametrize('side', ['both', 'buy', 'sell'])
+def test_turnover_matches_pandas(side):
+    weight, _, _ = _weight_and_return()
+    wide = weight.unstack().div(weight.groupby(level=0).sum(), axis=0).fillna(0)
+    delta = wide - wide.shift(fill_value=0)
+    expected = {'both': delta.abs(), 'buy': delta.clip(lower=0), 'sell': -delta.clip(upper=0)}[side].sum(axis=1)
+    pd.testing.assert_series_equal(weight.relocator.turnover(side), expected, check_names=False, check_freq=False)
@@ -0,0 +1,176 @@
+import gc
+import os
+import pytest
+import numpy as np
+import pandas as pd
+import bearalpha as ba
+from bearalpha.quool import base
+
+
+def _panel(columns=('x', 'y')):
+    rng = np.random.default_rng(0)
+    index = pd.MultiIndex.from_product([pd.bdate_range('2020-01-01', periods=30), 
+        list('abcdefgh')], names=['date', 'asset'])
+    return pd.DataFrame(rng.normal(size=(len(index), len(columns))), index=index, columns=list(columns))
+
+
+def test_cube_refreshed_after_column_assignment():
+    data = _panel()
+    data.preprocessor.standarize('zscore')
+    data['x'] = data['x'] ** 3
+    result = data.preprocessor.standarize('zscore')
+    expected = data.groupby(level=0).transform(lambda x: (x - x.mean()) / x.std())
+    pd.testing.assert_frame_equal(result, expected, check_exact=False)
+
+
+def test_cube_refreshed_after_loc_assignment():
+    data = _panel()
+    data.converter.panelize()
+    data.loc[:, 'x'] = 1.0
+    assert (data.converter.panelize()['x'] == 1.0).all()
+
+
+def test_cube_refreshed_after_renaming_columns():
+    data = _panel()
+    data.converter.panelize()
+    data.columns = ['p', 'q']
+    assert list(data.converter.panelize().columns) == ['p', 'q']
+    assert list(data.calculator._to_cube().fields) == ['p', 'q']
+
+
+def test_cube_shared_until_modified():
+    data = _panel()
+    cube = data.calculator._to_cube()
+    assert data.converter._to_cube() is cube
+    data.iloc[0, 0] = 100.0
+    assert data.calculator._to_cube() is not cube
+
+
+def test_cache_does_not_keep_data_alive():
+    data = _panel()
+    data.calculator._to_cube()
+    data.calculator._to_ragged()
+    key = ('cube', id(data))
+    assert key in base._layout_cache
+    del data
+    gc.collect()
+    assert key not in base._layout_cache
+
+
+def test_cube_shared_for_single_column_frame():
+    data = _panel(columns=('x', ))
+    cube = data.calculator._to_cube()
+    assert data.converter._to_cube() is cube
+    data.iloc[0, 0] = 100.0
+    assert data.calculator._to_cube() is not cube
+
+
+def test_cube_refreshed_after_renaming_index():
+    data = _panel()
+    data.converter._to_cube()
+    data.index.names = ['day', 'code']
+    assert list(data.calculator._to_cube().index.names) == ['day', 'code']
+
+
+def test_workers_take_ragged_panel():
+    data = _panel().sample(frac=0.7, random_state=0)
+    ragged = data.converter.panelize(ragged=True)
+    assert ragged.nnz == len(data) and ragged.to_product().shape[0] == 30 * 8
+    pd.testing.assert_frame_equal(ragged.cross_section(ragged.dates[3]), 
+        data.xs(ragged.dates[3]).sort_index())
+    
+    worker = ba.PreProcessor(ragged)
+    assert worker._to_ragged() is ragged
+    expected = data.groupby(level=0).transform(lambda x: (x - x.mean()) / x.std())
+    pd.testing.assert_frame_equal(worker.standarize('zscore'), expected, check_exact=False)
+    pd.testing.assert_frame_equal(ba.PreProcessor(ragged).deextreme('std', n=1), 
+        data.preprocessor.deextreme('std', n=1))
+    series = ba.Converter(data['x'].converter.panelize(ragged=True)).price2ret(1)
+    pd.testing.assert_series_equal(series, data['x'].converter.price2ret(1))
+
+
+@pytest.mark.parametrize('how', ['sum', 'count', 'mean', 'std', 'min', 'max', 'median'])
+def test_group_index_reduce_matches_groupby(how):
+    data = _panel().sample(frac=0.8, random_state=0)
+    data.iloc[::9, 0] = np.nan
+    rng = np.random.default_rng(1)
+    industry = pd.Series(rng.choice(['bank', 'steel', 'media'], size=len(data)), index=data.index, 
+        name='industry').mask(rng.uniform(size=len(data)) < 0.1)
+    grouper = ba.GroupIndex.from_data(industry)
+    expected = data.groupby([pd.Grouper(level=0), industry]).agg(how)
+    result = pd.DataFrame(grouper.reduce(data.to_numpy(), how), index=grouper.labels, columns=data.columns)
+    pd.testing.assert_frame_equal(result, expected.astype('float64'), check_names=False)
+    transformed = grouper.transform(data.to_numpy(), how)
+    pd.testing.assert_frame_equal(pd.DataFrame(transformed, index=data.index, columns=data.columns), 
+        data.groupby([pd.Grouper(level=0), industry]).transform(how).astype('float64'))
+    
+    subset = data.iloc[::2]
+    aligned = grouper.align(subset.index)
+    assert grouper.align(subset.index) is aligned
+    np.testing.assert_array_equal(aligned.codes, ba.GroupIndex.from_data(industry.reindex(subset.index)).codes)
+
+
+def test_read_files_cache_hits_and_invalidation(tmp_path):
+    pytest.importorskip('diskcache')
+    calls = []
+    def reader(path, **kwargs):
+        calls.append(path)
+        return pd.read_csv(path, **kwargs)
+
+    path = str(tmp_path / 'a.csv')
+    pd.DataFrame({'a': [1, 2]}).to_csv(path, index=False)
+    # the lambda converter can't be pickled, the cache still works
+    kwargs = dict(converters={'a': lambda x: int(x) * 10}, sep=',')
+    first = base._read_files([path], ['a'], reader, cache=str(tmp_path / 'cache'), **kwargs)
+    second = base._read_files([path], ['a'], reader, cache=str(tmp_path / 'cache'), **kwargs)
+    assert len(calls) == 1
+    pd.testing.assert_frame_equal(first[0], second[0])
+    assert first[0]['a'].tolist() == [10, 20]
+
+    pd.DataFrame({'a': [3, 4]}).to_csv(path, index=False)
+    stat = os.stat(path)
+    os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10 ** 9))
+    third = base._read_files([path], ['a'], reader, cache=str(tmp_path / 'cache'), **kwargs)
+    assert len(calls) == 2
+    assert third[0]['a'].tolist() == [30, 40]
+
+
+SHARED_SCRIPT = '''
+import sys, pickle, subprocess
+import multiprocessing as mp
+import numpy as np, pandas as pd
+from bearalpha.quool import SharedPanel
+
+def work(shared):
+    total = float(np.nansum(shared.values))
+    shared.close()
+    return total
+
+if __name__ == '__main__':
+    index = pd.MultiIndex.from_product([pd.bdate_range('2020-01-01', periods=5), list('abc')])
+    shared = SharedPanel.publish(pd.DataFrame({'x': np.arange(15.0)}, index=index))
+    for method in ('fork', 'spawn'):
+        with mp.get_context(method).Pool(2) as pool:
+            print(method, pool.map(work, [shared] * 4))
+    # a process with its own resource tracker attaches and exits
+    subprocess.run([sys.executable, '-c', 'import sys, pickle; '
+        'shared = pickle.loads(sys.stdin.buffer.read()); print(float(shared.values.sum()))'],
+        input=pickle.dumps(shared), check=True)
+    print('again', work(pickle.loads(pickle.dumps(shared))))
+    shared.unlink()
+'''
+
+
+def test_shared_panel_attach_across_processes(tmp_path):
+    import sys
+    import subprocess
+    script = tmp_path / 'shared.py'
+    script.write_text(SHARED_SCRIPT)
+    root = os.path.dirname(os.path.dirname(os.path.abspath(ba.__file__)))
+    env = dict(os.environ, PYTHONPATH=root)
+    result = subprocess.run([sys.executable, str(script)], env=env, capture_output=True, 
+        text=True, timeout=120, cwd=str(tmp_path))
+    assert result.returncode == 0, result.stderr
+    assert result.stdout.split('\n')[:4] == ['fork [105.0, 105.0, 105.0, 105.0]', 
+        'spawn [105.0, 105.0, 105.0, 105.0]', '105.0', 'again 105.0']
+    assert 'leaked' not in result.stderr and 'Traceback' not in result.stderr, result.stderr
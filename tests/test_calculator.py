@@ -0,0 +1,166 @@
+import numpy as np
+import pandas as pd
+import pytest
+import bearalpha
+
+
+def _trending(offset, slope, periods=2000):
+    rng = np.random.default_rng(0)
+    dates = pd.bdate_range('2000-01-01', periods=periods)
+    return pd.Series(offset + slope * np.arange(periods) + rng.normal(size=periods), index=dates)
+
+
+@pytest.mark.parametrize('how', ['mean', 'std', 'var', 'skew'])
+def test_rollstat_on_large_offset_series(how):
+    data = _trending(1e4, 5.0)
+    result = data.calculator.rollstat(20, how)
+    # computed on each window from scratch
+    expected = data.rolling(20).apply(lambda x: getattr(pd.Series(x), how)(), raw=True)
+    pd.testing.assert_series_equal(result, expected, check_exact=False, atol=1e-8, rtol=1e-8, check_freq=False)
+
+
+def test_rollstat_pairwise_on_large_offset_series():
+    data, other = _trending(1e6, 0.0), _trending(0.0, 0.1) ** 2
+    result = data.calculator.rollstat(20, 'corr', other=other)
+    x, y = (np.lib.stride_tricks.sliding_window_view(s.to_numpy(), 20) for s in (data, other))
+    expected = pd.Series(np.r_[[np.nan] * 19, [np.corrcoef(a, b)[0, 1] for a, b in zip(x, y)]], index=data.index)
+    pd.testing.assert_series_equal(result, expected, check_exact=False, atol=1e-10, check_freq=False)
+
+
+def test_group_apply_single_process_runs_in_place(monkeypatch):
+    import multiprocessing
+    def fork(*args, **kwargs):
+        raise AssertionError('a pool is started for a single process')
+    monkeypatch.setattr(multiprocessing, 'get_context', fork)
+    index = pd.MultiIndex.from_product([pd.bdate_range('2020-01-01', periods=20), list('abcd')])
+    data = pd.Series(np.arange(len(index), dtype='float64'), index=index, name='x')
+    for backend in ('process', 'thread', 'shared'):
+        result = data.calculator.group_apply(pd.Grouper(level=1), lambda x: x.sum(), 
+            processes=1, backend=backend, progress=False)
+        pd.testing.assert_series_equal(result, data.groupby(level=1).sum(), check_names=False)
+
+
+def _prices(missing=True):
+    rng = np.random.default_rng(0)
+    index = pd.MultiIndex.from_product([pd.bdate_range('2020-01-01', periods=30), 
+        list('abcdef')], names=['datetime', 'asset'])
+    data = pd.DataFrame({'close': rng.normal(size=len(index)).cumsum(), 
+        'volume': rng.uniform(1, 2, size=len(index))}, index=index)
+    # unsorted with some assets suspended on some dates
+    return data.drop(index[::7]).sample(frac=1, random_state=0) if missing else data
+
+
+def _loc_rolling(data, window, func, offset=0, interval=1):
+    """the windows copied by date label, as rolling did before the window engine"""
+    data = data.sort_index()
+    ispanel = isinstance(data.index, pd.MultiIndex)
+    if ispanel:
+        data.index = data.index.remove_unused_levels()
+    dates = data.index.levels[0] if ispanel else data.index
+    results = []
+    for i in range(window - 1, dates.size, interval):
+        window_data = data.loc[dates[i - window + 1]:dates[i]].copy()
+        if ispanel:
+            window_data.index = window_data.index.remove_unused_levels()
+        res = func(window_data)
+        if isinstance(res, (pd.DataFrame, pd.Series)):
+            res.index = pd.MultiIndex.from_product([[dates[i - offset]], res.index])
+        else:
+            res = pd.DataFrame([res], index=[dates[i - offset]])
+        results.append(res)
+    return pd.concat(results)
+
+
+ROLLING_FUNCS = {
+    'frame': lambda x: x.groupby(level=1).mean(), 
+    'scalar': lambda x: x['close'].std() if isinstance(x, pd.DataFrame) else x.std(),
+    'levels': lambda x: pd.Series(x.index.levels[0].size),
+}
+
+
+@pytest.mark.parametrize('func', list(ROLLING_FUNCS))
+@pytest.mark.parametrize('offset, interval', [(0, 1), (2, 3)])
+def test_rolling_windows_match_loc_copies(func, offset, interval):
+    data = _prices()
+    func = ROLLING_FUNCS[func]
+    result = data.calculator.rolling(5, func, offset=offset, interval=interval)
+    pd.testing.assert_frame_equal(pd.DataFrame(result), 
+        pd.DataFrame(_loc_rolling(data, 5, func, offset, interval)))
+
+
+def test_rolling_raw_windows_are_readonly_views():
+    data = _prices()
+    shapes = []
+    def func(x):
+        shapes.append((x.shape, x.flags.writeable, np.shares_memory(x, data.calculator._to_cube().values)))
+        return np.nanmean(x, axis=0)
+    result = data.calculator.rolling(5, func, raw=True)
+    assert set(shapes) == {((5, 6, 2), False, True)}
+    expected = _loc_rolling(data, 5, lambda x: x.groupby(level=1).mean())
+    pd.testing.assert_frame_equal(result, expected, check_names=False)
+
+    series = data['close'].sort_index().xs('a', level=1)
+    result = series.calculator.rolling(5, lambda x: x.mean(), raw=True)
+    pd.testing.assert_frame_equal(result, _loc_rolling(series, 5, lambda x: x.mean()))
+
+
+def _window_mean(x):
+    # module level, so it can be sent to the processes
+    return x.groupby(level=1).mean()
+
+
+def _raw_window_mean(x):
+    return np.nanmean(x, axis=0)
+
+
+@pytest.mark.parametrize('func, raw', [(_window_mean, False), (_raw_window_mean, True)])
+@pytest.mark.parametrize('chunksize', [None, 1, 7])
+def test_parallel_rolling_matches_single_process(func, raw, chunksize):
+    data = _prices()
+    expected = data.calculator.rolling(5, func, raw=raw, interval=2)
+    result = data.calculator.rolling(5, func, raw=raw, interval=2, processes=2, chunksize=chunksize)
+    pd.testing.assert_frame_equal(result, expected)
+
+
+def _ols_rollreg(y, x, window, intercept=True, min_periods=None):
+    """statsmodels ols on the trailing window of the existing rows of each asset"""
+    import statsmodels.api as sm
+    x = x.to_frame() if isinstance(x, pd.Series) else x
+    names = (['const'] if intercept else []) + list(x.columns)
+    min_periods = max(window if min_periods is None else min_periods, len(names) + 1)
+    columns = pd.MultiIndex.from_tuples([('coef', name) for name in names] 
+        + [('tvalue', name) for name in names] + [('resid_std', '')])
+    result = pd.DataFrame(np.nan, index=y.index, columns=columns)
+    for _, series in y.groupby(level=1):
+        series = series.sort_index()
+        if isinstance(x.index, pd.MultiIndex):
+            exog = x.reindex(series.index)
+        else:
+            exog = x.reindex(series.index.get_level_values(0)).set_axis(series.index)
+        for end in range(series.size):
+            endog = series.iloc[max(0, end - window + 1):end + 1]
+            design = exog.loc[endog.index]
+            valid = endog.notna() & design.notna().all(axis=1)
+            if valid.sum() < min_periods:
+                continue
+            design = sm.add_constant(design[valid], has_constant='add') if intercept else design[valid]
+            fit = sm.OLS(endog[valid], design).fit()
+            result.loc[series.index[end]] = np.r_[fit.params, fit.tvalues, np.sqrt(fit.scale)]
+    return result
+
+
+@pytest.mark.parametrize('panel_x', [False, True])
+@pytest.mark.parametrize('intercept', [True, False])
+def test_rollreg_matches_windowed_statsmodels(panel_x, intercept):
+    data = _prices()
+    rng = np.random.default_rng(1)
+    if panel_x:
+        x = pd.DataFrame({'mkt': rng.normal(size=len(data)), 'size': rng.normal(size=len(data))}, 
+            index=data.index).mask(rng.uniform(size=(len(data), 2)) < 0.05)
+    else:
+        dates = data.index.get_level_values(0).unique().sort_values()
+        x = pd.Series(rng.normal(size=dates.size), index=dates, name='mkt')
+    y = (data['volume'] + 0.5 * data['close']).rename('y').mask(rng.uniform(size=len(data)) < 0.05)
+    result = y.calculator.rollreg(8, x, intercept=intercept, min_periods=6)
+    expected = _ols_rollreg(y, x, 8, intercept=intercept, min_periods=6)
+    pd.testing.assert_frame_equal(result, expected, rtol=1e-8, atol=1e-10)
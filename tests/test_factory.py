@@ -0,0 +1,155 @@
+import numpy as np
+import pandas as pd
+import pytest
+from bearalpha.quool import Factory, FactorCache
+
+
+def _panel(missing=True):
+    rng = np.random.default_rng(0)
+    index = pd.MultiIndex.from_product([pd.bdate_range('2020-01-01', periods=60), 
+        list('abcd')], names=['datetime', 'asset'])
+    data = pd.DataFrame({'close': 100 + rng.normal(size=len(index)).cumsum(), 
+        'volume': rng.uniform(1, 2, size=len(index))}, index=index)
+    # asset 'a' is suspended on some dates
+    return data.drop(index[::12]) if missing else data
+
+
+def test_ts_operators_skip_missing_rows():
+    data = _panel()
+    result = Factory(data).evaluate({'mean': 'ts_mean(close, 5)', 'std': 'ts_std(close, 5)', 
+        'delay': 'delay(close, 3)'})
+    grouped = data['close'].groupby(level=1)
+    pd.testing.assert_series_equal(result['mean'], grouped.rolling(5).mean().droplevel(0).reindex(data.index), 
+        check_names=False)
+    pd.testing.assert_series_equal(result['std'], grouped.rolling(5).std().droplevel(0).reindex(data.index), 
+        check_names=False)
+    pd.testing.assert_series_equal(result['delay'], grouped.shift(3), check_names=False)
+
+
+def test_intermediate_results_released():
+    factory = Factory(_panel())
+    factory.evaluate({'a': 'cs_rank(ts_mean(close, 5) / delay(close, 2))', 'b': 'delta(volume, 1)'})
+    kept = {factory.compile('cs_rank(ts_mean(close, 5) / delay(close, 2))'), factory.compile('delta(volume, 1)')}
+    assert set(factory._values) == kept
+    factory.evaluate('ts_sum(delta(volume, 1), 3)')
+    assert factory.compile('delta(volume, 1)') in factory._values
+
+
+def test_max_min_propagate_nan():
+    data = _panel(missing=False)
+    data.iloc[0, 0] = np.nan
+    result = Factory(data).evaluate({'max': 'max(close, volume)', 'min': 'min(close, volume)'})
+    assert result.iloc[0].isna().all()
+
+
+def test_ts_sum_infinite_values():
+    data = _panel(missing=False)
+    data['volume'] = 1.0
+    data.loc[(data.index.levels[0][10], 'a'), 'volume'] = np.inf
+    data.loc[(data.index.levels[0][10], 'b'), 'volume'] = np.inf
+    data.loc[(data.index.levels[0][11], 'b'), 'volume'] = -np.inf
+    result = Factory(data).evaluate('ts_sum(volume, 3)').unstack()
+    assert np.isposinf(result['a'].iloc[10:13]).all() and result['a'].iloc[13] == 3
+    assert result['b'].iloc[11:13].isna().all() and result['b'].iloc[14] == 3
+
+
+def test_factor_cache_partial_update(tmp_path):
+    data = _panel()
+    dates = data.index.get_level_values(0).unique()
+    expr = 'ts_mean(close, 5) - delay(close, 3)'
+    cache = FactorCache(str(tmp_path))
+    cache.get(data.loc[data.index.get_level_values(0) < dates[40]], expr)
+    result = cache.get(data, expr)
+    assert cache.partials == 1
+    pd.testing.assert_series_equal(result.sort_index(), Factory(data).evaluate(expr).sort_index(), 
+        check_names=False, check_index_type=False, check_freq=False)
+
+
+def test_factor_cache_keeps_universes_apart(tmp_path):
+    data = _panel()
+    expr = 'ts_mean(close, 5)'
+    cache = FactorCache(str(tmp_path))
+    cache.get(data, expr)
+    subset = data.loc[data.index.get_level_values(1).isin(['b', 'c'])]
+    result = cache.get(subset, expr)
+    assert cache.misses == 2
+    assert len(result) == len(subset)
+    cache.get(data, expr)
+    assert cache.hits == 1
+
+
+def test_factor_cache_meta_written_last(tmp_path, monkeypatch):
+    import os
+    data = _panel()
+    dates = data.index.get_level_values(0).unique()
+    expr = 'ts_mean(close, 5)'
+    cache = FactorCache(str(tmp_path))
+    cache.get(data.loc[data.index.get_level_values(0) < dates[40]], expr)
+
+    replace = os.replace
+    def fail(src, dst):
+        if dst.endswith('_cache.json'):
+            raise OSError('disk full')
+        return replace(src, dst)
+    monkeypatch.setattr(os, 'replace', fail)
+    with pytest.raises(OSError):
+        cache.get(data, expr)
+    monkeypatch.undo()
+
+    # the meta still points to the old last date, the appended tail is not read
+    result = cache.get(data, expr)
+    assert cache.partials == 2
+    pd.testing.assert_series_equal(result.sort_index(), Factory(data).evaluate(expr).sort_index(), 
+        check_names=False, check_index_type=False, check_freq=False)
+    assert not [f for _, _, names in os.walk(tmp_path) for f in names if f.endswith('.tmp')]
+
+
+def _gappy_panel():
+    rng = np.random.default_rng(1)
+    index = pd.MultiIndex.from_product([pd.bdate_range('2020-01-01', periods=60), 
+        list('abcdef')], names=['datetime', 'asset'])
+    data = pd.DataFrame({'close': 100 + rng.normal(size=len(index)).cumsum(), 
+        'volume': rng.uniform(1, 2, size=len(index))}, index=index)
+    # long suspensions of some assets, and a few missing rows of the others
+    dates = index.get_level_values(0)
+    suspended = ((index.get_level_values(1) == 'a') & (dates >= dates[120]) & (dates < dates[300])) \
+        | ((index.get_level_values(1) == 'b') & (dates >= dates[250]) & (dates < dates[330]))
+    return data[~suspended & (rng.uniform(size=len(index)) > 0.1)]
+
+
+@pytest.mark.parametrize('expr', ['ts_mean(cs_rank(close), 5)', 
+    'ts_mean(cs_rank(ts_mean(close, 3)), 4) + delay(cs_zscore(volume), 2)', 'cs_rank(ts_std(close, 6))'])
+def test_factor_cache_partial_update_with_cross_sections_in_windows(tmp_path, expr):
+    data = _gappy_panel()
+    dates = data.index.get_level_values(0).unique()
+    cache = FactorCache(str(tmp_path))
+    cache.get(data.loc[data.index.get_level_values(0) < dates[55]], expr)
+    result = cache.get(data, expr)
+    assert cache.partials == 1
+    pd.testing.assert_series_equal(result.sort_index(), Factory(data).evaluate(expr).sort_index(), 
+        check_names=False, check_index_type=False, check_freq=False)
+
+
+def test_factor_cache_partial_update_of_callable(tmp_path):
+    data = _gappy_panel()
+    dates = data.index.get_level_values(0).unique()
+    factor = lambda x: Factory(x).evaluate('ts_mean(cs_rank(close), 5)').rename('factor')
+    cache = FactorCache(str(tmp_path))
+    cache.get(data.loc[data.index.get_level_values(0) < dates[55]], factor, lookback=4)
+    result = cache.get(data, factor, lookback=4)
+    assert cache.partials == 1
+    pd.testing.assert_series_equal(result.sort_index(), factor(data).sort_index(), 
+        check_names=False, check_index_type=False, check_freq=False)
+
+
+def test_warmup_follows_windows_through_cross_sections():
+    data = _gappy_panel()
+    factory = Factory(data)
+    dates = factory.cube.dates
+    assert factory.warmup('cs_rank(close)', dates[50]) == dates[50]
+    # asset 'a' was suspended, its 4 previous rows go back beyond the suspension
+    previous = data.xs('a', level=1).index
+    assert factory.warmup('ts_mean(close, 5)', dates[50]) == previous[previous < dates[50]][-4]
+    assert factory.warmup('ts_mean(cs_rank(close), 5)', dates[50]) == factory.warmup(4, dates[50])
+    assert factory.warmup('ts_mean(cs_rank(ts_mean(close, 3)), 4)', dates[50]) \
+        <= factory.warmup(5, dates[50])
@@ -0,0 +1,71 @@
+import os
+import json
+import numpy as np
+import pandas as pd
+import pyarrow.parquet as pq
+import pytest
+from bearalpha.quool import PanelStore
+
+
+def _panel(start, periods):
+    index = pd.MultiIndex.from_product([pd.bdate_range(start, periods=periods), 
+        ['a', 'b']], names=['datetime', 'asset'])
+    return pd.DataFrame({'x': np.arange(len(index), dtype='float64')}, index=index)
+
+
+def test_merge_replaces_partition(tmp_path):
+    store = PanelStore(str(tmp_path), freq='M')
+    store.write(_panel('2022-01-03', 10))
+    update = _panel('2022-01-10', 10) + 100
+    store.write(update)
+    files = [f for _, _, names in os.walk(tmp_path) for f in names]
+    assert not [f for f in files if f.endswith('.tmp')]
+    result = store.read()
+    assert len(result) == 2 * len(pd.bdate_range('2022-01-03', '2022-01-21'))
+    pd.testing.assert_series_equal(result['x'].loc[update.index], update['x'], check_names=False)
+
+
+def test_failed_merge_keeps_old_files(tmp_path, monkeypatch):
+    store = PanelStore(str(tmp_path), freq='M')
+    data = _panel('2022-01-03', 10)
+    store.write(data)
+
+    def fail(*args, **kwargs):
+        raise OSError('disk full')
+    monkeypatch.setattr(pq, 'write_table', fail)
+    with pytest.raises(OSError):
+        store.write(_panel('2022-01-10', 10))
+    monkeypatch.undo()
+
+    files = [f for _, _, names in os.walk(tmp_path) for f in names]
+    assert not [f for f in files if f.endswith('.tmp')]
+    pd.testing.assert_frame_equal(store.read(), data, check_index_type=False, check_freq=False)
+
+
+@pytest.mark.parametrize('freq', ['W', 'D', 'Q', 'Y', 'M'])
+def test_read_range_with_frequencies(tmp_path, freq):
+    data = _panel('2021-12-20', 120)
+    store = PanelStore(str(tmp_path), freq=freq)
+    store.write(data.iloc[:100])
+    store.write(data.iloc[80:])
+    assert all(os.path.dirname(f) == str(tmp_path / f'partition={p}') 
+        for p in store.partitions for f in store._files(p))
+    dates = data.index.get_level_values(0)
+    for start, end in [('2022-02-01', None), (None, '2022-03-15'), ('2022-01-05', '2022-04-02')]:
+        expected = data.loc[(dates >= (start or dates.min())) & (dates <= (end or dates.max()))]
+        pd.testing.assert_frame_equal(store.read(start=start, end=end), expected, 
+            check_index_type=False, check_freq=False)
+
+
+def test_old_partition_names_migrated(tmp_path):
+    data = _panel('2022-01-03', 60)
+    store = PanelStore(str(tmp_path), freq='M')
+    store.write(data)
+    for partition in store.partitions:
+        period = str(pd.Period(pd.Timestamp(partition), freq='M'))
+        os.rename(tmp_path / f'partition={partition}', tmp_path / f'partition={period}')
+    meta = json.loads((tmp_path / '_meta.json').read_text())
+    meta.pop('layout')
+    (tmp_path / '_meta.json').write_text(json.dumps(meta))
+    pd.testing.assert_frame_equal(PanelStore(str(tmp_path)).read(start='2022-02-01'), 
+        data.loc[data.index.get_level_values(0) >= '2022-02-01'], check_index_type=False, check_freq=False)
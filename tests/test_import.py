@@ -0,0 +1,61 @@
+import os
+import sys
+import subprocess
+import bearalpha
+
+
+# cumulative microseconds `import bearalpha` may take, as reported by -X importtime
+IMPORT_BUDGET = 100_000
+HEAVY_MODULES = ('pandas', 'numpy', 'pyarrow', 'backtrader', 'matplotlib', 'sqlalchemy', 'requests')
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(bearalpha.__file__)))
+
+
+def _run(code, *options):
+    env = dict(os.environ, PYTHONPATH=os.pathsep.join(filter(None, [ROOT, os.environ.get('PYTHONPATH')])))
+    return subprocess.run([sys.executable, *options, '-c', code], env=env,
+        capture_output=True, text=True, check=True)
+
+
+def _import_time():
+    stderr = _run('import bearalpha', '-X', 'importtime').stderr
+    for line in stderr.splitlines():
+        fields = line.split('|')
+        if len(fields) == 3 and fields[2].strip() == 'bearalpha':
+            return int(fields[1])
+    raise AssertionError(f'bearalpha not found in the import times:\n{stderr}')
+
+
+def test_import_time_within_budget():
+    spent = min(_import_time() for _ in range(3))
+    assert spent <= IMPORT_BUDGET, f'import bearalpha took {spent}us, budget {IMPORT_BUDGET}us'
+
+
+def test_import_is_lazy():
+    code = ('import sys, bearalpha; '
+        f'print(" ".join(name for name in {HEAVY_MODULES!r} if name in sys.modules))')
+    assert _run(code).stdout.split() == []
+
+
+def test_accessors_registered_with_pandas_imported_first():
+    code = ('import sys, pandas as pd, bearalpha; '
+        'print(type(pd.Series([1.0]).calculator).__name__, "backtrader" in sys.modules)')
+    assert _run(code).stdout.split() == ['Calculator', 'False']
+
+
+def test_accessors_registered_on_first_name_used():
+    code = ('import sys, bearalpha as ba; '
+        'print(type(ba.DataFrame({"a": [1.0]}).calculator).__name__, "backtrader" in sys.modules)')
+    assert _run(code).stdout.split() == ['Calculator', 'False']
+
+
+def test_import_leaves_import_system_alone():
+    code = ('import sys; finders = list(sys.meta_path); import bearalpha; '
+        'print(sys.meta_path == finders)')
+    assert _run(code).stdout.split() == ['True']
+
+
+def test_namespace_clean():
+    names = dir(bearalpha)
+    assert 'annotations' not in names and 'lazy_getattr' not in names
+    assert set(bearalpha.__all__) <= set(names)
+    assert {'DataFrame', 'Series'} <= set(names)
@@ -0,0 +1,335 @@
+import os
+import numpy as np
+import pandas as pd
+import pytest
+import bearalpha
+
+
+def _prices(missing=True):
+    rng = np.random.default_rng(0)
+    index = pd.MultiIndex.from_product([pd.bdate_range('2020-01-01', periods=40), 
+        list('abcd')], names=['datetime', 'asset'])
+    close = 10 * np.exp(rng.normal(scale=0.02, size=len(index)).cumsum())
+    data = pd.DataFrame({'open': close * rng.uniform(0.98, 1.02, size=len(index)), 
+        'close': close}, index=index)
+    data.iloc[5, 1] = np.nan
+    # some assets are suspended on some dates
+    return data.drop(index[::7]) if missing else data
+
+
+def _groupby_price2ret(data, period, open_col='close', close_col='close', method='algret', lag=1):
+    """the per asset groupby shift implementation before the wide matrix path"""
+    grouped = data.groupby(level=1)
+    if period > 0:
+        close_price = data
+        open_price = grouped.shift(period)
+    else:
+        close_price = grouped.shift(period - lag)
+        open_price = grouped.shift(-lag)
+    if isinstance(data, pd.DataFrame):
+        close_price, open_price = close_price[close_col], open_price[open_col]
+    if method == 'algret':
+        return (close_price - open_price) / open_price
+    return np.log(close_price / open_price)
+
+
+def _statements():
+    dates = pd.to_datetime(['2020-03-31', '2020-06-30', '2020-09-30', '2020-12-31', 
+        '2021-03-31', '2021-09-30', '2021-12-31'])
+    index = pd.MultiIndex.from_product([dates, ['a', 'b']], names=['date', 'asset'])
+    ytd = np.array([1, 10, 3, 30, 6, 60, 10, 100, 2, 20, 7, 70, 9, 90], dtype='float64')
+    return pd.Series(ytd, index=index, name='profit')
+
+
+def test_ytd_diff():
+    data = _statements()
+    result = data.converter.cum2diff(ytd=True)
+    expected = [1, 10, 2, 20, 3, 30, 4, 40, 2, 20, np.nan, np.nan, 2, 20]
+    np.testing.assert_array_equal(result.to_numpy(), expected)
+
+
+def test_ytd_diff_honours_period_and_keep():
+    data = _statements()
+    result = data.converter.cum2diff(period=2, keep=False, ytd=True)
+    expected = [np.nan] * 4 + [5, 50, 7, 70, np.nan, np.nan, 5, 50, np.nan, np.nan]
+    np.testing.assert_array_equal(result.to_numpy(), expected)
+
+
+def test_grouper_named_year():
+    data = _statements().to_frame()
+    data['year'] = data.index.get_level_values(0).year
+    result = data.converter.cum2diff(grouper='year')['profit']
+    expected = data.groupby(['year', pd.Grouper(level=1)])['profit'].diff()
+    expected = expected.fillna(data['profit'])
+    pd.testing.assert_series_equal(result, expected)
+
+
+def test_tdbuckets_cache_bounded():
+    from bearalpha.quool import processor
+    calendar = pd.bdate_range('2020-01-01', periods=100)
+    for rule in range(1, 2 * processor._TDBUCKETS_CACHE_SIZE):
+        processor.Converter._tdbuckets(calendar, rule)
+    assert len(processor._tdbuckets_cache) == processor._TDBUCKETS_CACHE_SIZE
+
+
+@pytest.mark.parametrize('period', [1, 3, -1, -3])
+@pytest.mark.parametrize('lag', [0, 1, 2])
+@pytest.mark.parametrize('method', ['algret', 'logret'])
+@pytest.mark.parametrize('columns', [('close', 'close'), ('open', 'close'), None])
+def test_price2ret_matches_groupby(period, lag, method, columns):
+    data = _prices()
+    if columns is None:
+        data, columns = data['close'], ('close', 'close')
+    result = data.converter.price2ret(period, *columns, method=method, lag=lag)
+    expected = _groupby_price2ret(data, period, *columns, method=method, lag=lag)
+    pd.testing.assert_series_equal(result, expected, check_names=False, rtol=1e-12, atol=1e-12)
+
+
+def test_price2ret_periods_list():
+    data = _prices()
+    periods = [1, -1, -5]
+    result = data.converter.price2ret(periods, 'open', 'close', method='logret')
+    assert list(result.columns) == periods
+    for period in periods:
+        expected = _groupby_price2ret(data, period, 'open', 'close', method='logret')
+        pd.testing.assert_series_equal(result[period], expected, check_names=False, rtol=1e-12, atol=1e-12)
+
+
+def test_shrink_unshrink_round_trip():
+    index = pd.MultiIndex.from_product([pd.bdate_range('2020-01-01', periods=50), 
+        [f'{i:06d}.SZ' for i in range(20)]], names=['datetime', 'asset'])
+    rng = np.random.default_rng(0)
+    data = pd.DataFrame({'halves': rng.integers(0, 64, size=len(index)) / 2, 
+        'price': rng.uniform(1, 100, size=len(index)), 'volume': rng.integers(0, 1000, size=len(index)), 
+        'industry': rng.choice(['bank', 'steel', 'media'], size=len(index))}, index=index)
+    original = data.copy()
+    schema = data.converter.shrink(rtol=0, index=True)
+    assert data['halves'].dtype == 'float16' and data['price'].dtype == 'float64'
+    assert data['volume'].dtype == 'int16' and isinstance(data['industry'].dtype, pd.CategoricalDtype)
+    assert all(level.dtype == 'int32' for level in data.index.levels)
+    assert data.memory_usage(deep=True).sum() < original.memory_usage(deep=True).sum() / 2
+    pd.testing.assert_frame_equal(data.converter.unshrink(), original)
+    pd.testing.assert_frame_equal(data.converter.unshrink(schema), original)
+
+
+def test_shrink_float_within_rtol():
+    values = np.random.default_rng(0).uniform(1, 100, size=1000)
+    data = pd.DataFrame({'price': values})
+    data.converter.shrink(rtol=1e-3)
+    assert data['price'].dtype == 'float16'
+    assert np.max(np.abs(data['price'].to_numpy('float64') - values) / values) <= 1e-3
+    data = pd.DataFrame({'price': values})
+    data.converter.shrink(rtol=1e-3, allow_halffloat=False)
+    assert data['price'].dtype == 'float32'
+
+
+def _minutes(days=3, assets=3):
+    rng = np.random.default_rng(0)
+    session = np.r_[pd.timedelta_range('09:31:00', '11:30:00', freq='min'), 
+        pd.timedelta_range('13:01:00', '15:00:00', freq='min')]
+    datetimes = (pd.bdate_range('2020-01-01', periods=days).to_numpy()[:, None] + session).ravel()
+    index = pd.MultiIndex.from_product([pd.DatetimeIndex(datetimes), 
+        [f'{i:06d}' for i in range(assets)]], names=['datetime', 'asset'])
+    close = 10 * np.exp(rng.normal(scale=1e-3, size=len(index)).cumsum())
+    data = pd.DataFrame({'open': close * (1 + rng.normal(scale=1e-4, size=len(index))), 
+        'high': close * 1.001, 'low': close * 0.999, 'close': close, 
+        'volume': rng.integers(100, 1000, size=len(index))}, index=index)
+    # a few bars are missing
+    return data.drop(index[[5, 700, 1500]])
+
+
+def test_minute_bar_coded_levels():
+    data = _minutes()
+    coded = data.converter.spdatetime(coded=True)
+    assert coded.index.nlevels == 3 and coded.index.levels[1].dtype == 'int16'
+    days = coded.index.get_level_values(0)
+    minutes = coded.index.get_level_values(1).to_numpy('int64')
+    restored = days + pd.to_timedelta(minutes, unit='min')
+    np.testing.assert_array_equal(restored, data.index.get_level_values(0))
+    np.testing.assert_array_equal(coded.to_numpy(), data.to_numpy())
+
+
+def test_minute_bar_aggregation():
+    data = _minutes()
+    how = {'open': 'first', 'high': 'max', 'low': 'min', 'close': 'last', 'volume': 'sum'}
+    datetimes = data.index.get_level_values(0)
+    daily = data.converter.minute2bar()
+    expected = data.groupby([datetimes.normalize().rename('date'), data.index.get_level_values(1)]).agg(how)
+    pd.testing.assert_frame_equal(daily[list(how)], expected, check_dtype=False)
+    assert daily.equals(data.converter.spdatetime(coded=True).converter.minute2bar())
+
+    bars = data.converter.minute2bar(30)
+    assert len(bars) == 3 * 8 * 3
+    assert set(bars.index.get_level_values(0).strftime('%H:%M')) == \
+        {'10:00', '10:30', '11:00', '11:30', '13:30', '14:00', '14:30', '15:00'}
+    first = bars.xs(pd.Timestamp('2020-01-01 11:30'), level=0)
+    window = data.loc[pd.Timestamp('2020-01-01 11:01'):pd.Timestamp('2020-01-01 11:30')]
+    pd.testing.assert_frame_equal(first[list(how)], window.groupby(level=1).agg(how), check_dtype=False)
+
+
+@pytest.mark.parametrize('period', [1, -5])
+def test_minute_bar_returns(period):
+    data = _minutes()
+    day = data.index.get_level_values(0).normalize()
+    asset = data.index.get_level_values(1)
+    for session, grouped in [('within', data['close'].groupby([day, asset])), 
+        ('across', data['close'].groupby(asset))]:
+        result = data.converter.minute2ret(period, session=session)
+        if period > 0:
+            expected = (data['close'] - grouped.shift(period)) / grouped.shift(period)
+        else:
+            expected = (grouped.shift(period - 1) - grouped.shift(-1)) / grouped.shift(-1)
+        pd.testing.assert_series_equal(result, expected, check_names=False)
+
+
+def _factors(missing=True):
+    rng = np.random.default_rng(1)
+    index = pd.MultiIndex.from_product([pd.bdate_range('2020-01-01', periods=20), 
+        [f'{i:03d}' for i in range(30)]], names=['datetime', 'asset'])
+    data = pd.DataFrame({'x': rng.standard_t(3, size=len(index)), 
+        'y': rng.lognormal(size=len(index))}, index=index)
+    data = data.mask(rng.uniform(size=data.shape) < 0.1)
+    industry = pd.Series(rng.choice(['bank', 'steel', 'media'], size=len(index)), index=index, name='industry')
+    if missing:
+        keep = rng.uniform(size=len(index)) > 0.2
+        data, industry = data[keep], industry[keep]
+    return data, industry
+
+
+def _old_preprocess(data, step, method, n=None, grouper=None):
+    """the groupby apply implementation before the vectorized one"""
+    def _zscore(data):
+        return (data - data.mean()) / data.std()
+
+    def _minmax(data):
+        return (data - data.min()) / (data.max() - data.min())
+
+    def _mad(data):
+        median = data.median()
+        mad = (data - median).abs().median()
+        return data.clip(median - n * mad, median + n * mad, axis=1)
+
+    def _std(data):
+        mean, std = data.mean(), data.std()
+        return data.clip(mean - n * std, mean + n * std, axis=1)
+
+    def _drop(data):
+        down, up = (n / 2, 1 - n / 2) if not isinstance(n, (list, tuple)) else n
+        return data.clip(data.quantile(down), data.quantile(up), axis=1)
+
+    def _zero(data):
+        return data.fillna(0)
+
+    def _mean(data):
+        return data.fillna(data.mean())
+
+    def _median(data):
+        return data.fillna(data.median())
+
+    func = {'standarize': {'zscore': _zscore, 'minmax': _minmax}, 
+        'deextreme': {'mad': _mad, 'std': _std, 'drop': _drop},
+        'fillna': {'zero': _zero, 'mean': _mean, 'median': _median}}[step][method]
+    data = data.to_frame() if isinstance(data, pd.Series) else data
+    keys = [pd.Grouper(level=0)] + ([] if grouper is None else [grouper])
+    return data.groupby(keys, group_keys=False).apply(func).reindex(data.index)
+
+
+PREPROCESS_CASES = [('standarize', 'zscore', None), ('standarize', 'minmax', None), 
+    ('deextreme', 'mad', 5), ('deextreme', 'mad', 1), ('deextreme', 'std', 1), ('deextreme', 'drop', 0.2), 
+    ('deextreme', 'drop', (0.05, 0.9)), ('fillna', 'zero', None), ('fillna', 'mean', None), 
+    ('fillna', 'median', None)]
+
+
+@pytest.mark.parametrize('step, method, n', PREPROCESS_CASES)
+@pytest.mark.parametrize('grouped', [False, True])
+@pytest.mark.parametrize('missing', [False, True])
+def test_preprocess_matches_groupby_apply(step, method, n, grouped, missing):
+    data, industry = _factors(missing)
+    grouper = industry if grouped else None
+    kwargs = {} if n is None else {'n': n}
+    result = getattr(data.preprocessor, step)(method, grouper=grouper, **kwargs)
+    expected = _old_preprocess(data, step, method, n, grouper)
+    pd.testing.assert_frame_equal(result, expected, rtol=1e-12, atol=1e-12)
+    result = getattr(data['x'].preprocessor, step)(method, grouper=grouper, **kwargs)
+    pd.testing.assert_frame_equal(result, expected[['x']], rtol=1e-12, atol=1e-12)
+
+
+PIPELINES = [[('deextreme', 'mad'), ('standarize', 'zscore'), ('fillna', 'zero')],
+    [('deextreme', 'drop', {'n': 0.2}), ('fillna', 'median'), ('standarize', 'minmax')],
+    [('deextreme', 'std', {'n': 1}), ('fillna', 'ffill'), ('standarize', 'zscore'), ('fillna', 'mean')]]
+
+
+@pytest.mark.parametrize('steps', PIPELINES)
+@pytest.mark.parametrize('grouper', [None, 'series', 'groupindex'])
+@pytest.mark.parametrize('threads', [1, 3])
+def test_pipeline_matches_sequential_steps(steps, grouper, threads):
+    from bearalpha.quool import GroupIndex
+    data, industry = _factors()
+    grouper = {None: None, 'series': industry, 'groupindex': GroupIndex.from_data(industry)}[grouper]
+    result = data.preprocessor.pipeline(steps, grouper=grouper, threads=threads)
+    expected = data
+    for func, method, *kwargs in steps:
+        expected = getattr(expected.preprocessor, func)(method, grouper=grouper, **(kwargs[0] if kwargs else {}))
+    pd.testing.assert_frame_equal(result, expected, rtol=1e-12, atol=1e-12)
+
+
+def _ols_neutralize(data, industry=None, size=None):
+    """residuals of a statsmodels ols on each date, the reference of neutralize"""
+    import statsmodels.api as sm
+    result = pd.DataFrame(np.nan, index=data.index, columns=data.columns)
+    exposures = []
+    if industry is not None:
+        exposures.append(pd.get_dummies(industry.reindex(data.index), dtype='float64'))
+    else:
+        exposures.append(pd.DataFrame({'const': 1.0}, index=data.index))
+    if size is not None:
+        exposures.append(size.reindex(data.index).to_frame() if isinstance(size, pd.Series) else size.reindex(data.index))
+    exposure = pd.concat(exposures, axis=1)
+    valid = exposure.notna().all(axis=1)
+    if industry is not None:
+        valid &= industry.reindex(data.index).notna()
+    for column in data.columns:
+        for _, y in data[column][valid & data[column].notna()].groupby(level=0):
+            x = exposure.loc[y.index]
+            x = x.loc[:, (x != 0).any()]
+            result.loc[y.index, column] = sm.OLS(y, x).fit().resid
+    return result
+
+
+@pytest.mark.parametrize('case', ['industry', 'size', 'both', 'groupindex', 'exposures'])
+def test_neutralize_matches_statsmodels(case):
+    from bearalpha.quool import GroupIndex
+    data, industry = _factors()
+    rng = np.random.default_rng(2)
+    industry = industry.mask(rng.uniform(size=industry.size) < 0.05)
+    size = pd.Series(rng.lognormal(10, size=len(data)), index=data.index).mask(rng.uniform(size=len(data)) < 0.05)
+    exposures = pd.DataFrame({'size': np.log(size), 'beta': rng.normal(size=len(data))}, index=data.index)
+    kwargs, reference = {'industry': {'industry': industry}, 'size': {'size': size}, 
+        'both': {'industry': industry, 'size': size}, 
+        'groupindex': {'industry': GroupIndex.from_data(industry), 'size': size},
+        'exposures': {'industry': industry, 'size': exposures, 'logsize': False}}[case], {}
+    if case != 'size':
+        reference['industry'] = industry
+    if case != 'industry':
+        reference['size'] = exposures if case == 'exposures' else np.log(size)
+    result = data.preprocessor.neutralize(**kwargs)
+    pd.testing.assert_frame_equal(result, _ols_neutralize(data, **reference), rtol=1e-10, atol=1e-12)
+
+
+@pytest.mark.parametrize('steps', PIPELINES)
+@pytest.mark.parametrize('grouped', [False, True])
+def test_incremental_matches_full_pipeline(tmp_path, steps, grouped):
+    data, industry = _factors()
+    grouper = industry if grouped else None
+    dates = data.index.get_level_values(0).unique()
+    results = []
+    for start, stop in [(0, 7), (7, 8), (5, 20)]:
+        batch = data.loc[dates[start]:dates[stop - 1]]
+        results.append(batch.preprocessor.incremental(str(tmp_path), steps, grouper=grouper))
+    expected = data.preprocessor.pipeline(steps, grouper=grouper)
+    pd.testing.assert_frame_equal(pd.concat(results), expected, rtol=1e-12, atol=1e-12)
+    from bearalpha.quool import PanelStore
+    stored = PanelStore(str(tmp_path)).read().reindex(expected.index)
+    pd.testing.assert_frame_equal(stored, expected, rtol=1e-12, atol=1e-12, check_freq=False)
+    assert sorted(name for name in os.listdir(tmp_path) if not name.startswith('partition=')) \
+        == ['_meta.json', '_preprocess.pkl']